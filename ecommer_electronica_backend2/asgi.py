@@ -12,5 +12,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommer_electronica_backend2.settings')
+os.environ.setdefault('ROOT_URLCONF', 'ecommer_electronica_backend2.asgi_urls')
 
 application = get_asgi_application()
@@ -0,0 +1,9 @@
+from django.urls import include, path
+
+from .urls import urlpatterns as wsgi_urlpatterns
+
+# URLconf del proceso ASGI (ver asgi.py): las lecturas del catálogo van a las vistas
+# async y el resto cae en las mismas rutas que bajo WSGI.
+urlpatterns = [
+    path('api/', include('tienda.async_urls')),
+] + wsgi_urlpatterns
@@ -0,0 +1,153 @@
+"""
+Backend MySQL con un pool de conexiones por proceso, compartido por los hilos del worker.
+
+Django abre una conexión por hilo; con CONN_MAX_AGE = 0 la cierra al terminar cada
+request. Este backend intercepta ese cierre y devuelve la conexión al pool, así el
+siguiente request (de cualquier hilo) la reutiliza sin repetir el handshake TCP y la
+autenticación contra MySQL. Al volver al pool la conexión se resetea con
+COM_RESET_CONNECTION; con un servidor que no lo soporta se cierra en lugar de reusarse.
+
+Configuración en DATABASES["default"]:
+
+    "ENGINE": "ecommer_electronica_backend2.mysql_pool",
+    "CONN_MAX_AGE": 0,
+    "POOL": {"SIZE": 10, "RECYCLE": 1800, "PING_AFTER": 30},
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+from django.db.backends.mysql import base as mysql_base
+
+# PyMySQL no expone COM_RESET_CONNECTION (MySQL 5.7.3+, MariaDB 10.2.4+)
+COM_RESET_CONNECTION = 0x1F
+
+
+class ConnectionPool:
+    # SIZE: conexiones ociosas que se conservan (no limita las conexiones en uso).
+    # RECYCLE: segundos de vida máxima, por debajo del wait_timeout del servidor.
+    # PING_AFTER: una conexión ociosa por más tiempo se verifica antes de entregarla.
+    def __init__(self, size=10, recycle=1800, ping_after=30):
+        self.size = size
+        self.recycle = recycle
+        self.ping_after = ping_after
+        self.lock = threading.Lock()
+        self.idle = deque()
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+
+    def acquire(self, connect):
+        now = time.monotonic()
+        while True:
+            with self.lock:
+                if not self.idle:
+                    break
+                connection, created_at, released_at = self.idle.pop()
+
+            if now - created_at > self.recycle or (
+                now - released_at > self.ping_after and not self.ping(connection)
+            ):
+                self.discard(connection)
+                continue
+
+            with self.lock:
+                self.reused += 1
+            connection.pool_created_at = created_at
+            return connection
+
+        connection = connect()
+        with self.lock:
+            self.created += 1
+        connection.pool_created_at = now
+        return connection
+
+    def release(self, connection):
+        try:
+            self.reset(connection)
+        except Exception:
+            self.discard(connection)
+            return
+
+        with self.lock:
+            if len(self.idle) < self.size:
+                self.idle.append((connection, connection.pool_created_at, time.monotonic()))
+                return
+        self.discard(connection)
+
+    def reset(self, connection):
+        # Deshace la transacción abierta y el estado de sesión del request anterior
+        # (variables, tablas temporales, LOCK TABLES, GET_LOCK). El reset vuelve las
+        # variables a los valores globales del servidor: se repite lo que PyMySQL
+        # configura al conectar.
+        connection._execute_command(COM_RESET_CONNECTION, b"")
+        connection._read_ok_packet()
+        connection.set_character_set(connection.charset, connection.collation)
+        with connection.cursor() as cursor:
+            if connection.sql_mode is not None:
+                cursor.execute("SET sql_mode=%s", (connection.sql_mode,))
+            if connection.init_command is not None:
+                cursor.execute(connection.init_command)
+        connection.autocommit(True)
+
+    def ping(self, connection):
+        try:
+            connection.ping(reconnect=False)
+        except Exception:
+            return False
+        return True
+
+    def discard(self, connection):
+        with self.lock:
+            self.discarded += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def stats(self):
+        with self.lock:
+            return {
+                "idle": len(self.idle),
+                "created": self.created,
+                "reused": self.reused,
+                "discarded": self.discarded,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, options):
+    # Un pool por alias y por proceso: los workers de gunicorn no comparten sockets
+    key = (alias, os.getpid())
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(
+                size=options.get("SIZE", 10),
+                recycle=options.get("RECYCLE", 1800),
+                ping_after=options.get("PING_AFTER", 30),
+            )
+        return _pools[key]
+
+
+class DatabaseWrapper(mysql_base.DatabaseWrapper):
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict.get("POOL", {}))
+
+    def get_new_connection(self, conn_params):
+        return self.pool.acquire(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+
+    def _close(self):
+        if self.connection is None:
+            return
+        if self.in_atomic_block:
+            # Django conserva la referencia mientras dura el bloque atómico: no se puede
+            # entregar a otro hilo.
+            with self.wrap_database_errors:
+                return self.connection.close()
+        self.pool.release(self.connection)
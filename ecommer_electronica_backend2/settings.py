@@ -3,10 +3,6 @@ from pathlib import Path
 import environ
 import pymysql
 
-import cloudinary
-import cloudinary.uploader
-import cloudinary.api
-
 pymysql.install_as_MySQLdb()
 
 BASE_DIR = Path(__file__).resolve(strict=True).parent.parent
@@ -16,7 +12,7 @@ env.read_env(os.path.join(BASE_DIR, '.env'))
 
 SECRET_KEY = env('SECRET_KEY')
 DEBUG = env.bool('DEBUG', default=False)
-ALLOWED_HOSTS = env.bool('DEBUG', default=False)
+ALLOWED_HOSTS = env.list('ALLOWED_HOSTS', default=['localhost', '127.0.0.1', '.vercel.app'])
 
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -33,16 +29,17 @@ INSTALLED_APPS = [
     'allauth.account',
     'allauth.socialaccount',
     
-    'cloudinary',
     'corsheaders',
     'tienda'
 ]
 
-ROOT_URLCONF = 'ecommer_electronica_backend2.urls'
+# asgi.py lo cambia a asgi_urls para servir las lecturas del catálogo con vistas async
+ROOT_URLCONF = env('ROOT_URLCONF', default='ecommer_electronica_backend2.urls')
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -52,19 +49,52 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     
     'allauth.account.middleware.AccountMiddleware',
+    'tienda.middleware.RequestMetricsMiddleware',
+    'tienda.middleware.ReplicaStickinessMiddleware',
 ]
 
+# DB_POOL activa el pool de conexiones compartido por los hilos de cada worker; en ese
+# caso las conexiones vuelven al pool al final de cada request (CONN_MAX_AGE = 0).
+# Sin pool, DB_CONN_MAX_AGE mantiene una conexión persistente por hilo.
+DB_POOL = env.bool('DB_POOL', default=False)
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'ecommer_electronica_backend2.mysql_pool' if DB_POOL else 'django.db.backends.mysql',
         'NAME': env('DB_NAME'),
         'USER': env('DB_USER'),
         'PASSWORD': env('DB_PASSWORD'),
         'HOST': env('DB_HOST'),
         'PORT': env('DB_PORT'),
+        'CONN_MAX_AGE': 0 if DB_POOL else env.int('DB_CONN_MAX_AGE', default=60),
+        'CONN_HEALTH_CHECKS': env.bool('DB_CONN_HEALTH_CHECKS', default=True),
+        'POOL': {
+            'SIZE': env.int('DB_POOL_SIZE', default=10),
+            'RECYCLE': env.int('DB_POOL_RECYCLE', default=1800),
+            'PING_AFTER': env.int('DB_POOL_PING_AFTER', default=30),
+        },
     }
 }
 
+# Réplicas de lectura (DB_REPLICA_HOSTS=host1,host2): mismas credenciales que el primario.
+# tienda.db_router manda a ellas las lecturas de la tienda; tras una escritura propia el
+# usuario lee del primario durante DB_REPLICA_STICKY_SECONDS, y una réplica caída o con
+# más de DB_REPLICA_MAX_LAG segundos de retraso se saltea hasta el próximo chequeo.
+DATABASE_REPLICAS = []
+for index, host in enumerate(env.list('DB_REPLICA_HOSTS', default=[])):
+    DATABASES[f'replica_{index}'] = {**DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['tienda.db_router.ReplicaRouter']
+DB_REPLICA_MAX_LAG = env.int('DB_REPLICA_MAX_LAG', default=5)
+DB_REPLICA_CHECK_INTERVAL = env.int('DB_REPLICA_CHECK_INTERVAL', default=10)
+DB_REPLICA_STICKY_SECONDS = env.int('DB_REPLICA_STICKY_SECONDS', default=15)
+
+# Con varios workers la marca de "escribió hace poco" y la versión de categorías y marcas
+# (tienda.reference) tienen que vivir en una caché compartida (CACHE_URL=redis://... o
+# pymemcache://...). check --deploy falla si la caché es local al proceso.
+CACHES = {'default': env.cache('CACHE_URL', default='locmemcache://')}
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -86,6 +116,12 @@ SITE_ID = 1
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# WhiteNoise sirve los estáticos comprimidos desde el propio proceso, con caché larga
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedStaticFilesStorage"},
+}
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "https://digitalworld-tuc.netlify.app",
@@ -107,14 +143,30 @@ REST_FRAMEWORK = {
 }
 
 
+# El SDK de Cloudinary se importa y se configura recién en la primera subida
+# (tienda.images.cloudinary_uploader), así el arranque en frío no lo paga
 CLOUDINARY_STORAGE = {
     "CLOUD_NAME": env("CLOUDINARY_CLOUD_NAME"),
     "API_KEY": env("CLOUDINARY_API_KEY"),
     "API_SECRET": env("CLOUDINARY_API_SECRET"),
 }
 
-cloudinary.config(
-    cloud_name=CLOUDINARY_STORAGE["CLOUD_NAME"],
-    api_key=CLOUDINARY_STORAGE["API_KEY"],
-    api_secret=CLOUDINARY_STORAGE["API_SECRET"]
-)
+IMAGE_INGEST_WORKERS = env.int('IMAGE_INGEST_WORKERS', default=4)
+IMAGE_FETCH_CONNECT_TIMEOUT = env.float('IMAGE_FETCH_CONNECT_TIMEOUT', default=3.0)
+IMAGE_FETCH_READ_TIMEOUT = env.float('IMAGE_FETCH_READ_TIMEOUT', default=10.0)
+IMAGE_FETCH_MAX_BYTES = env.int('IMAGE_FETCH_MAX_BYTES', default=5 * 1024 * 1024)
+
+FACET_PRICE_BUCKETS = [0, 50000, 100000, 250000, 500000, 1000000, 2500000]
+
+CATEGORY_CACHE_SECONDS = env.int('CATEGORY_CACHE_SECONDS', default=60)
+# Cada cuánto un proceso consulta en CACHES si cambiaron categorías o marcas
+REFERENCE_CACHE_CHECK_SECONDS = env.int('REFERENCE_CACHE_CHECK_SECONDS', default=5)
+# build_sales_rollups deja afuera las órdenes más nuevas que esto, por si su transacción sigue abierta
+ANALYTICS_SETTLE_SECONDS = env.int('ANALYTICS_SETTLE_SECONDS', default=60)
+
+# Instrumentación por request: fracción de requests medidos (0 desactiva) y umbrales
+# a partir de los cuales un request se registra como lento en el log "tienda.metrics"
+REQUEST_METRICS_SAMPLE_RATE = env.float('REQUEST_METRICS_SAMPLE_RATE', default=1.0)
+REQUEST_METRICS_SLOW_MS = env.float('REQUEST_METRICS_SLOW_MS', default=500)
+REQUEST_METRICS_MAX_QUERIES = env.int('REQUEST_METRICS_MAX_QUERIES', default=30)
+REQUEST_METRICS_WINDOW = env.int('REQUEST_METRICS_WINDOW', default=500)
@@ -0,0 +1,35 @@
+import multiprocessing
+import os
+
+# Gunicorn lee este archivo automáticamente desde el directorio de trabajo.
+# Todo se puede ajustar por variables de entorno sin tocar el Procfile.
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# Procesos: 2 * CPU + 1 es el punto de partida recomendado por gunicorn. Cada proceso
+# atiende varios requests a la vez con hilos, útil porque gran parte del tiempo se
+# espera a MySQL y a Cloudinary.
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+# Modo ASGI (lecturas del catálogo con vistas async):
+#   gunicorn ecommer_electronica_backend2.asgi:application
+# con GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker; ahí threads no se usa.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+
+# Un worker que no responde en este tiempo se reinicia; SIGHUP recarga los workers de a
+# uno y les da graceful_timeout segundos para terminar los requests en curso.
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+# Reciclar workers periódicamente acota cualquier crecimiento de memoria; el jitter evita
+# que todos se reinicien a la vez.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 100))
+
+# Sin preload la aplicación se importa en cada worker, así SIGHUP también recarga el código
+preload_app = False
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
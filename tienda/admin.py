@@ -1,6 +1,39 @@
 from django.contrib import admin
-from .models import Brand, Category, Product, ProductImage, Order, OrderItem, Comment
-from django.utils.html import format_html
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from .models import Brand, Category, Product, ProductImage, Order, OrderItem, Comment, SaleSchedule
+from django.utils.html import format_html, format_html_join
+
+
+# Por debajo de esta cantidad estimada de filas se cuenta exacto
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+class EstimatedCountPaginator(Paginator):
+    # Sin filtros, un COUNT(*) recorre toda la tabla en InnoDB; las estadísticas de
+    # information_schema alcanzan para paginar. Con filtros o búsqueda se cuenta exacto.
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == "mysql" and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] and row[0] >= ESTIMATED_COUNT_THRESHOLD:
+                return row[0]
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    # Evita el segundo COUNT(*) sin filtros ("x de N en total") al buscar o filtrar
+    show_full_result_count = False
 
 
 class ProductImageInline(admin.TabularInline):
@@ -11,28 +44,35 @@ class ProductImageInline(admin.TabularInline):
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 1
+    autocomplete_fields = ("product",)
     readonly_fields = ("product_images",)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("product").prefetch_related("product__images")
+
     def product_images(self, obj):
+        if not obj.pk:
+            return "No Images"
         images = obj.product.images.all()
         if images:
-            return format_html(
-                " ".join(
-                    [
-                        f'<img src="{image.image.url}" style="width: 50px; height: auto;" />'
-                        for image in images
-                    ]
-                )
+            return format_html_join(
+                " ",
+                '<img src="{}" style="width: 50px; height: auto;" />',
+                ((image.image,) for image in images),
             )
         return "No Images"
 
     product_images.short_description = "Product Images"
 
 
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(LargeTableAdmin):
     inlines = [ProductImageInline]
     list_display = ("name", "description", "price", "category", "brand")
-    search_fields = ("name", "description", "category__name", "brand__name")
+    list_select_related = ("category", "brand")
+    list_filter = ("category", "brand")
+    # "^" busca por prefijo (LIKE 'x%'), que usa el índice de name; "=" compara el SKU exacto
+    search_fields = ("^name", "=sku")
+    ordering = ("-pk",)
 
 
 class BrandAdmin(admin.ModelAdmin):
@@ -45,22 +85,39 @@ class CategoryAdmin(admin.ModelAdmin):
     search_fields = ("name",)
 
 
-class ProductImageAdmin(admin.ModelAdmin):
+class ProductImageAdmin(LargeTableAdmin):
     list_display = ("product", "image")
-    search_fields = ("product__name",)
+    list_select_related = ("product",)
+    autocomplete_fields = ("product",)
+    search_fields = ("^product__name",)
 
 
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(LargeTableAdmin):
     inlines = [OrderItemInline]
     list_display = ("id", "user", "total_amount", "order_date")
-    search_fields = ("user__email", "user__username")
-    ordering = ("order_date",)
+    list_select_related = ("user",)
+    raw_id_fields = ("user",)
+    search_fields = ("^user__email", "^user__username")
+    # Descendente: el admin agrega -pk como desempate y así ambos salen del índice de order_date
+    ordering = ("-order_date",)
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = ("id", "user", "product", "rating", "comment_text", "created_at")
-    list_filter = ("rating", "created_at", "product")  # Agregar filtros
-    search_fields = ("user__username", "product__name", "comment_text")
+    list_select_related = ("user", "product")
+    # Filtrar por producto cargaba todos los productos en la barra lateral: se busca por nombre
+    list_filter = ("rating", "created_at")
+    raw_id_fields = ("user",)
+    autocomplete_fields = ("product",)
+    search_fields = ("^user__username", "^product__name")
+
+
+class SaleScheduleAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "product", "category", "discount_percentage", "starts_at", "ends_at", "applied_at", "expired_at")
+    list_select_related = ("product", "category")
+    list_filter = ("starts_at", "ends_at")
+    autocomplete_fields = ("product",)
+    readonly_fields = ("applied_at", "expired_at")
 
 
 admin.site.register(Comment, CommentAdmin)
@@ -69,3 +126,4 @@ admin.site.register(Category, CategoryAdmin)
 admin.site.register(Product, ProductAdmin)
 admin.site.register(ProductImage, ProductImageAdmin)
 admin.site.register(Order, OrderAdmin)
+admin.site.register(SaleSchedule, SaleScheduleAdmin)
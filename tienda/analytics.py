@@ -0,0 +1,227 @@
+import copy
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Sum, Value, When
+from django.utils import timezone
+
+from .models import CategorySalesDay, Order, OrderItem, OrderRollup, ProductRollup, RollupWatermark
+
+# Los tableros leen tablas de resumen por hora/día en lugar de recorrer Order/OrderItem:
+# cada consulta toca a lo sumo unas filas por período, sin importar el tamaño del historial.
+# build_sales_rollups procesa por lotes las órdenes posteriores a la marca de agua; las
+# órdenes ya procesadas que cambian de estado o se borran se corrigen desde las señales.
+# Los totales cuentan órdenes realizadas, incluidas las canceladas: el desglose por estado
+# permite descontarlas.
+# Todos los reportes por día agrupan por Order.order_date, el día local en que se creó la
+# orden, igual que CategorySalesDay: los períodos por hora salen de created_at.
+
+ORDERS_WATERMARK = "orders"
+ORDER_TOTALS = ("order_count", "units", "revenue")
+PRODUCT_TOTALS = ("units", "revenue")
+ANALYTICS_MAX_DAYS = 366
+
+
+def period_start(granularity, order):
+    if granularity == OrderRollup.DAY:
+        return timezone.make_aware(datetime.combine(order.order_date, time.min))
+    return timezone.localtime(order.created_at).replace(minute=0, second=0, microsecond=0)
+
+
+def lock_watermark():
+    # Solo build_rollup_batch y rebuild_rollups la toman: las señales la leen sin bloquear
+    watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(name=ORDERS_WATERMARK)
+    return watermark
+
+
+def read_watermark():
+    return (
+        RollupWatermark.objects.filter(name=ORDERS_WATERMARK).values_list("last_order_id", flat=True).first() or 0
+    )
+
+
+def add_to_rollups(model, key_fields, totals, deltas, batch_size=1000):
+    # Las señales y build_rollup_batch escriben a la vez: solo sumas con F(), en orden de pk
+    if not deltas:
+        return
+    model.objects.bulk_create(
+        [model(**dict(zip(key_fields, key))) for key in deltas], batch_size=batch_size, ignore_conflicts=True
+    )
+    pks = {
+        tuple(row[:-1]): row[-1]
+        for row in model.objects.filter(
+            **{f"{field}__in": {key[i] for key in deltas} for i, field in enumerate(key_fields)}
+        ).values_list(*key_fields, "pk")
+    }
+    rows = sorted((pks[key], values) for key, values in deltas.items())
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start : start + batch_size]
+        model.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+            **{
+                field: F(field)
+                + Case(
+                    *(When(pk=pk, then=Value(values[field])) for pk, values in batch),
+                    output_field=model._meta.get_field(field),
+                )
+                for field in totals
+            }
+        )
+
+
+def add_order_rollups(orders, sign=1, batch_size=1000):
+    units = dict(
+        OrderItem.objects.filter(order__in=[order.pk for order in orders])
+        .values_list("order_id")
+        .annotate(Sum("quantity"))
+        .order_by()
+    )
+    deltas = defaultdict(lambda: dict.fromkeys(ORDER_TOTALS, 0))
+    for order in orders:
+        for granularity, _ in OrderRollup.GRANULARITY_CHOICES:
+            key = (granularity, period_start(granularity, order), order.payment_method, order.status)
+            deltas[key]["order_count"] += sign
+            deltas[key]["units"] += sign * units.get(order.pk, 0)
+            deltas[key]["revenue"] += sign * order.total_amount
+    add_to_rollups(
+        OrderRollup, ("granularity", "period_start", "payment_method", "status"), ORDER_TOTALS, deltas, batch_size
+    )
+
+
+def add_product_rollups(orders, sign=1, batch_size=1000):
+    days = {order.pk: order.order_date for order in orders}
+    deltas = defaultdict(lambda: dict.fromkeys(PRODUCT_TOTALS, 0))
+    for order_id, product_id, quantity, line_total in OrderItem.objects.filter(order__in=list(days)).values_list(
+        "order_id", "product_id", "quantity", "line_total"
+    ):
+        key = (days[order_id], product_id)
+        deltas[key]["units"] += sign * quantity
+        deltas[key]["revenue"] += sign * line_total
+    add_to_rollups(ProductRollup, ("day", "product_id"), PRODUCT_TOTALS, deltas, batch_size)
+
+
+@transaction.atomic
+def build_rollup_batch(batch_size=1000, now=None):
+    now = now or timezone.now()
+    watermark = lock_watermark()
+    # Las órdenes más nuevas pueden estar todavía dentro de su transacción, con ids menores
+    # a otras ya confirmadas: se esperan unos segundos para no saltearlas.
+    # Se bloquean las órdenes del lote: las señales de is_rolled_up sobre esas órdenes esperan
+    # a que avance la marca de agua y corrigen los resúmenes.
+    orders = list(
+        Order.objects.select_for_update()
+        .filter(
+            pk__gt=watermark.last_order_id,
+            created_at__lte=now - timedelta(seconds=settings.ANALYTICS_SETTLE_SECONDS),
+        )
+        .only("pk", "created_at", "order_date", "payment_method", "status", "total_amount")
+        .order_by("pk")[:batch_size]
+    )
+    if not orders:
+        return 0
+
+    add_order_rollups(orders, batch_size=batch_size)
+    add_product_rollups(orders, batch_size=batch_size)
+    watermark.last_order_id = orders[-1].pk
+    watermark.save(update_fields=["last_order_id", "updated_at"])
+    return len(orders)
+
+
+def build_rollups(batch_size=1000, now=None):
+    # Un lote por transacción, para no tener tomada la marca de agua durante todo el proceso
+    processed = 0
+    while batch := build_rollup_batch(batch_size, now):
+        processed += batch
+    return processed
+
+
+def rebuild_rollups(batch_size=1000, now=None):
+    with transaction.atomic():
+        watermark = lock_watermark()
+        # Espera a las señales en curso sobre órdenes ya procesadas, que descuentan de los resúmenes
+        list(Order.objects.select_for_update().filter(pk__lte=watermark.last_order_id).values_list("pk"))
+        OrderRollup.objects.all().delete()
+        ProductRollup.objects.all().delete()
+        watermark.last_order_id = 0
+        watermark.save(update_fields=["last_order_id", "updated_at"])
+    return build_rollups(batch_size, now)
+
+
+def is_rolled_up(order):
+    # Se bloquea solo esta orden: si un lote la está procesando, se espera a que confirme y
+    # la marca de agua se lee ya actualizada (READ COMMITTED, el nivel de Django en MySQL)
+    Order.objects.select_for_update().filter(pk=order.pk).values_list("pk").first()
+    return order.pk <= read_watermark()
+
+
+@transaction.atomic
+def move_order_status(order, previous_status):
+    if not is_rolled_up(order):
+        return
+    previous = copy.copy(order)
+    previous.status = previous_status
+    add_order_rollups([previous], sign=-1)
+    add_order_rollups([order])
+
+
+@transaction.atomic
+def remove_order(order):
+    if not is_rolled_up(order):
+        return
+    add_order_rollups([order], sign=-1)
+    add_product_rollups([order], sign=-1)
+
+
+def date_bounds(start, end):
+    # Días locales [start, end] como instantes, para comparar contra period_start
+    return (
+        timezone.make_aware(datetime.combine(start, time.min)),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)),
+    )
+
+
+def order_totals(start, end, granularity=OrderRollup.DAY, group_by="period_start"):
+    lower, upper = date_bounds(start, end)
+    return (
+        OrderRollup.objects.filter(granularity=granularity, period_start__gte=lower, period_start__lt=upper)
+        .values(group_by)
+        .annotate(orders=Sum("order_count"), units=Sum("units"), revenue=Sum("revenue"))
+        .order_by(group_by)
+    )
+
+
+def revenue_series(start, end, granularity=OrderRollup.DAY):
+    results = []
+    for row in order_totals(start, end, granularity):
+        period = timezone.localtime(row.pop("period_start"))
+        row["period"] = period.date() if granularity == OrderRollup.DAY else period
+        results.append(row)
+    return results
+
+
+def top_products(start, end, limit=10):
+    return list(
+        ProductRollup.objects.filter(day__range=(start, end))
+        .values("product_id", "product__name")
+        .annotate(units=Sum("units"), revenue=Sum("revenue"))
+        .order_by("-units", "-revenue", "product_id")[:limit]
+    )
+
+
+def sales_by_category(start, end):
+    # Usa el resumen diario por categoría que se actualiza en cada compra
+    return list(
+        CategorySalesDay.objects.filter(day__range=(start, end))
+        .values("category_id", "category__name")
+        .annotate(orders=Sum("order_count"), units=Sum("units"), revenue=Sum("revenue"))
+        .order_by("-revenue", "category_id")
+    )
+
+
+def sales_by_payment_method(start, end):
+    return list(order_totals(start, end, group_by="payment_method"))
+
+
+def status_breakdown(start, end):
+    return list(order_totals(start, end, group_by="status"))
@@ -6,4 +6,5 @@ class TiendaConfig(AppConfig):
     name = 'tienda'
     
     def ready(self):
+        import tienda.checks
         import tienda.signals
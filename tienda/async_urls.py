@@ -0,0 +1,17 @@
+from django.urls import path
+
+from . import async_views
+
+# Rutas servidas por vistas async (lecturas del catálogo y login con Google); se anteponen
+# a tienda.urls en asgi_urls.
+# Los nombres coinciden con los del router para que reverse() y las métricas no cambien.
+urlpatterns = [
+    path("products/", async_views.product_list, name="product-list"),
+    path("products/search/", async_views.product_search, name="product-search"),
+    # Solo ids numéricos: el resto (facets/, export/, ...) sigue en el router
+    path("products/<int:pk>/", async_views.product_detail, name="product-detail"),
+    path("categories/", async_views.category_list, name="category-list"),
+    path("brands/", async_views.brand_list, name="brand-list"),
+    path("comments/get_comments/", async_views.get_comments, name="comment-get-comments"),
+    path("google-login/", async_views.google_login, name="get_user_inf_google_auth"),
+]
@@ -0,0 +1,174 @@
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.conf import settings
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+
+from .models import Product
+from .reference import load_product_references
+from .serializers import (
+    BrandSerializer,
+    CategorySerializer,
+    CategorySummarySerializer,
+    CommentSerializer,
+    ProductSerializer,
+)
+from .views import (
+    BrandViewSet,
+    CategoryViewSet,
+    CommentViewSet,
+    ProductViewSet,
+    brands_queryset,
+    catalog_products,
+    category_summaries,
+    comments_queryset,
+    google_user_payload,
+    product_list_queryset,
+    search_querysets,
+    verify_google_credential,
+)
+
+# Versiones async de las lecturas del catálogo, montadas solo bajo ASGI
+# (ecommer_electronica_backend2.asgi_urls). Las consultas usan el ORM async y la
+# serialización corre sobre datos ya precargados (categorías y marcas en tienda.reference),
+# sin volver a la base. Las escrituras en las mismas rutas siguen en los viewsets de DRF.
+# Las llamadas salientes lentas (la verificación del token de Google) corren con
+# thread_sensitive=False: el hilo compartido de las vistas sync queda libre mientras tanto.
+# El alta de productos sigue subiendo las imágenes a Cloudinary dentro del request.
+
+
+def json_response(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), content_type="application/json", status=status)
+
+
+def get_only(fallback):
+    def decorator(view):
+        @csrf_exempt
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return await sync_to_async(fallback)(request, *args, **kwargs)
+            return await view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+async def token_user(request):
+    keyword, _, key = request.headers.get("Authorization", "").partition(" ")
+    if keyword != "Token" or not key:
+        return None
+    token = await Token.objects.select_related("user").filter(key=key, user__is_active=True).afirst()
+    return token.user if token else None
+
+
+@get_only(ProductViewSet.as_view({"get": "list", "post": "create"}))
+async def product_list(request):
+    try:
+        products = [product async for product in product_list_queryset(request.GET)]
+    except Exception as e:
+        return json_response({"error": str(e)}, status=500)
+    if not products:
+        return json_response({"message": "No hay productos disponibles."}, status=404)
+    await sync_to_async(load_product_references)(products)
+    return json_response(ProductSerializer(products, many=True, context={"request": request}).data)
+
+
+@get_only(
+    ProductViewSet.as_view(
+        {"get": "retrieve", "put": "update", "patch": "partial_update", "delete": "destroy"}
+    )
+)
+async def product_detail(request, pk):
+    try:
+        product = await catalog_products().aget(pk=pk)
+    except Product.DoesNotExist:
+        return json_response({"detail": "No Product matches the given query."}, status=404)
+    await sync_to_async(load_product_references)([product])
+    return json_response(ProductSerializer(product, context={"request": request}).data)
+
+
+@get_only(ProductViewSet.as_view({"get": "search"}))
+async def product_search(request):
+    search_term = request.GET.get("search")
+    if not search_term:
+        return json_response({"error": "No search term provided"}, status=400)
+
+    products, categories = search_querysets(search_term)
+    products = [p async for p in products]
+    await sync_to_async(load_product_references)(products)
+    return json_response(
+        {
+            "products": ProductSerializer(products, many=True).data,
+            "categories": CategorySerializer([c async for c in categories], many=True).data,
+        }
+    )
+
+
+@get_only(CategoryViewSet.as_view({"get": "list", "post": "create"}))
+async def category_list(request):
+    summaries = [summary async for summary in category_summaries()]
+    if not summaries:
+        return json_response({"message": "No categories found."}, status=404)
+
+    response = json_response(CategorySummarySerializer(summaries, many=True).data)
+    patch_cache_control(response, public=True, max_age=settings.CATEGORY_CACHE_SECONDS)
+    return response
+
+
+@get_only(BrandViewSet.as_view({"get": "list", "post": "create"}))
+async def brand_list(request):
+    brands = [brand async for brand in brands_queryset(request.GET.get("category"))]
+    return json_response(BrandSerializer(brands, many=True).data)
+
+
+@get_only(CommentViewSet.as_view({"get": "get_comments"}))
+async def get_comments(request):
+    page_identifier = request.GET.get("page_id")
+    product_id = request.GET.get("product")
+    if not page_identifier and not product_id:
+        return json_response({"error": "Debe proporcionar un page_id o product_id."}, status=400)
+
+    comments = [
+        comment
+        async for comment in comments_queryset(page_identifier=page_identifier, product_id=product_id)
+    ]
+    user = await token_user(request)
+    if user:
+        comments.sort(key=lambda comment: comment.user_id != user.id)
+
+    return json_response(CommentSerializer(comments, many=True, context={"request": request}).data)
+
+
+def request_data(request):
+    if request.content_type == "application/json":
+        return json.loads(request.body or b"{}")
+    return request.POST
+
+
+@csrf_exempt
+async def google_login(request):
+    if request.method != "POST":
+        return json_response({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+    try:
+        credential = request_data(request).get("credential")
+    except ValueError:
+        return json_response({"detail": "JSON parse error"}, status=400)
+    if not credential:
+        return json_response({"error": "Debe proporcionar la credencial de Google"}, status=401)
+
+    try:
+        user_authenticated = await sync_to_async(verify_google_credential, thread_sensitive=False)(credential)
+        if not user_authenticated:
+            return json_response({"error": "Credencial inválida"}, status=401)
+        return json_response(await sync_to_async(google_user_payload)(user_authenticated))
+    except ValueError as e:
+        return json_response({"error": str(e)}, status=400)
+    except Exception as e:
+        return json_response({"error": str(e)}, status=500)
@@ -0,0 +1,17 @@
+from django.core.checks import Error, Tags, register
+
+from .reference import shared_cache
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if shared_cache():
+        return []
+    return [
+        Error(
+            "La caché por defecto es local al proceso: los cambios en categorías y marcas "
+            "no llegan a los otros workers.",
+            hint="Configurar CACHE_URL con una caché compartida (redis://... o pymemcache://...).",
+            id="tienda.E001",
+        )
+    ]
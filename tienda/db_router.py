@@ -0,0 +1,108 @@
+import hashlib
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+
+logger = logging.getLogger("tienda.db_router")
+
+# Solo las lecturas de la tienda van a las réplicas; auth, tokens y sesiones quedan en el
+# primario para que un login recién hecho no falle por el retraso de replicación.
+REPLICA_APP_LABELS = {"tienda"}
+
+# True cuando el contexto actual ya escribió (o el usuario escribió hace poco): desde ahí
+# todas las lecturas van al primario para leer lo propio.
+primary_pinned = ContextVar("primary_pinned", default=False)
+wrote_primary = ContextVar("wrote_primary", default=False)
+
+
+def replica_lag(alias):
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        if connection.vendor != "mysql":
+            cursor.execute("SELECT 1")
+            return 0
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except DatabaseError:
+            # MySQL < 8.0.22 y MariaDB
+            cursor.execute("SHOW SLAVE STATUS")
+        row = cursor.fetchone()
+        if row is None:
+            # Endpoints de lectura gestionados (sin estado de replicación visible)
+            return 0
+        status = dict(zip([column[0] for column in cursor.description], row))
+        return status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+
+
+class ReplicaHealth:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.status = {}
+
+    def is_healthy(self, alias):
+        now = time.monotonic()
+        healthy, checked_at = self.status.get(alias, (False, None))
+        if checked_at is not None and now - checked_at < settings.DB_REPLICA_CHECK_INTERVAL:
+            return healthy
+
+        with self.lock:
+            healthy, checked_at = self.status.get(alias, (False, None))
+            if checked_at is not None and now - checked_at < settings.DB_REPLICA_CHECK_INTERVAL:
+                return healthy
+            healthy = self.check(alias)
+            self.status[alias] = (healthy, time.monotonic())
+        return healthy
+
+    def check(self, alias):
+        try:
+            lag = replica_lag(alias)
+        except DatabaseError as error:
+            logger.warning("Réplica %s no disponible: %s", alias, error)
+            return False
+        if lag is None or lag > settings.DB_REPLICA_MAX_LAG:
+            # None: la replicación está detenida
+            logger.warning("Réplica %s con retraso %s s, se usa el primario", alias, lag)
+            return False
+        return True
+
+
+health = ReplicaHealth()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in REPLICA_APP_LABELS or primary_pinned.get():
+            return None
+        if connections["default"].in_atomic_block:
+            return None
+        replicas = [alias for alias in settings.DATABASE_REPLICAS if health.is_healthy(alias)]
+        return random.choice(replicas) if replicas else None
+
+    def db_for_write(self, model, **hints):
+        primary_pinned.set(True)
+        wrote_primary.set(True)
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {"default", *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+def sticky_cache_key(request):
+    authorization = request.headers.get("Authorization")
+    if not authorization:
+        return None
+    return "db-sticky:" + hashlib.sha256(authorization.encode()).hexdigest()
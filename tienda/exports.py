@@ -0,0 +1,151 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+
+from .models import Order, OrderItem, Product
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+PRODUCT_FIELDS = [
+    "id",
+    "sku",
+    "name",
+    "description",
+    "price",
+    "is_on_sale",
+    "discount_percentage",
+    "category",
+    "brand",
+    "images",
+    "created_at",
+]
+
+ORDER_FIELDS = [
+    "id",
+    "user",
+    "email",
+    "name",
+    "phone_number",
+    "dni",
+    "street",
+    "number_of_street",
+    "payment_method",
+    "status",
+    "total_amount",
+    "order_date",
+]
+
+ORDER_ITEM_FIELDS = ["product_id", "product", "quantity", "price", "line_total"]
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def iter_in_chunks(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    # Paginación por clave: MySQL no transmite resultados con .iterator(), así que
+    # cada bloque es una consulta acotada (más sus prefetch) y la memoria no crece.
+    last_pk = None
+    while True:
+        chunk = queryset.order_by("pk")
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            return
+        yield from chunk
+        last_pk = chunk[-1].pk
+
+
+def product_rows(chunk_size=EXPORT_CHUNK_SIZE):
+    queryset = Product.objects.select_related("category", "brand").prefetch_related("images")
+    for product in iter_in_chunks(queryset, chunk_size):
+        yield {
+            "id": product.id,
+            "sku": product.sku,
+            "name": product.name,
+            "description": product.description,
+            "price": product.price,
+            "is_on_sale": product.is_on_sale,
+            "discount_percentage": product.discount_percentage,
+            "category": product.category.name,
+            "brand": product.brand.name if product.brand else None,
+            "images": [image.image for image in product.images.all()],
+            "created_at": product.created_at,
+        }
+
+
+def order_rows(chunk_size=EXPORT_CHUNK_SIZE):
+    queryset = Order.objects.select_related("user").prefetch_related(
+        Prefetch(
+            "order_items",
+            queryset=OrderItem.objects.select_related("product").only(
+                "order_id", "product_id", "product__name", "quantity", "price", "line_total"
+            ),
+        )
+    )
+    for order in iter_in_chunks(queryset, chunk_size):
+        yield {
+            "id": order.id,
+            "user": order.user.username,
+            "email": order.user.email,
+            "name": order.name,
+            "phone_number": order.phone_number,
+            "dni": order.dni,
+            "street": order.street,
+            "number_of_street": order.number_of_street,
+            "payment_method": order.payment_method,
+            "status": order.status,
+            "total_amount": order.total_amount,
+            "order_date": order.order_date,
+            "items": [
+                {
+                    "product_id": item.product_id,
+                    "product": item.product.name,
+                    "quantity": item.quantity,
+                    "price": item.price,
+                    "line_total": item.line_total,
+                }
+                for item in order.order_items.all()
+            ],
+        }
+
+
+def jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+def product_csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(PRODUCT_FIELDS)
+    for row in rows:
+        row["images"] = "|".join(row["images"])
+        yield writer.writerow([row[field] for field in PRODUCT_FIELDS])
+
+
+def order_csv_lines(rows):
+    # Una línea por item, repitiendo los datos de la orden
+    writer = csv.writer(Echo())
+    yield writer.writerow(ORDER_FIELDS + [f"item_{field}" for field in ORDER_ITEM_FIELDS])
+    for row in rows:
+        order_values = [row[field] for field in ORDER_FIELDS]
+        for item in row["items"] or [dict.fromkeys(ORDER_ITEM_FIELDS)]:
+            yield writer.writerow(order_values + [item[field] for field in ORDER_ITEM_FIELDS])
+
+
+EXPORTS = {
+    "products": (product_rows, product_csv_lines),
+    "orders": (order_rows, order_csv_lines),
+}
+
+
+def export_lines(name, export_format="csv", chunk_size=EXPORT_CHUNK_SIZE):
+    rows, csv_lines = EXPORTS[name]
+    if export_format == "jsonl":
+        return jsonl_lines(rows(chunk_size))
+    return csv_lines(rows(chunk_size))
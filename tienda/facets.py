@@ -0,0 +1,177 @@
+from bisect import bisect_right
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+import math
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import Product, ProductFacetCount, ProductRating
+
+# Campos del producto que definen su celda de facetas, además de su calificación
+FACET_FIELDS = ("category_id", "brand_id", "is_on_sale", "final_price")
+CELL_FIELDS = ("category_id", "brand_id", "is_on_sale", "price_bucket", "rating_bucket")
+
+
+def price_bucket(price):
+    return max(bisect_right(settings.FACET_PRICE_BUCKETS, price) - 1, 0)
+
+
+def rating_bucket(average_rating):
+    # 0 = sin calificaciones, 1..5 = estrellas completas (4.6 cuenta como 4)
+    if average_rating is None:
+        return 0
+    return min(max(math.floor(average_rating), 1), 5)
+
+
+def price_bucket_range(bucket):
+    edges = settings.FACET_PRICE_BUCKETS
+    upper = edges[bucket + 1] if bucket + 1 < len(edges) else None
+    return edges[bucket], upper
+
+
+def facet_cell(category_id, brand_id, is_on_sale, final_price, rating_count=0, average_rating=None):
+    return (
+        category_id,
+        brand_id,
+        is_on_sale,
+        price_bucket(final_price),
+        rating_bucket(average_rating if rating_count else None),
+    )
+
+
+def apply_facet_change(old_cell=None, new_cell=None):
+    # Como apply_rating_change: mueve un producto de celda con +/-1, sin recorrer la categoría
+    if old_cell == new_cell:
+        return
+    if old_cell is not None:
+        ProductFacetCount.objects.filter(**dict(zip(CELL_FIELDS, old_cell)), product_count__gt=0).update(
+            product_count=F("product_count") - 1
+        )
+    if new_cell is not None:
+        cell = dict(zip(CELL_FIELDS, new_cell))
+        if not ProductFacetCount.objects.filter(**cell).update(product_count=F("product_count") + 1):
+            # Celda nueva: la restricción única evita duplicarla si otro proceso la crea a la vez
+            ProductFacetCount.objects.bulk_create([ProductFacetCount(**cell, product_count=0)], ignore_conflicts=True)
+            ProductFacetCount.objects.filter(**cell).update(product_count=F("product_count") + 1)
+
+
+def product_rating(product_id):
+    return ProductRating.objects.filter(product_id=product_id).values_list(
+        "rating_count", "average_rating"
+    ).first() or (0, None)
+
+
+def rated_product_cell(product_id, lock=False):
+    ratings = ProductRating.objects.filter(product_id=product_id)
+    if lock:
+        ratings = ratings.select_for_update()
+    values = ratings.values_list(
+        *(f"product__{field}" for field in FACET_FIELDS), "rating_count", "average_rating"
+    ).first()
+    return facet_cell(*values) if values else None
+
+
+def refresh_category_facets(category_id):
+    rows = Product.objects.filter(category_id=category_id).values_list(
+        "brand_id",
+        "is_on_sale",
+        "final_price",
+        "rating_summary__rating_count",
+        "rating_summary__average_rating",
+    )
+    counts = Counter(
+        (
+            brand_id,
+            is_on_sale,
+            price_bucket(final_price),
+            rating_bucket(average_rating if rating_count else None),
+        )
+        for brand_id, is_on_sale, final_price, rating_count, average_rating in rows
+    )
+
+    with transaction.atomic():
+        ProductFacetCount.objects.filter(category_id=category_id).delete()
+        ProductFacetCount.objects.bulk_create(
+            ProductFacetCount(
+                category_id=category_id,
+                brand_id=brand_id,
+                is_on_sale=is_on_sale,
+                price_bucket=bucket,
+                rating_bucket=rating,
+                product_count=count,
+            )
+            for (brand_id, is_on_sale, bucket, rating), count in counts.items()
+        )
+
+
+def parse_price(value):
+    if value in (None, ""):
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        return None
+
+
+def category_facets(category_id, brand=None, on_sale=None, min_price=None, max_price=None):
+    cells = list(
+        ProductFacetCount.objects.filter(category_id=category_id, product_count__gt=0).select_related("brand")
+    )
+    min_price = parse_price(min_price)
+    max_price = parse_price(max_price)
+
+    def in_price_range(cell):
+        # El filtro de precio se aplica a nivel de rango: entra todo rango que se superponga
+        lower, upper = price_bucket_range(cell.price_bucket)
+        if min_price is not None and upper is not None and upper <= min_price:
+            return False
+        if max_price is not None and lower > max_price:
+            return False
+        return True
+
+    filters = {
+        "brand": lambda cell: brand is None or (cell.brand is not None and cell.brand.name == brand),
+        "on_sale": lambda cell: on_sale is None or cell.is_on_sale == on_sale,
+        "price": in_price_range,
+    }
+
+    def matches(cell, exclude=None):
+        return all(check(cell) for name, check in filters.items() if name != exclude)
+
+    total = 0
+    on_sale_count = 0
+    brands = {}
+    prices = Counter()
+    ratings = Counter()
+
+    # Un solo recorrido; cada faceta ignora su propio filtro para mostrar alternativas
+    for cell in cells:
+        count = cell.product_count
+        if matches(cell):
+            total += count
+            ratings[cell.rating_bucket] += count
+        if matches(cell, exclude="on_sale") and cell.is_on_sale:
+            on_sale_count += count
+        if matches(cell, exclude="brand") and cell.brand is not None:
+            entry = brands.setdefault(
+                cell.brand_id, {"id": cell.brand_id, "name": cell.brand.name, "count": 0}
+            )
+            entry["count"] += count
+        if matches(cell, exclude="price"):
+            prices[cell.price_bucket] += count
+
+    price_histogram = []
+    for bucket in range(len(settings.FACET_PRICE_BUCKETS)):
+        lower, upper = price_bucket_range(bucket)
+        price_histogram.append({"min": lower, "max": upper, "count": prices[bucket]})
+
+    return {
+        "category": category_id,
+        "total": total,
+        "brands": sorted(brands.values(), key=lambda entry: -entry["count"]),
+        "on_sale": on_sale_count,
+        "price_histogram": price_histogram,
+        "ratings": [{"rating": rating, "count": ratings[rating]} for rating in range(5, -1, -1)],
+    }
@@ -0,0 +1,67 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import BigIntegerField, Count, Max, Q
+from django.db.models.functions import Cast, Substr
+
+
+User = get_user_model()
+
+USERNAME_MAX_LENGTH = User._meta.get_field("username").max_length
+# Lugar reservado para el sufijo "_N" al generar nombres de usuario
+SUFFIX_RESERVE = 8
+# Dígitos que entran en un BIGINT al convertir el sufijo
+SUFFIX_DIGITS = 18
+CREATE_ATTEMPTS = 5
+
+
+def taken_identities(username=None, email=None):
+    """Devuelve cuáles de username/email ya están en uso, con una sola query."""
+    checks = {"username": username, "email": email}
+    checks = {field: value for field, value in checks.items() if value}
+    if not checks:
+        return set()
+
+    matches = Q()
+    for field, value in checks.items():
+        matches |= Q(**{field: value})
+    counts = User.objects.filter(matches).aggregate(
+        **{field: Count("pk", filter=Q(**{field: value})) for field, value in checks.items()}
+    )
+    return {field for field, count in counts.items() if count}
+
+
+def next_free_username(base, minimum=0):
+    """Devuelve base si está libre o base_N con N mayor a todos los sufijos existentes y a minimum."""
+    base = base[: USERNAME_MAX_LENGTH - SUFFIX_RESERVE]
+    # El prefijo usa el índice de username; la regex descarta "ana_perez" al buscar "ana".
+    # El sufijo se compara como número: "ana_01" y "ana_2" valen 1 y 2.
+    found = User.objects.filter(
+        Q(username__iexact=base)
+        | Q(username__istartswith=f"{base}_", username__iregex=rf"^{re.escape(base)}_[0-9]{{1,{SUFFIX_DIGITS}}}$")
+    ).aggregate(
+        base_taken=Count("pk", filter=Q(username__iexact=base)),
+        highest=Max(
+            Cast(Substr("username", len(base) + 2), BigIntegerField()), filter=~Q(username__iexact=base)
+        ),
+    )
+    if not found["base_taken"] and not minimum:
+        return base
+    return f"{base}_{max((found['highest'] or 0) + 1, minimum, 1)}"
+
+
+def create_user_with_free_username(base, email, password=None):
+    base = base[: USERNAME_MAX_LENGTH - SUFFIX_RESERVE]
+    # Dos altas simultáneas pueden elegir el mismo nombre: la restricción única de
+    # username rechaza la segunda, que reintenta con un sufijo mayor al que chocó
+    minimum = 0
+    for _ in range(CREATE_ATTEMPTS):
+        username = next_free_username(base, minimum)
+        try:
+            with transaction.atomic():
+                return User.objects.create_user(username=username, email=email, password=password)
+        except IntegrityError:
+            suffix = username[len(base) + 1:]
+            minimum = int(suffix) + 1 if suffix.isdigit() else 1
+    raise IntegrityError(f"No se encontró un nombre de usuario libre para {base}")
@@ -0,0 +1,191 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.db import close_old_connections
+from rest_framework.exceptions import ValidationError
+
+# PIL, requests y el SDK de Cloudinary se importan en el primer uso: solo los necesitan
+# las subidas de imágenes y no deben sumar al arranque de cada instancia.
+
+logger = logging.getLogger(__name__)
+
+_session = None
+_executor = None
+_uploader = None
+
+
+class ImageTooLarge(Exception):
+    pass
+
+
+def cloudinary_uploader():
+    global _uploader
+    if _uploader is None:
+        import cloudinary
+        import cloudinary.uploader
+
+        cloudinary.config(
+            cloud_name=settings.CLOUDINARY_STORAGE["CLOUD_NAME"],
+            api_key=settings.CLOUDINARY_STORAGE["API_KEY"],
+            api_secret=settings.CLOUDINARY_STORAGE["API_SECRET"],
+        )
+        _uploader = cloudinary.uploader
+    return _uploader
+
+
+def optimize_image(image, max_size_kb=200, quality=80, format="WEBP"):
+    from PIL import Image
+
+    if not hasattr(image, "name"):
+        image.name = "temp_image.jpg"
+
+    if image.name.lower().endswith(".webp"):
+        return image
+
+    img = Image.open(image).convert("RGB")
+
+    output_io = BytesIO()
+    img.save(output_io, format=format, quality=quality)
+    output_io.seek(0)
+
+    new_image = InMemoryUploadedFile(
+        output_io, "ImageField", f"{image.name.split('.')[0]}.webp",
+        "image/webp", output_io.tell(), None
+    )
+
+    while new_image.size > max_size_kb * 1024 and quality > 50:
+        quality -= 5
+        output_io = BytesIO()
+        img.save(output_io, format=format, quality=quality)
+        output_io.seek(0)
+
+        new_image = InMemoryUploadedFile(
+            output_io, "ImageField", f"{image.name.split('.')[0]}.webp",
+            "image/webp", output_io.tell(), None
+        )
+
+    if new_image.size > max_size_kb * 1024:
+        raise ValidationError({"image": "La imagen sigue siendo demasiado grande tras la compresión."})
+
+    return new_image
+
+
+def get_http_session():
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=settings.IMAGE_INGEST_WORKERS,
+            pool_maxsize=settings.IMAGE_INGEST_WORKERS,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _session = session
+    return _session
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_INGEST_WORKERS,
+            thread_name_prefix="image-ingest",
+        )
+    return _executor
+
+
+def fetch_image(url):
+    max_bytes = settings.IMAGE_FETCH_MAX_BYTES
+    timeout = (settings.IMAGE_FETCH_CONNECT_TIMEOUT, settings.IMAGE_FETCH_READ_TIMEOUT)
+
+    with get_http_session().get(url, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+
+        content_length = response.headers.get("Content-Length")
+        if content_length and int(content_length) > max_bytes:
+            raise ImageTooLarge(f"{url} excede {max_bytes} bytes")
+
+        buffer = BytesIO()
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            buffer.write(chunk)
+            if buffer.tell() > max_bytes:
+                raise ImageTooLarge(f"{url} excede {max_bytes} bytes")
+
+    buffer.seek(0)
+    return buffer
+
+
+def ingest_profile_picture(user_id, url):
+    from .models import UserProfile
+
+    close_old_connections()
+    try:
+        image_bytes = fetch_image(url)
+        image_bytes.name = "profile_picture.jpg"
+        image = optimize_image(image_bytes)
+
+        result = cloudinary_uploader().upload(
+            image,
+            folder="users/",
+            public_id=f"{user_id}_profile",
+            overwrite=True,
+            resource_type="image",
+            format="webp",
+        )
+
+        # Solo se reemplaza si el usuario no cambió la imagen mientras tanto
+        UserProfile.objects.filter(user_id=user_id, image=url).update(
+            image=result.get("secure_url")
+        )
+    except Exception:
+        logger.exception("No se pudo importar la imagen de perfil de %s", url)
+    finally:
+        close_old_connections()
+
+
+def queue_profile_picture(user_id, url):
+    return get_executor().submit(ingest_profile_picture, user_id, url)
+
+
+def ingest_product_image(product_id, url):
+    from .models import ProductImage
+
+    close_old_connections()
+    try:
+        if ProductImage.objects.filter(product_id=product_id, source_url=url).exists():
+            return
+
+        image_bytes = fetch_image(url)
+        image_bytes.name = url.rsplit("/", 1)[-1] or "product_image.jpg"
+        image = optimize_image(image_bytes)
+
+        result = cloudinary_uploader().upload(image, folder="products/")
+        ProductImage.objects.create(
+            product_id=product_id, image=result["secure_url"], source_url=url
+        )
+    except Exception:
+        logger.exception("No se pudo importar la imagen de producto %s", url)
+    finally:
+        close_old_connections()
+
+
+def queue_product_image(product_id, url):
+    return get_executor().submit(ingest_product_image, product_id, url)
+
+
+def destroy_images(public_ids):
+    for public_id in public_ids:
+        try:
+            cloudinary_uploader().destroy(public_id)
+        except Exception:
+            logger.exception("No se pudo borrar la imagen %s de Cloudinary", public_id)
+
+
+def queue_image_deletion(public_ids):
+    return get_executor().submit(destroy_images, list(public_ids))
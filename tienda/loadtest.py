@@ -0,0 +1,285 @@
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+import requests
+from django.conf import settings
+
+from .metrics import percentile
+
+
+DEFAULT_MIX = {"browse": 30, "filter": 20, "search": 15, "product": 25, "login": 5, "checkout": 5}
+AUTH_SCENARIOS = {"login", "checkout"}
+HISTOGRAM_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+# Comandos para levantar cada modo de servicio en un puerto local (ver compare_serving)
+SERVING_MODES = {
+    "runserver": lambda port: [sys.executable, "manage.py", "runserver", f"127.0.0.1:{port}", "--noreload"],
+    "gunicorn": lambda port: ["gunicorn", "ecommer_electronica_backend2.wsgi:app", "--bind", f"127.0.0.1:{port}"],
+    "uvicorn": lambda port: [
+        "gunicorn",
+        "ecommer_electronica_backend2.asgi:application",
+        "--worker-class",
+        "uvicorn.workers.UvicornWorker",
+        "--bind",
+        f"127.0.0.1:{port}",
+    ],
+}
+
+
+def parse_mix(value):
+    # "browse=30,search=10" -> {"browse": 30, "search": 10}
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Escenario desconocido: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class LoadResults:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+        self.elapsed = 0.0
+
+    def record(self, name, elapsed_ms, ok):
+        with self.lock:
+            self.latencies[name].append(elapsed_ms)
+            if not ok:
+                self.errors[name] += 1
+
+    @property
+    def total_requests(self):
+        return sum(len(values) for values in self.latencies.values())
+
+    @property
+    def throughput(self):
+        return self.total_requests / self.elapsed if self.elapsed else 0.0
+
+    def overall_percentile(self, fraction):
+        return percentile([value for values in self.latencies.values() for value in values], fraction)
+
+    def summary(self):
+        rows = []
+        for name, values in sorted(self.latencies.items()):
+            rows.append(
+                {
+                    "name": name,
+                    "requests": len(values),
+                    "errors": self.errors[name],
+                    "p50_ms": percentile(values, 0.5),
+                    "p90_ms": percentile(values, 0.9),
+                    "p95_ms": percentile(values, 0.95),
+                    "p99_ms": percentile(values, 0.99),
+                    "max_ms": max(values),
+                }
+            )
+        return rows
+
+    def histogram(self):
+        counts = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+        for values in self.latencies.values():
+            for value in values:
+                counts[bisect_left(HISTOGRAM_BUCKETS_MS, value)] += 1
+        return counts
+
+    def report(self):
+        total = self.total_requests
+        errors = sum(self.errors.values())
+        lines = [
+            f"{total} requests en {self.elapsed:.1f}s: {self.throughput:.1f} req/s, "
+            f"{errors} errores ({errors / max(total, 1):.1%})",
+            "",
+            f"{'request':<28}{'n':>7}{'err':>6}{'p50':>9}{'p90':>9}{'p95':>9}{'p99':>9}{'max':>9}",
+        ]
+        for row in self.summary():
+            lines.append(
+                f"{row['name']:<28}{row['requests']:>7}{row['errors']:>6}"
+                + "".join(
+                    f"{row[key]:>9.1f}" for key in ("p50_ms", "p90_ms", "p95_ms", "p99_ms", "max_ms")
+                )
+            )
+
+        lines += ["", "Histograma de latencias (ms):"]
+        counts = self.histogram()
+        widest = max(counts) or 1
+        lower = 0
+        for upper, count in zip(HISTOGRAM_BUCKETS_MS + [None], counts):
+            label = f"{lower}-{upper}" if upper is not None else f">{lower}"
+            lines.append(f"{label:>12} {count:>7} {'#' * round(40 * count / widest)}")
+            lower = upper
+        return lines
+
+
+class Storefront:
+    # Un cliente por hilo: replica la navegación del frontend contra un servidor levantado
+    def __init__(self, base_url, catalog, credentials, results, rng, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.catalog = catalog
+        self.credentials = credentials
+        self.results = results
+        self.rng = rng
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def call(self, name, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+            # El listado responde 404 cuando un filtro no tiene productos; no es un error de carga
+            ok = response.status_code < 400 or response.status_code == 404
+        except requests.RequestException:
+            response, ok = None, False
+        self.results.record(name, (time.perf_counter() - started) * 1000, ok)
+        return response
+
+    def browse(self):
+        self.call("categories", "GET", "/api/categories/")
+        sort = self.rng.choice(["", "?sort=latest", "?sort=discount"])
+        self.call(f"products{sort}", "GET", f"/api/products/{sort}")
+
+    def filter(self):
+        product = self.rng.choice(self.catalog)
+        params = {
+            "category": product["category"],
+            "sort": self.rng.choice(["best_selling", "trending", "best_rated", "latest", "discount", ""]),
+        }
+        if product["brand"] and self.rng.random() < 0.5:
+            params["brand"] = product["brand"]
+        if self.rng.random() < 0.5:
+            params["max_price"] = product["final_price"]
+        self.call("products?category", "GET", "/api/products/", params=params)
+        self.call("products/facets", "GET", "/api/products/facets/", params={"category": product["category"]})
+
+    def search(self):
+        words = self.rng.choice(self.catalog)["name"].split()
+        self.call("products/search", "GET", "/api/products/search/", params={"search": self.rng.choice(words)})
+
+    def product(self):
+        product_id = self.rng.choice(self.catalog)["id"]
+        self.call("products/<id>", "GET", f"/api/products/{product_id}/")
+        self.call("products/<id>/related", "GET", f"/api/products/{product_id}/related-products/")
+        self.call("products/<id>/bought-together", "GET", f"/api/products/{product_id}/bought-together/")
+        self.call("comments/feed", "GET", "/api/comments/feed/", params={"product": product_id})
+
+    def login(self):
+        username, password = self.rng.choice(self.credentials)
+        response = self.call(
+            "login", "POST", "/api/login/", json={"username_or_email": username, "password": password}
+        )
+        if response is not None and response.status_code == 200:
+            return response.json()["token"]
+        return None
+
+    def checkout(self):
+        token = self.login()
+        if token is None:
+            return
+        items = self.rng.sample(self.catalog, self.rng.randint(1, 3))
+        self.call(
+            "orders (checkout)",
+            "POST",
+            "/api/orders/",
+            headers={"Authorization": f"Token {token}"},
+            json={
+                "name": "Carga sintética",
+                "phone_number": "1155555555",
+                "dni": "30111222",
+                "street": "Av. Siempre Viva",
+                "number_of_street": "742",
+                "payment_method": "efectivo",
+                "order_items": [
+                    {"product": item["id"], "quantity": 1, "price": item["final_price"]} for item in items
+                ],
+            },
+        )
+
+
+def discover_catalog(base_url, timeout, limit=500):
+    # Los ids se leen de la API para poder apuntar a cualquier entorno ya cargado
+    session = requests.Session()
+    base_url = base_url.rstrip("/")
+    categories = session.get(f"{base_url}/api/categories/", timeout=timeout).json()
+    catalog = []
+    for category in categories:
+        response = session.get(f"{base_url}/api/products/", params={"category": category["id"]}, timeout=timeout)
+        if response.status_code != 200:
+            continue
+        for product in response.json():
+            catalog.append(
+                {
+                    "id": product["id"],
+                    "name": product["name"],
+                    "category": category["id"],
+                    "brand": (product.get("brand_detail") or {}).get("name"),
+                    "final_price": str(product["final_price"]),
+                }
+            )
+        if len(catalog) >= limit:
+            break
+    return catalog
+
+
+def run_load(base_url, mix, concurrency, duration, catalog, credentials=(), seed=0, timeout=30):
+    if not credentials:
+        mix = {name: weight for name, weight in mix.items() if name not in AUTH_SCENARIOS}
+    scenarios = list(mix)
+    weights = [mix[name] for name in scenarios]
+
+    results = LoadResults()
+    deadline = time.monotonic() + duration
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        client = Storefront(base_url, catalog, credentials, results, rng, timeout)
+        while time.monotonic() < deadline:
+            getattr(client, rng.choices(scenarios, weights=weights)[0])()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.elapsed = time.perf_counter() - started
+    return results
+
+
+@contextmanager
+def serve(mode, port, env=None, startup_timeout=60):
+    process = subprocess.Popen(
+        SERVING_MODES[mode](port),
+        cwd=settings.BASE_DIR,
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"{mode} terminó al iniciar (código {process.returncode})")
+            try:
+                requests.get(f"http://127.0.0.1:{port}/api/categories/", timeout=5)
+                break
+            except requests.RequestException:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{mode} no respondió en {startup_timeout}s")
+                time.sleep(0.5)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
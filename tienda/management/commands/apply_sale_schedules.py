@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tienda.models import SaleSchedule
+from tienda.schedules import apply_schedule, expire_schedule
+
+
+class Command(BaseCommand):
+    help = (
+        "Activa y vence las ofertas programadas reescribiendo los precios en lote. "
+        "Pensado para ejecutarse periódicamente (cron)."
+    )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+
+        expired = 0
+        for schedule in SaleSchedule.objects.filter(
+            applied_at__isnull=False, expired_at__isnull=True, ends_at__lte=now
+        ):
+            updated = expire_schedule(schedule, now)
+            expired += 1
+            self.stdout.write(f"Vencida {schedule}: {updated} productos")
+
+        # Ofertas cuya ventana terminó sin llegar a aplicarse: applied_at queda vacío
+        SaleSchedule.objects.filter(
+            applied_at__isnull=True, expired_at__isnull=True, ends_at__lte=now
+        ).update(expired_at=now)
+
+        activated = 0
+        for schedule in SaleSchedule.objects.filter(
+            applied_at__isnull=True, starts_at__lte=now, ends_at__gt=now
+        ).order_by("starts_at", "pk"):
+            updated = apply_schedule(schedule, now)
+            activated += 1
+            self.stdout.write(f"Activada {schedule}: {updated} productos")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{activated} ofertas activadas, {expired} vencidas.")
+        )
@@ -0,0 +1,50 @@
+import random
+import resource
+import time
+from itertools import accumulate
+
+from django.core.management.base import BaseCommand
+
+from tienda.recommendations import CO_PURCHASE_TOP_K, co_purchase_top_k
+
+
+def synthetic_order_lines(lines, products, max_basket, seed):
+    # Popularidad con cola larga: pocos productos concentran la mayoría de las ventas
+    rng = random.Random(seed)
+    cum_weights = list(accumulate(1 / (rank + 1) for rank in range(products)))
+    product_ids = range(1, products + 1)
+    emitted = 0
+    order_id = 0
+    while emitted < lines:
+        order_id += 1
+        basket = rng.choices(product_ids, cum_weights=cum_weights, k=rng.randint(1, max_basket))
+        for product_id in basket[: lines - emitted]:
+            yield order_id, product_id
+            emitted += 1
+
+
+class Command(BaseCommand):
+    help = "Mide el tiempo del cálculo de comprados juntos sobre órdenes sintéticas (sin base de datos)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lines", type=int, default=1_000_000)
+        parser.add_argument("--products", type=int, default=20_000)
+        parser.add_argument("--max-basket", type=int, default=6)
+        parser.add_argument("--top-k", type=int, default=CO_PURCHASE_TOP_K)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        lines = synthetic_order_lines(
+            options["lines"], options["products"], options["max_basket"], options["seed"]
+        )
+
+        started = time.perf_counter()
+        top_related = co_purchase_top_k(lines, top_k=options["top_k"])
+        elapsed = time.perf_counter() - started
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        self.stdout.write(
+            f"{options['lines']} líneas, {options['products']} productos: {elapsed:.2f}s "
+            f"({options['lines'] / elapsed:,.0f} líneas/s), "
+            f"{len(top_related)} productos con recomendaciones, pico de memoria {peak_mb:.0f} MB"
+        )
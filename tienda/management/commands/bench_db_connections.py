@@ -0,0 +1,96 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.utils import load_backend
+
+from ecommer_electronica_backend2.mysql_pool.base import get_pool
+from tienda.metrics import percentile
+
+
+MODES = {
+    "nueva": {"ENGINE": "django.db.backends.mysql", "CONN_MAX_AGE": 0},
+    "persistente": {"ENGINE": "django.db.backends.mysql", "CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": True},
+    "pool": {"ENGINE": "ecommer_electronica_backend2.mysql_pool", "CONN_MAX_AGE": 0},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el costo de conexión por request contra MySQL/MariaDB: conexión nueva en cada "
+        "request, conexión persistente por hilo (CONN_MAX_AGE) y pool compartido."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="Requests simulados por hilo.")
+        parser.add_argument("--threads", type=int, default=4)
+        parser.add_argument("--modes", default=",".join(MODES))
+
+    def handle(self, *args, **options):
+        if connections["default"].vendor != "mysql":
+            raise CommandError("Este benchmark requiere que la base 'default' sea MySQL/MariaDB.")
+
+        modes = options["modes"].split(",")
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"Modos desconocidos: {', '.join(sorted(unknown))}")
+
+        self.stdout.write(
+            f"{'modo':<14}{'requests':>10}{'conexiones':>12}{'media':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'req/s':>10}"
+        )
+        for mode in modes:
+            timings, handshakes, elapsed = self.run_mode(mode, options["requests"], options["threads"])
+            self.stdout.write(
+                f"{mode:<14}{len(timings):>10}{handshakes:>12}"
+                f"{sum(timings) / len(timings):>9.2f}{percentile(timings, 0.5):>9.2f}"
+                f"{percentile(timings, 0.95):>9.2f}{percentile(timings, 0.99):>9.2f}"
+                f"{len(timings) / elapsed:>10.0f}"
+            )
+
+    def run_mode(self, mode, requests_per_thread, threads):
+        settings_dict = {**connections["default"].settings_dict, **MODES[mode]}
+        backend = load_backend(settings_dict["ENGINE"])
+        timings = []
+        handshakes = []
+        lock = threading.Lock()
+
+        def worker():
+            wrapper = backend.DatabaseWrapper(dict(settings_dict), alias=f"bench_{mode}")
+            opened = 0
+            get_new_connection = wrapper.get_new_connection
+
+            def counted(conn_params):
+                nonlocal opened
+                opened += 1
+                return get_new_connection(conn_params)
+
+            wrapper.get_new_connection = counted
+            local = []
+            for _ in range(requests_per_thread):
+                # Mismo ciclo que un request de Django: close_old_connections al inicio
+                # y al final (señales request_started / request_finished)
+                started = time.perf_counter()
+                wrapper.close_if_unusable_or_obsolete()
+                with wrapper.cursor() as cursor:
+                    cursor.execute("SELECT id, name FROM tienda_brand")
+                    cursor.fetchall()
+                wrapper.close_if_unusable_or_obsolete()
+                local.append((time.perf_counter() - started) * 1000)
+            wrapper.close()
+            with lock:
+                timings.extend(local)
+                handshakes.append(opened)
+
+        started = time.perf_counter()
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        if mode == "pool":
+            # En el pool get_new_connection también entrega conexiones reutilizadas
+            return timings, get_pool(f"bench_{mode}", settings_dict.get("POOL", {})).created, elapsed
+        return timings, sum(handshakes), elapsed
@@ -0,0 +1,38 @@
+from statistics import median
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tienda.startup import LAZY_MODULES, measure_startup
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el arranque en frío (python -X importtime) de un proceso nuevo: settings, "
+        "aplicación WSGI y vistas. Muestra el total y los módulos que más tardan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument("--top", type=int, default=15, help="Módulos de primer nivel a listar.")
+        parser.add_argument("--budget", type=float, help="Falla si la mediana supera estos ms.")
+
+    def handle(self, *args, **options):
+        try:
+            runs = sorted((measure_startup() for _ in range(options["runs"])), key=lambda run: run[0])
+        except RuntimeError as error:
+            raise CommandError(f"No se pudo arrancar la aplicación: {error}")
+
+        total, modules = runs[len(runs) // 2]
+        self.stdout.write(
+            f"imports al arrancar: mediana {median(run[0] for run in runs):.0f} ms, "
+            f"mínimo {runs[0][0]:.0f} ms ({len(runs)} corridas)"
+        )
+        top_level = [(module, elapsed) for module, (elapsed, depth) in modules.items() if depth == 1]
+        for module, elapsed in sorted(top_level, key=lambda item: -item[1])[: options["top"]]:
+            self.stdout.write(f"{elapsed:>9.1f} ms  {module}")
+
+        loaded = [module for module in LAZY_MODULES if module in modules]
+        if loaded:
+            self.stdout.write(self.style.WARNING(f"Se importan al arrancar: {', '.join(loaded)}"))
+        if options["budget"] is not None and total > options["budget"]:
+            raise CommandError(f"El arranque ({total:.0f} ms) supera el presupuesto de {options['budget']:.0f} ms")
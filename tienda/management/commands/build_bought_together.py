@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tienda.recommendations import CO_PURCHASE_TOP_K, co_purchase_top_k, order_lines, store_co_purchases
+
+
+class Command(BaseCommand):
+    help = "Calcula los productos comprados juntos a partir del historial de órdenes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, default=CO_PURCHASE_TOP_K)
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Órdenes por consulta")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        top_related = co_purchase_top_k(order_lines(options["chunk_size"]), top_k=options["top_k"])
+        store_co_purchases(top_related)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recomendaciones para {len(top_related)} productos "
+                f"en {time.monotonic() - started:.2f}s"
+            )
+        )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from tienda.analytics import build_rollups, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Suma a los resúmenes por hora y por día las órdenes posteriores a la última "
+        "procesada. Con --rebuild los reconstruye desde la primera orden."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        build = rebuild_rollups if options["rebuild"] else build_rollups
+        processed = build(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"{processed} órdenes agregadas a los resúmenes."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from tienda.sales import compact_sales, rebuild_sales
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula las ventas de 30 y 7 días a partir de los buckets diarios y descarta "
+        "los buckets vencidos. Con --rebuild reconstruye todo desde el historial de órdenes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        compact = rebuild_sales if options["rebuild"] else compact_sales
+        ranked, pruned = compact(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"{ranked} productos con ventas recientes, {pruned} buckets descartados.")
+        )
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tienda.loadtest import DEFAULT_MIX, SERVING_MODES, discover_catalog, parse_mix, run_load, serve
+
+
+class Command(BaseCommand):
+    help = (
+        "Levanta cada modo de servicio (por defecto runserver y gunicorn) sobre la misma base, "
+        "le aplica la misma carga sintética y compara throughput y latencias."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modes", default="runserver,gunicorn")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--duration", type=float, default=30)
+        parser.add_argument(
+            "--mix", default=",".join(f"{name}={weight}" for name, weight in DEFAULT_MIX.items())
+        )
+        parser.add_argument("--password", help="Contraseña de los usuarios creados con seed_store.")
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--workers", type=int, help="WEB_CONCURRENCY para gunicorn.")
+        parser.add_argument("--timeout", type=float, default=30)
+
+    def handle(self, *args, **options):
+        modes = options["modes"].split(",")
+        unknown = set(modes) - set(SERVING_MODES)
+        if unknown:
+            raise CommandError(f"Modos desconocidos: {', '.join(sorted(unknown))}")
+        try:
+            mix = parse_mix(options["mix"])
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        env = {"WEB_CONCURRENCY": str(options["workers"])} if options["workers"] else {}
+        credentials = []
+        if options["password"]:
+            credentials = [
+                (f"seed_{options['seed']}_{index}", options["password"]) for index in range(options["users"])
+            ]
+
+        results = {}
+        for mode in modes:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"== {mode} =="))
+            with serve(mode, options["port"], env) as base_url:
+                catalog = discover_catalog(base_url, options["timeout"])
+                if not catalog:
+                    raise CommandError("El servidor no devolvió productos; correr seed_store primero.")
+                results[mode] = run_load(
+                    base_url,
+                    mix,
+                    options["concurrency"],
+                    options["duration"],
+                    catalog,
+                    credentials,
+                    seed=options["seed"],
+                    timeout=options["timeout"],
+                )
+            for line in results[mode].report():
+                self.stdout.write(line)
+            self.stdout.write("")
+
+        baseline = results[modes[0]].throughput or 1
+        self.stdout.write(f"{'modo':<12}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'errores':>9}{'vs ' + modes[0]:>16}")
+        for mode, result in results.items():
+            self.stdout.write(
+                f"{mode:<12}{result.throughput:>9.1f}{result.overall_percentile(0.5):>9.1f}"
+                f"{result.overall_percentile(0.95):>9.1f}{result.overall_percentile(0.99):>9.1f}"
+                f"{sum(result.errors.values()):>9}{result.throughput / baseline:>15.2f}x"
+            )
@@ -0,0 +1,27 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from tienda.exports import EXPORT_CHUNK_SIZE, export_lines
+
+
+class ExportCommand(BaseCommand):
+    export_name = None
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+        parser.add_argument("--output", help="Archivo de salida (por defecto stdout)")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        lines = export_lines(self.export_name, options["format"], options["chunk_size"])
+        if options["output"]:
+            with open(options["output"], "w", newline="", encoding="utf-8") as f:
+                f.writelines(lines)
+        else:
+            sys.stdout.writelines(lines)
+
+
+class Command(ExportCommand):
+    help = "Exporta el catálogo de productos en CSV o JSONL."
+    export_name = "products"
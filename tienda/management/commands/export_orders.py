@@ -0,0 +1,6 @@
+from .export_catalog import ExportCommand
+
+
+class Command(ExportCommand):
+    help = "Exporta las órdenes con sus items en CSV o JSONL."
+    export_name = "orders"
@@ -0,0 +1,185 @@
+import csv
+import json
+import time
+from concurrent.futures import wait
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from tienda.images import queue_product_image
+from tienda.models import Brand, Category, Product
+from tienda.signals import products_bulk_updated
+
+
+PRODUCT_UPDATE_FIELDS = [
+    "name",
+    "description",
+    "price",
+    "category",
+    "brand",
+    "is_on_sale",
+    "discount_percentage",
+    "final_price",
+]
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield row
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in ("1", "true", "si", "sí", "yes")
+
+
+def parse_images(value):
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [url for url in value if url]
+    return [url.strip() for url in str(value).split("|") if url.strip()]
+
+
+class Command(BaseCommand):
+    help = "Importa productos desde un archivo CSV o JSONL (upsert por sku)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "jsonl"])
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--no-images", action="store_true")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+        reader = read_jsonl if file_format == "jsonl" else read_csv
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size debe ser mayor a 0")
+
+        self.queue_images = not options["no_images"]
+        self.categories = {c.name.strip().lower(): c.id for c in Category.objects.all()}
+        self.brands = {b.name.strip().lower(): b.id for b in Brand.objects.all()}
+        self.pending_images = []
+        self.imported = 0
+        self.skipped = 0
+
+        started = time.monotonic()
+        batch = []
+        try:
+            for line_number, row in enumerate(reader(path), start=1):
+                batch.append((line_number, row))
+                if len(batch) >= batch_size:
+                    self.import_batch(batch)
+                    batch = []
+            if batch:
+                self.import_batch(batch)
+        except FileNotFoundError:
+            raise CommandError(f"No existe el archivo {path}")
+
+        wait(self.pending_images)
+        elapsed = time.monotonic() - started
+        rate = self.imported / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{self.imported} productos importados, {self.skipped} omitidos "
+                f"en {elapsed:.2f}s ({rate:.0f} filas/s)"
+            )
+        )
+
+    def resolve(self, model, cache, name):
+        key = name.strip().lower()
+        if key not in cache:
+            cache[key] = model.objects.create(name=name.strip()).id
+        return cache[key]
+
+    def build_product(self, row):
+        sku = str(row.get("sku") or "").strip()
+        if not sku or not row.get("name") or not row.get("category"):
+            raise ValueError("sku, name y category son obligatorios")
+
+        try:
+            price = Decimal(str(row["price"]))
+            discount = row.get("discount_percentage")
+            discount = Decimal(str(discount)) if discount not in (None, "") else None
+        except (KeyError, InvalidOperation):
+            raise ValueError("precio o descuento inválido")
+
+        brand = row.get("brand")
+        product = Product(
+            sku=sku,
+            name=row["name"],
+            description=row.get("description") or "",
+            price=price,
+            category_id=self.resolve(Category, self.categories, row["category"]),
+            brand_id=self.resolve(Brand, self.brands, brand) if brand else None,
+            is_on_sale=parse_bool(row.get("is_on_sale")),
+            discount_percentage=discount,
+        )
+        # bulk_create no llama a save()
+        product.final_price = product.compute_final_price()
+        return product
+
+    def import_batch(self, batch):
+        products = {}
+        images = {}
+        for line_number, row in batch:
+            try:
+                product = self.build_product(row)
+            except ValueError as e:
+                self.skipped += 1
+                self.stderr.write(f"Línea {line_number}: {e}")
+                continue
+            products[product.sku] = product
+            images[product.sku] = parse_images(row.get("images"))
+
+        if not products:
+            return
+
+        with transaction.atomic():
+            Product.objects.bulk_create(
+                products.values(),
+                update_conflicts=True,
+                # MySQL resuelve el conflicto por cualquier índice único y no acepta unique_fields
+                unique_fields=(
+                    ["sku"] if connection.features.supports_update_conflicts_with_target else None
+                ),
+                update_fields=PRODUCT_UPDATE_FIELDS,
+            )
+
+            ids = dict(
+                Product.objects.filter(sku__in=products.keys()).values_list("sku", "id")
+            )
+            # bulk_create no dispara post_save
+            transaction.on_commit(
+                lambda: products_bulk_updated.send(sender=Product, product_ids=list(ids.values()))
+            )
+
+            if self.queue_images:
+                to_queue = [
+                    (ids[sku], url) for sku, urls in images.items() for url in urls
+                ]
+                transaction.on_commit(lambda: self.enqueue_images(to_queue))
+
+        self.imported += len(products)
+
+    def enqueue_images(self, to_queue):
+        for product_id, url in to_queue:
+            self.pending_images.append(queue_product_image(product_id, url))
+
+        # Se limita la cantidad de imágenes en vuelo para mantener la memoria acotada
+        if len(self.pending_images) > 1000:
+            wait(self.pending_images)
+            self.pending_images = []
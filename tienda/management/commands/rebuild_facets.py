@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from tienda.facets import refresh_category_facets
+from tienda.models import Category
+
+
+class Command(BaseCommand):
+    help = "Recalcula la tabla de facetas de todas las categorías."
+
+    def handle(self, *args, **options):
+        category_ids = list(Category.objects.values_list("id", flat=True))
+        for category_id in category_ids:
+            refresh_category_facets(category_id)
+        self.stdout.write(self.style.SUCCESS(f"Facetas recalculadas para {len(category_ids)} categorías."))
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tienda.loadtest import DEFAULT_MIX, discover_catalog, parse_mix, run_load
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera carga sintética contra un servidor levantado con una mezcla ponderada de "
+        "navegación, filtros, búsqueda, detalle de producto, login y checkout. Informa "
+        "throughput, percentiles e histograma de latencias."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--duration", type=float, default=30, help="Segundos de carga.")
+        parser.add_argument(
+            "--mix",
+            default=",".join(f"{name}={weight}" for name, weight in DEFAULT_MIX.items()),
+            help="Pesos por escenario, por ejemplo browse=30,search=10,checkout=5.",
+        )
+        parser.add_argument("--password", help="Contraseña de los usuarios creados con seed_store.")
+        parser.add_argument("--users", type=int, default=50, help="Usuarios seed_<seed>_<n> a usar.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--timeout", type=float, default=30)
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options["mix"])
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        catalog = discover_catalog(options["base_url"], options["timeout"])
+        if not catalog:
+            raise CommandError("El servidor no devolvió productos; correr seed_store primero.")
+
+        credentials = []
+        if options["password"]:
+            credentials = [
+                (f"seed_{options['seed']}_{index}", options["password"]) for index in range(options["users"])
+            ]
+        elif any(name in mix for name in ("login", "checkout")):
+            self.stdout.write(self.style.WARNING("Sin --password: se omiten login y checkout."))
+
+        results = run_load(
+            options["base_url"],
+            mix,
+            options["concurrency"],
+            options["duration"],
+            catalog,
+            credentials,
+            seed=options["seed"],
+            timeout=options["timeout"],
+        )
+        for line in results.report():
+            self.stdout.write(line)
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tienda.seeding import seed_store
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera una tienda sintética (marcas, categorías, productos con imágenes, usuarios, "
+        "comentarios y órdenes) para benchmarks y pruebas de carga. Los usuarios se llaman "
+        "seed_<seed>_<n>; con --password pueden iniciar sesión desde run_load."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=2000)
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--orders", type=int, default=1000)
+        parser.add_argument("--images-per-product", type=int, default=3)
+        parser.add_argument("--max-comments-per-product", type=int, default=8)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--password")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        created = seed_store(
+            products=options["products"],
+            users=options["users"],
+            orders=options["orders"],
+            images_per_product=options["images_per_product"],
+            max_comments_per_product=options["max_comments_per_product"],
+            seed=options["seed"],
+            password=options["password"],
+            batch_size=options["batch_size"],
+        )
+        elapsed = time.perf_counter() - started
+
+        summary = ", ".join(f"{count} {name}" for name, count in created.items())
+        self.stdout.write(self.style.SUCCESS(f"Tienda generada en {elapsed:.1f}s: {summary}."))
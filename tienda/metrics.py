@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+current_metrics = ContextVar("current_metrics", default=None)
+_representation_depth = ContextVar("representation_depth", default=0)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+
+class TimedRepresentationMixin:
+    # Mide el tiempo de serialización de la respuesta; los serializers anidados y los
+    # items de una lista solo suman en el nivel más externo.
+    def to_representation(self, instance):
+        metrics = current_metrics.get()
+        depth = _representation_depth.get()
+        if metrics is None or depth:
+            return super().to_representation(instance)
+
+        token = _representation_depth.set(depth + 1)
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_time += time.perf_counter() - started
+            _representation_depth.reset(token)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class MetricsSummary:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.samples = defaultdict(lambda: deque(maxlen=settings.REQUEST_METRICS_WINDOW))
+            self.totals = defaultdict(lambda: {"requests": 0, "slow": 0})
+
+    def add(self, record, slow):
+        with self.lock:
+            self.samples[record["view"]].append(
+                (record["duration_ms"], record["queries"], record["db_ms"], record["serializer_ms"])
+            )
+            totals = self.totals[record["view"]]
+            totals["requests"] += 1
+            totals["slow"] += slow
+
+    def snapshot(self):
+        with self.lock:
+            samples = {view: list(values) for view, values in self.samples.items()}
+            totals = {view: dict(values) for view, values in self.totals.items()}
+
+        report = []
+        for view, values in samples.items():
+            durations = [value[0] for value in values]
+            queries = [value[1] for value in values]
+            report.append(
+                {
+                    "view": view,
+                    "sampled_requests": totals[view]["requests"],
+                    "slow_requests": totals[view]["slow"],
+                    "p50_ms": round(percentile(durations, 0.5), 2),
+                    "p95_ms": round(percentile(durations, 0.95), 2),
+                    "max_ms": round(max(durations), 2),
+                    "avg_queries": round(sum(queries) / len(queries), 2),
+                    "max_queries": max(queries),
+                    "avg_db_ms": round(sum(value[2] for value in values) / len(values), 2),
+                    "avg_serializer_ms": round(sum(value[3] for value in values) / len(values), 2),
+                }
+            )
+        return sorted(report, key=lambda entry: -entry["p95_ms"])
+
+
+summary = MetricsSummary()
@@ -0,0 +1,143 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from .db_router import primary_pinned, sticky_cache_key, wrote_primary
+from .metrics import RequestMetrics, current_metrics, summary
+
+
+logger = logging.getLogger("tienda.metrics")
+
+
+def response_size(response):
+    if response.streaming:
+        return None
+    return len(response.content)
+
+
+@contextmanager
+def recording_queries(metrics):
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(metrics.record_query))
+        yield
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        sample_rate = settings.REQUEST_METRICS_SAMPLE_RATE
+        return sample_rate > 0 and (sample_rate >= 1 or random.random() < sample_rate)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            with recording_queries(metrics):
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        self.record(request, response, metrics, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = time.perf_counter()
+        # El ORM async ejecuta las queries en el hilo sync del request: los wrappers se
+        # instalan y se quitan en ese mismo hilo
+        recording = recording_queries(metrics)
+        await sync_to_async(recording.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recording.__exit__)(None, None, None)
+            current_metrics.reset(token)
+        self.record(request, response, metrics, time.perf_counter() - started)
+        return response
+
+    def record(self, request, response, metrics, duration):
+        match = request.resolver_match
+        record = {
+            "view": match.view_name if match else "unresolved",
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "duration_ms": round(duration * 1000, 2),
+            "queries": metrics.queries,
+            "db_ms": round(metrics.db_time * 1000, 2),
+            "serializer_ms": round(metrics.serializer_time * 1000, 2),
+            "response_bytes": response_size(response),
+        }
+        slow = (
+            record["duration_ms"] >= settings.REQUEST_METRICS_SLOW_MS
+            or record["queries"] >= settings.REQUEST_METRICS_MAX_QUERIES
+        )
+        summary.add(record, slow)
+        if slow:
+            logger.warning(json.dumps(record))
+
+
+class ReplicaStickinessMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        key = sticky_cache_key(request)
+        tokens = self.start(key is not None and cache.get(key) is not None)
+        try:
+            return self.get_response(request)
+        finally:
+            if key is not None and wrote_primary.get():
+                cache.set(key, True, settings.DB_REPLICA_STICKY_SECONDS)
+            self.finish(tokens)
+
+    async def __acall__(self, request):
+        key = sticky_cache_key(request)
+        tokens = self.start(key is not None and await cache.aget(key) is not None)
+        try:
+            return await self.get_response(request)
+        finally:
+            if key is not None and wrote_primary.get():
+                await cache.aset(key, True, settings.DB_REPLICA_STICKY_SECONDS)
+            self.finish(tokens)
+
+    # Los flags se fijan y se restauran en cada request: los hilos de gunicorn reutilizan
+    # el mismo contexto entre requests
+    def start(self, sticky):
+        return primary_pinned.set(sticky), wrote_primary.set(False)
+
+    def finish(self, tokens):
+        pinned_token, wrote_token = tokens
+        primary_pinned.reset(pinned_token)
+        wrote_primary.reset(wrote_token)
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.7 on 2026-10-19 11:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0014_alter_userprofile_image"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="sku",
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="source_url",
+            field=models.URLField(blank=True, default="", max_length=500),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.7 on 2026-10-19 12:05
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Case, ExpressionWrapper, F, Value, When
+from django.db.models.functions import Round
+
+
+def fill_final_price(apps, schema_editor):
+    Product = apps.get_model("tienda", "Product")
+    output_field = models.DecimalField(max_digits=10, decimal_places=2)
+    Product.objects.update(
+        final_price=Case(
+            When(
+                is_on_sale=True,
+                discount_percentage__isnull=False,
+                then=Round(
+                    ExpressionWrapper(
+                        F("price")
+                        * (Value(Decimal(100)) - F("discount_percentage"))
+                        * Value(Decimal("0.01")),
+                        output_field=output_field,
+                    ),
+                    2,
+                ),
+            ),
+            default=F("price"),
+            output_field=output_field,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0015_product_sku_productimage_source_url"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="final_price",
+            field=models.DecimalField(
+                db_index=True, decimal_places=2, default=0, max_digits=10
+            ),
+        ),
+        migrations.RunPython(fill_final_price, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 5.0.7 on 2026-10-19 11:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0016_product_final_price"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SaleSchedule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(blank=True, max_length=100)),
+                (
+                    "discount_percentage",
+                    models.DecimalField(decimal_places=0, max_digits=5),
+                ),
+                ("starts_at", models.DateTimeField(db_index=True)),
+                ("ends_at", models.DateTimeField(db_index=True)),
+                ("applied_at", models.DateTimeField(blank=True, null=True)),
+                ("expired_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sale_schedules",
+                        to="tienda.category",
+                    ),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sale_schedules",
+                        to="tienda.product",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="sale_schedule",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="products",
+                to="tienda.saleschedule",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["is_on_sale", "-discount_percentage"],
+                name="tienda_prod_is_on_s_21c95a_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["category", "is_on_sale"], name="tienda_prod_categor_2e6983_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="saleschedule",
+            constraint=models.CheckConstraint(
+                check=models.Q(
+                    ("product__isnull", False),
+                    ("category__isnull", False),
+                    _connector="OR",
+                ),
+                name="sale_schedule_has_scope",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="saleschedule",
+            constraint=models.CheckConstraint(
+                check=models.Q(("ends_at__gt", models.F("starts_at"))),
+                name="sale_schedule_ends_after_start",
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.7 on 2026-10-19 11:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0017_saleschedule"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductFacetCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("is_on_sale", models.BooleanField()),
+                ("price_bucket", models.PositiveSmallIntegerField()),
+                ("rating_bucket", models.PositiveSmallIntegerField()),
+                ("product_count", models.PositiveIntegerField()),
+                (
+                    "brand",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="tienda.brand",
+                    ),
+                ),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="facet_counts",
+                        to="tienda.category",
+                    ),
+                ),
+            ],
+        ),
+    ]
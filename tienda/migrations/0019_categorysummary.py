@@ -0,0 +1,66 @@
+# Generated by Django 5.0.7 on 2026-10-19 11:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Q
+
+
+def fill_category_summaries(apps, schema_editor):
+    Category = apps.get_model("tienda", "Category")
+    CategorySummary = apps.get_model("tienda", "CategorySummary")
+    Product = apps.get_model("tienda", "Product")
+
+    for category_id in Category.objects.values_list("id", flat=True):
+        values = Product.objects.filter(category_id=category_id).aggregate(
+            product_count=Count("id"),
+            on_sale_count=Count("id", filter=Q(is_on_sale=True)),
+            newest_product_at=Max("created_at"),
+            min_price=Min("final_price"),
+            max_price=Max("final_price"),
+        )
+        CategorySummary.objects.create(category_id=category_id, **values)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0018_productfacetcount"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CategorySummary",
+            fields=[
+                (
+                    "category",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="summary",
+                        serialize=False,
+                        to="tienda.category",
+                    ),
+                ),
+                ("product_count", models.PositiveIntegerField(default=0)),
+                ("on_sale_count", models.PositiveIntegerField(default=0)),
+                (
+                    "newest_product_at",
+                    models.DateTimeField(blank=True, db_index=True, null=True),
+                ),
+                (
+                    "min_price",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=10, null=True
+                    ),
+                ),
+                (
+                    "max_price",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=10, null=True
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(fill_category_summaries, migrations.RunPython.noop),
+    ]
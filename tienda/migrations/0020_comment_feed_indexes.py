@@ -0,0 +1,29 @@
+# Generated by Django 5.0.7 on 2026-10-19 11:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0019_categorysummary"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["product", "-created_at", "-id"],
+                name="tienda_comm_product_51b17d_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["page_id", "-created_at", "-id"],
+                name="tienda_comm_page_id_0f7619_idx",
+            ),
+        ),
+    ]
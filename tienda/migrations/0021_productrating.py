@@ -0,0 +1,69 @@
+# Generated by Django 5.0.7 on 2026-10-19 11:58
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def fill_product_ratings(apps, schema_editor):
+    Comment = apps.get_model("tienda", "Comment")
+    ProductRating = apps.get_model("tienda", "ProductRating")
+
+    rows = (
+        Comment.objects.filter(product__isnull=False, rating__gte=1, rating__lte=5)
+        .values("product_id")
+        .annotate(
+            rating_count=Count("id"),
+            rating_sum=Sum("rating"),
+            **{
+                f"stars_{star}": Count("id", filter=Q(rating=star))
+                for star in range(1, 6)
+            },
+        )
+    )
+    ProductRating.objects.bulk_create(
+        ProductRating(
+            average_rating=round(Decimal(row["rating_sum"]) / row["rating_count"], 2),
+            **row,
+        )
+        for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0020_comment_feed_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductRating",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="rating_summary",
+                        serialize=False,
+                        to="tienda.product",
+                    ),
+                ),
+                ("stars_1", models.PositiveIntegerField(default=0)),
+                ("stars_2", models.PositiveIntegerField(default=0)),
+                ("stars_3", models.PositiveIntegerField(default=0)),
+                ("stars_4", models.PositiveIntegerField(default=0)),
+                ("stars_5", models.PositiveIntegerField(default=0)),
+                ("rating_count", models.PositiveIntegerField(default=0)),
+                ("rating_sum", models.PositiveIntegerField(default=0)),
+                (
+                    "average_rating",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=3),
+                ),
+            ],
+        ),
+        migrations.RunPython(fill_product_ratings, migrations.RunPython.noop),
+    ]
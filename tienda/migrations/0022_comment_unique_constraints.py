@@ -0,0 +1,32 @@
+# Generated by Django 5.0.7 on 2026-10-19 11:59
+
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0021_productrating"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="comment",
+            constraint=models.UniqueConstraint(
+                fields=("user", "product"), name="unique_comment_user_product"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="comment",
+            constraint=models.UniqueConstraint(
+                models.F("user"),
+                django.db.models.functions.comparison.NullIf(
+                    models.F("page_id"), models.Value("")
+                ),
+                name="unique_comment_user_page",
+            ),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.0.7 on 2026-10-19 12:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0022_comment_unique_constraints"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductSales",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="sales",
+                        serialize=False,
+                        to="tienda.product",
+                    ),
+                ),
+                (
+                    "units_all_time",
+                    models.PositiveIntegerField(db_index=True, default=0),
+                ),
+                ("units_30d", models.PositiveIntegerField(db_index=True, default=0)),
+                ("units_7d", models.PositiveIntegerField(db_index=True, default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ProductSalesDay",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(db_index=True)),
+                ("units", models.PositiveIntegerField(default=0)),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sales_days",
+                        to="tienda.product",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="productsalesday",
+            constraint=models.UniqueConstraint(
+                fields=("product", "day"), name="unique_product_sales_day"
+            ),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.0.7 on 2026-10-19 12:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0023_product_sales"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductCoPurchase",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("count", models.PositiveIntegerField()),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="co_purchases",
+                        to="tienda.product",
+                    ),
+                ),
+                (
+                    "related",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="tienda.product",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["product", "-count"],
+                        name="tienda_prod_product_594f97_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="productcopurchase",
+            constraint=models.UniqueConstraint(
+                fields=("product", "related"), name="unique_co_purchase_pair"
+            ),
+        ),
+    ]
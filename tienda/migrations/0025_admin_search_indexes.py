@@ -0,0 +1,23 @@
+# Generated by Django 5.0.7 on 2026-10-19 12:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0024_productcopurchase"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="order",
+            name="order_date",
+            field=models.DateField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name="product",
+            name="name",
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+# auth_user.email no tiene índice y el login, el alta con Google y los chequeos de
+# disponibilidad buscan por email. El modelo es de django.contrib.auth, así que el
+# índice se crea directamente con el schema editor.
+EMAIL_INDEX = models.Index(fields=["email"], name="tienda_user_email_idx")
+
+
+def add_email_index(apps, schema_editor):
+    schema_editor.add_index(apps.get_model("auth", "User"), EMAIL_INDEX)
+
+
+def remove_email_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model("auth", "User"), EMAIL_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("tienda", "0025_admin_search_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_email_index, remove_email_index),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 5.0.7 on 2026-10-19 13:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+
+def backfill_totals(apps, schema_editor):
+    OrderItem = apps.get_model("tienda", "OrderItem")
+    SalesDay = apps.get_model("tienda", "SalesDay")
+    CategorySalesDay = apps.get_model("tienda", "CategorySalesDay")
+
+    OrderItem.objects.update(line_total=F("price") * F("quantity"))
+
+    totals = ("units", "revenue", "order_count")
+    aggregates = {
+        "units": Sum("quantity"),
+        "revenue": Sum("line_total"),
+        "order_count": Count("order", distinct=True),
+    }
+    SalesDay.objects.bulk_create(
+        SalesDay(day=row["order__order_date"], **{key: row[key] for key in totals})
+        for row in OrderItem.objects.values("order__order_date")
+        .annotate(**aggregates)
+        .order_by()
+    )
+    CategorySalesDay.objects.bulk_create(
+        CategorySalesDay(
+            category_id=row["product__category_id"],
+            day=row["order__order_date"],
+            **{key: row[key] for key in totals},
+        )
+        for row in OrderItem.objects.values("order__order_date", "product__category_id")
+        .annotate(**aggregates)
+        .order_by()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0026_user_email_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SalesDay",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(unique=True)),
+                ("order_count", models.PositiveIntegerField(default=0)),
+                ("units", models.PositiveIntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="orderitem",
+            name="line_total",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.CreateModel(
+            name="CategorySalesDay",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(db_index=True)),
+                ("order_count", models.PositiveIntegerField(default=0)),
+                ("units", models.PositiveIntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sales_days",
+                        to="tienda.category",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="categorysalesday",
+            constraint=models.UniqueConstraint(
+                fields=("category", "day"), name="unique_category_sales_day"
+            ),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
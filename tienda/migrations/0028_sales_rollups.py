@@ -0,0 +1,145 @@
+# Generated by Django 5.0.7 on 2026-10-19 13:16
+
+import datetime
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_created_at(apps, schema_editor):
+    # Las órdenes existentes solo tienen fecha: se toma la medianoche local de ese día
+    Order = apps.get_model("tienda", "Order")
+    for day in Order.objects.values_list("order_date", flat=True).distinct():
+        Order.objects.filter(order_date=day).update(
+            created_at=django.utils.timezone.make_aware(
+                datetime.datetime.combine(day, datetime.time.min)
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0027_order_line_totals_sales_days"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrderRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "granularity",
+                    models.CharField(
+                        choices=[("hour", "Hora"), ("day", "Día")], max_length=4
+                    ),
+                ),
+                ("period_start", models.DateTimeField()),
+                (
+                    "payment_method",
+                    models.CharField(
+                        choices=[
+                            ("tarjeta", "Tarjeta de crédito/débito"),
+                            ("efectivo", "Efectivo"),
+                            ("transferencia", "Transferencia bancaria"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pendiente", "Pendiente"),
+                            ("entregado", "Entregado"),
+                            ("cancelado", "Cancelado"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("order_count", models.PositiveIntegerField(default=0)),
+                ("units", models.PositiveIntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ProductRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(db_index=True)),
+                ("units", models.PositiveIntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="RollupWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("last_order_id", models.PositiveBigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddConstraint(
+            model_name="orderrollup",
+            constraint=models.UniqueConstraint(
+                fields=("granularity", "period_start", "payment_method", "status"),
+                name="unique_order_rollup",
+            ),
+        ),
+        migrations.AddField(
+            model_name="productrollup",
+            name="product",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="rollups",
+                to="tienda.product",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="productrollup",
+            constraint=models.UniqueConstraint(
+                fields=("day", "product"), name="unique_product_rollup"
+            ),
+        ),
+        migrations.RunPython(backfill_created_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.7 on 2026-10-19 13:38
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0028_sales_rollups"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="productfacetcount",
+            constraint=models.UniqueConstraint(
+                models.F("category"),
+                django.db.models.functions.comparison.Coalesce("brand", 0),
+                models.F("is_on_sale"),
+                models.F("price_bucket"),
+                models.F("rating_bucket"),
+                name="unique_facet_cell",
+            ),
+        ),
+    ]
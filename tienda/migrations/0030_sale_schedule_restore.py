@@ -0,0 +1,25 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0029_facet_cell_unique"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="pre_schedule_discount_percentage",
+            field=models.DecimalField(
+                blank=True, decimal_places=0, max_digits=5, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="pre_schedule_is_on_sale",
+            field=models.BooleanField(default=False),
+        ),
+    ]
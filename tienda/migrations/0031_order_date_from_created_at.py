@@ -0,0 +1,28 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:11
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0030_sale_schedule_restore"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="order",
+            name="created_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False
+            ),
+        ),
+        migrations.AlterField(
+            model_name="order",
+            name="order_date",
+            field=models.DateField(
+                db_index=True, default=django.utils.timezone.localdate, editable=False
+            ),
+        ),
+    ]
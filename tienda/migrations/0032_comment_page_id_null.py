@@ -0,0 +1,41 @@
+# Generated by Django 5.0.7 on 2026-10-19 14:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def blank_page_ids_to_null(apps, schema_editor):
+    Comment = apps.get_model("tienda", "Comment")
+    Comment.objects.filter(page_id="").update(page_id=None)
+
+
+def null_page_ids_to_blank(apps, schema_editor):
+    Comment = apps.get_model("tienda", "Comment")
+    Comment.objects.filter(page_id__isnull=True).update(page_id="")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0031_order_date_from_created_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="comment",
+            name="unique_comment_user_page",
+        ),
+        migrations.AlterField(
+            model_name="comment",
+            name="page_id",
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.RunPython(blank_page_ids_to_null, null_page_ids_to_blank),
+        migrations.AddConstraint(
+            model_name="comment",
+            constraint=models.UniqueConstraint(
+                fields=("user", "page_id"), name="unique_comment_user_page"
+            ),
+        ),
+    ]
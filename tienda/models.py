@@ -1,5 +1,10 @@
+from decimal import ROUND_HALF_UP, Decimal
+
 from django.db import models
+from django.db.models import Case, ExpressionWrapper, F, Q, Value, When
+from django.db.models.functions import Coalesce, Round
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.conf import settings
 
 User = get_user_model()
@@ -26,9 +31,44 @@ class Category(models.Model):
         return self.name
 
 
+def as_expression(value):
+    return value if hasattr(value, "resolve_expression") else Value(value)
+
+
+def final_price_expression(
+    price=None, is_on_sale=None, discount_percentage=None, sale_fields=("is_on_sale", "discount_percentage")
+):
+    # Los argumentos en None toman el valor actual de las columnas de sale_fields, así un
+    # UPDATE puede recalcular final_price a partir de los valores nuevos en la misma sentencia.
+    on_sale_field, discount_field = sale_fields
+    price = F("price") if price is None else as_expression(price)
+    if is_on_sale is False:
+        return price
+
+    condition = Q()
+    if is_on_sale is None:
+        condition &= Q(**{on_sale_field: True})
+    if discount_percentage is None:
+        condition &= Q(**{f"{discount_field}__isnull": False})
+        discount_percentage = F(discount_field)
+
+    output_field = models.DecimalField(max_digits=10, decimal_places=2)
+    discounted = Round(
+        ExpressionWrapper(
+            price * (Value(Decimal(100)) - as_expression(discount_percentage)) * Value(Decimal("0.01")),
+            output_field=output_field,
+        ),
+        2,
+    )
+    if not condition:
+        return discounted
+    return Case(When(condition, then=discounted), default=price, output_field=output_field)
+
+
 class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
-    name = models.CharField(max_length=100)
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    name = models.CharField(max_length=100, db_index=True)
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     category = models.ForeignKey(
@@ -41,16 +81,197 @@ class Product(models.Model):
     discount_percentage = models.DecimalField(
         max_digits=5, decimal_places=0, null=True, blank=True
     )
+    final_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, db_index=True)
+    sale_schedule = models.ForeignKey(
+        "SaleSchedule", on_delete=models.SET_NULL, related_name="products", null=True, blank=True
+    )
+    # Oferta que tenía el producto antes de la programada, para restaurarla al vencer
+    pre_schedule_is_on_sale = models.BooleanField(default=False)
+    pre_schedule_discount_percentage = models.DecimalField(
+        max_digits=5, decimal_places=0, null=True, blank=True
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["is_on_sale", "-discount_percentage"]),
+            models.Index(fields=["category", "is_on_sale"]),
+        ]
 
     def __str__(self):
         return self.name
 
+    def compute_final_price(self):
+        # Misma cuenta y mismo redondeo (mitad hacia arriba) que ROUND en final_price_expression
+        price = Decimal(self.price)
+        if self.is_on_sale and self.discount_percentage is not None:
+            price = price * (100 - Decimal(self.discount_percentage)) * Decimal("0.01")
+        return price.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+    def save(self, *args, **kwargs):
+        self.final_price = self.compute_final_price()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "final_price" not in update_fields:
+            kwargs["update_fields"] = {*update_fields, "final_price"}
+        super().save(*args, **kwargs)
+
+
+class SaleSchedule(models.Model):
+    name = models.CharField(max_length=100, blank=True)
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="sale_schedules", null=True, blank=True
+    )
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name="sale_schedules", null=True, blank=True
+    )
+    discount_percentage = models.DecimalField(max_digits=5, decimal_places=0)
+    starts_at = models.DateTimeField(db_index=True)
+    ends_at = models.DateTimeField(db_index=True)
+    applied_at = models.DateTimeField(null=True, blank=True)
+    expired_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=Q(product__isnull=False) | Q(category__isnull=False),
+                name="sale_schedule_has_scope",
+            ),
+            models.CheckConstraint(
+                check=Q(ends_at__gt=F("starts_at")),
+                name="sale_schedule_ends_after_start",
+            ),
+        ]
+
+    def __str__(self):
+        return self.name or f"{self.discount_percentage}% ({self.starts_at:%Y-%m-%d} - {self.ends_at:%Y-%m-%d})"
+
+    def scope(self):
+        if self.product_id:
+            return Q(id=self.product_id)
+        return Q(category_id=self.category_id)
+
+    def scoped_products(self):
+        return Product.objects.filter(self.scope())
+
+
+class CategorySummary(models.Model):
+    category = models.OneToOneField(
+        Category, on_delete=models.CASCADE, primary_key=True, related_name="summary"
+    )
+    product_count = models.PositiveIntegerField(default=0)
+    on_sale_count = models.PositiveIntegerField(default=0)
+    newest_product_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.category.name} Summary"
+
+
+class ProductRating(models.Model):
+    product = models.OneToOneField(
+        Product, on_delete=models.CASCADE, primary_key=True, related_name="rating_summary"
+    )
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    average_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.product.name} Rating"
+
+
+class ProductSales(models.Model):
+    product = models.OneToOneField(
+        Product, on_delete=models.CASCADE, primary_key=True, related_name="sales"
+    )
+    units_all_time = models.PositiveIntegerField(default=0, db_index=True)
+    units_30d = models.PositiveIntegerField(default=0, db_index=True)
+    units_7d = models.PositiveIntegerField(default=0, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.product.name} Sales"
+
+
+class ProductSalesDay(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="sales_days")
+    day = models.DateField(db_index=True)
+    units = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["product", "day"], name="unique_product_sales_day"),
+        ]
+
+
+class SalesDay(models.Model):
+    day = models.DateField(unique=True)
+    order_count = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"Ventas {self.day}"
+
+
+class CategorySalesDay(models.Model):
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="sales_days")
+    day = models.DateField(db_index=True)
+    order_count = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["category", "day"], name="unique_category_sales_day"),
+        ]
+
+
+class ProductCoPurchase(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="co_purchases")
+    related = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="+")
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=["product", "-count"])]
+        constraints = [
+            models.UniqueConstraint(fields=["product", "related"], name="unique_co_purchase_pair"),
+        ]
+
+
+class ProductFacetCount(models.Model):
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="facet_counts")
+    brand = models.ForeignKey(Brand, on_delete=models.CASCADE, related_name="+", null=True, blank=True)
+    is_on_sale = models.BooleanField()
+    price_bucket = models.PositiveSmallIntegerField()
+    rating_bucket = models.PositiveSmallIntegerField()
+    product_count = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            # Una fila por celda, también para productos sin marca (brand NULL)
+            models.UniqueConstraint(
+                "category",
+                Coalesce("brand", 0),
+                "is_on_sale",
+                "price_bucket",
+                "rating_bucket",
+                name="unique_facet_cell",
+            ),
+        ]
+
 
 class ProductImage(models.Model):
     image = models.URLField()
     product = models.ForeignKey(
         Product, on_delete=models.CASCADE, related_name="images"
     )
+    source_url = models.URLField(max_length=500, blank=True, default="")
     
 
 class Order(models.Model):
@@ -72,7 +293,9 @@ class Order(models.Model):
     dni = models.CharField(max_length=12)
     street = models.CharField(max_length=50)
     number_of_street = models.CharField(max_length=10)
-    order_date = models.DateField(auto_now_add=True)
+    # Día local de created_at: ventas, resúmenes y reportes agrupan por este mismo día
+    order_date = models.DateField(default=timezone.localdate, editable=False, db_index=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
     payment_method = models.CharField(max_length=20, choices=PAYMENT_METHOD_CHOICES)
     comment = models.TextField(blank=True, null=True)
@@ -80,16 +303,66 @@ class Order(models.Model):
 
     def __str__(self):
         return f"Order {self.id} by {self.user.username}"
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.order_date = timezone.localdate(self.created_at)
+        super().save(*args, **kwargs)
    
     
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='order_items')
     product = models.ForeignKey('Product', on_delete=models.CASCADE, related_name='order_items')
     quantity = models.PositiveIntegerField()
+    # Precio unitario y total de la línea calculados por la base al crear la orden
     price = models.DecimalField(max_digits=10, decimal_places=2)
+    line_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
 
     def __str__(self):
-        return f"{self.quantity} x {self.product.name} (Order {self.order.id})"
+        return f"{self.quantity} x {self.product.name} (Order {self.order_id})"
+
+
+class OrderRollup(models.Model):
+    HOUR = "hour"
+    DAY = "day"
+    GRANULARITY_CHOICES = [(HOUR, "Hora"), (DAY, "Día")]
+
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES)
+    period_start = models.DateTimeField()
+    payment_method = models.CharField(max_length=20, choices=Order.PAYMENT_METHOD_CHOICES)
+    status = models.CharField(max_length=10, choices=Order.STATUS_CHOICES)
+    order_count = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["granularity", "period_start", "payment_method", "status"],
+                name="unique_order_rollup",
+            ),
+        ]
+
+
+class ProductRollup(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="rollups")
+    day = models.DateField(db_index=True)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "product"], name="unique_product_rollup"),
+        ]
+
+
+class RollupWatermark(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    last_order_id = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} hasta la orden {self.last_order_id}"
 
 
 class Comment(models.Model):
@@ -98,4 +371,22 @@ class Comment(models.Model):
     comment_text = models.TextField(blank=True)
     rating = models.IntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    page_id = models.CharField(max_length=100, blank=True)
\ No newline at end of file
+    page_id = models.CharField(max_length=100, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["product", "-created_at", "-id"]),
+            models.Index(fields=["page_id", "-created_at", "-id"]),
+        ]
+        # MySQL ignora las restricciones con condition= y MariaDB los índices funcionales,
+        # así que los casos vacíos se guardan como NULL: product es NULL en los comentarios
+        # de página y page_id en los de producto (save() convierte "" en NULL). NULL nunca
+        # choca en un índice único.
+        constraints = [
+            models.UniqueConstraint(fields=["user", "product"], name="unique_comment_user_product"),
+            models.UniqueConstraint(fields=["user", "page_id"], name="unique_comment_user_page"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.page_id = self.page_id or None
+        super().save(*args, **kwargs)
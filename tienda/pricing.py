@@ -0,0 +1,57 @@
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Value
+from django.db.models.functions import Round
+
+from .models import Product, final_price_expression
+from .signals import products_bulk_updated
+
+
+BULK_UPDATE_BATCH_SIZE = 500
+
+
+def bulk_price_changes(data):
+    price = None
+    if "price" in data:
+        price = Value(data["price"])
+    elif "price_change_percentage" in data:
+        factor = 1 + data["price_change_percentage"] / 100
+        price = Round(
+            ExpressionWrapper(
+                F("price") * Value(factor),
+                output_field=DecimalField(max_digits=10, decimal_places=2),
+            ),
+            2,
+        )
+
+    is_on_sale = data.get("is_on_sale")
+    discount_percentage = data.get("discount_percentage")
+    if discount_percentage is not None:
+        is_on_sale = True
+
+    # final_price va primero: MySQL evalúa las asignaciones de izquierda a derecha,
+    # y la expresión ya está armada con los valores nuevos.
+    changes = {"final_price": final_price_expression(price, is_on_sale, discount_percentage)}
+    if price is not None:
+        changes["price"] = price
+    if is_on_sale is not None:
+        changes["is_on_sale"] = is_on_sale
+    if discount_percentage is not None:
+        changes["discount_percentage"] = discount_percentage
+    return changes
+
+
+def update_in_batches(queryset, changes, batch_size=BULK_UPDATE_BATCH_SIZE):
+    product_ids = list(queryset.order_by("id").values_list("id", flat=True))
+
+    updated = 0
+    batches = 0
+    for start in range(0, len(product_ids), batch_size):
+        batch = product_ids[start:start + batch_size]
+        with transaction.atomic():
+            updated += Product.objects.filter(id__in=batch).update(**changes)
+            transaction.on_commit(
+                lambda batch=batch: products_bulk_updated.send(sender=Product, product_ids=batch)
+            )
+        batches += 1
+
+    return updated, batches
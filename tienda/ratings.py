@@ -0,0 +1,57 @@
+from decimal import Decimal
+
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, FloatField, Value, When
+from django.db.models.functions import Round
+
+from .facets import apply_facet_change, rated_product_cell
+from .models import ProductRating
+
+
+def valid_rating(rating):
+    return rating if rating in (1, 2, 3, 4, 5) else None
+
+
+def apply_rating_change(product_id, old_rating=None, new_rating=None):
+    # Debe llamarse dentro de la misma transacción que crea/edita/borra el comentario
+    old_rating = valid_rating(old_rating)
+    new_rating = valid_rating(new_rating)
+    if not product_id or old_rating == new_rating:
+        return
+
+    count_delta = (new_rating is not None) - (old_rating is not None)
+    sum_delta = (new_rating or 0) - (old_rating or 0)
+
+    # average_rating va primero (MySQL evalúa el SET de izquierda a derecha)
+    changes = {
+        "average_rating": Case(
+            When(rating_count=-count_delta, then=Value(Decimal(0))),
+            default=Round(
+                ExpressionWrapper(
+                    ExpressionWrapper(
+                        (F("rating_sum") + sum_delta) * Value(1.0), output_field=FloatField()
+                    )
+                    / (F("rating_count") + count_delta),
+                    output_field=DecimalField(max_digits=3, decimal_places=2),
+                ),
+                2,
+            ),
+            output_field=DecimalField(max_digits=3, decimal_places=2),
+        ),
+        "rating_count": F("rating_count") + count_delta,
+        "rating_sum": F("rating_sum") + sum_delta,
+    }
+    if old_rating is not None:
+        changes[f"stars_{old_rating}"] = F(f"stars_{old_rating}") - 1
+    if new_rating is not None:
+        changes[f"stars_{new_rating}"] = F(f"stars_{new_rating}") + 1
+
+    ProductRating.objects.get_or_create(product_id=product_id)
+    # La celda de facetas depende del promedio que calcula la base: se lee antes (con la fila
+    # bloqueada) y después del UPDATE
+    old_cell = rated_product_cell(product_id, lock=True)
+    ProductRating.objects.filter(product_id=product_id).update(**changes)
+    apply_facet_change(old_cell, rated_product_cell(product_id))
+
+
+def rating_histogram(summary):
+    return {star: getattr(summary, f"stars_{star}") if summary else 0 for star in range(1, 6)}
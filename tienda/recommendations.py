@@ -0,0 +1,68 @@
+from collections import defaultdict
+from heapq import nlargest
+from itertools import combinations, groupby
+from operator import itemgetter
+
+from django.db import transaction
+from django.db.models import Max
+
+from .models import OrderItem, ProductCoPurchase
+
+
+CO_PURCHASE_TOP_K = 10
+# Órdenes con más productos distintos que esto se ignoran (compras mayoristas)
+CO_PURCHASE_MAX_BASKET = 50
+
+
+def prune(counter, keep):
+    return dict(nlargest(keep, counter.items(), key=itemgetter(1)))
+
+
+def co_purchase_top_k(order_lines, top_k=CO_PURCHASE_TOP_K, max_basket=CO_PURCHASE_MAX_BASKET):
+    # order_lines: (order_id, product_id) ordenados por order_id.
+    # Cada producto guarda a lo sumo 4 * top_k candidatos; al superarlo se recorta a los
+    # 2 * top_k más frecuentes, así la memoria queda acotada por la cantidad de productos.
+    capacity = top_k * 4
+    keep = top_k * 2
+    counts = defaultdict(dict)
+
+    for _, lines in groupby(order_lines, key=itemgetter(0)):
+        basket = sorted({product_id for _, product_id in lines})
+        if len(basket) < 2 or len(basket) > max_basket:
+            continue
+
+        for a, b in combinations(basket, 2):
+            for product_id, related_id in ((a, b), (b, a)):
+                counter = counts[product_id]
+                counter[related_id] = counter.get(related_id, 0) + 1
+                if len(counter) > capacity:
+                    counts[product_id] = prune(counter, keep)
+
+    return {
+        product_id: nlargest(top_k, counter.items(), key=itemgetter(1))
+        for product_id, counter in counts.items()
+    }
+
+
+def order_lines(chunk_size=5000):
+    # Recorre OrderItem por rangos de order_id para no traer todo el historial a memoria
+    last_order_id = OrderItem.objects.aggregate(last=Max("order_id"))["last"] or 0
+    for start in range(0, last_order_id, chunk_size):
+        yield from (
+            OrderItem.objects.filter(order_id__gt=start, order_id__lte=start + chunk_size)
+            .order_by("order_id")
+            .values_list("order_id", "product_id")
+        )
+
+
+@transaction.atomic
+def store_co_purchases(top_related, batch_size=1000):
+    ProductCoPurchase.objects.all().delete()
+    ProductCoPurchase.objects.bulk_create(
+        (
+            ProductCoPurchase(product_id=product_id, related_id=related_id, count=count)
+            for product_id, related in top_related.items()
+            for related_id, count in related
+        ),
+        batch_size=batch_size,
+    )
@@ -0,0 +1,138 @@
+import threading
+import time
+import uuid
+import weakref
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .models import Brand, Category
+
+# Categorías y marcas son pocas y casi no cambian: cada proceso guarda una copia en
+# memoria (id -> instancia) y la recarga cuando cambia la versión publicada en la caché
+# compartida. La versión se consulta como mucho cada REFERENCE_CACHE_CHECK_SECONDS; los
+# cambios hechos en el propio proceso invalidan la copia al instante.
+# Con varios workers hace falta una caché compartida (CACHE_URL=redis://... o pymemcache://...):
+# con locmem, la de por defecto, la versión no llega a los otros workers. En ese caso la copia
+# se recarga en cada consulta de versión y ante cualquier id desconocido, y
+# `manage.py check --deploy` falla (tienda.E001).
+# Una transacción que cambió la tabla usa su propia copia hasta confirmar; la copia
+# compartida solo guarda filas confirmadas.
+# Las instancias se comparten entre requests: son de solo lectura.
+
+
+def shared_cache():
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+
+
+def in_transaction():
+    return connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+class PendingChanges:
+    # Cambios propios sin confirmar. Solo la referencia el callback de on_commit: si la
+    # transacción o el savepoint se deshace, Django descarta el callback y la marca muere
+    def __init__(self):
+        self.committed = False
+        self.items = None
+
+
+class ReferenceCache:
+    def __init__(self, model):
+        self.model = model
+        self.version_key = f"reference:{model._meta.label_lower}:version"
+        self.lock = threading.Lock()
+        # (instancias por id, versión, momento de la última consulta de la versión)
+        self.state = None
+        # Marcas (referencias débiles) de las transacciones de este thread que cambiaron la tabla
+        self.local = threading.local()
+
+    def __deepcopy__(self, memo):
+        # DRF copia los argumentos de los campos en cada serializer: la copia es compartida
+        return self
+
+    def load(self):
+        # Del primario: una réplica atrasada dejaría la copia vieja hasta el próximo cambio
+        return {obj.pk: obj for obj in self.model.objects.using(DEFAULT_DB_ALIAS).order_by("pk")}
+
+    def current_version(self):
+        if not shared_cache():
+            return None
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, uuid.uuid4().hex, None)
+            version = cache.get(self.version_key)
+        return version
+
+    def pending(self):
+        alive = [
+            marker
+            for marker in (ref() for ref in getattr(self.local, "markers", ()))
+            if marker is not None and not marker.committed
+        ]
+        self.local.markers = [weakref.ref(marker) for marker in alive]
+        return alive[-1] if alive else None
+
+    def snapshot(self, force_check=False):
+        pending = self.pending()
+        if pending is not None:
+            # Lo leído acá incluye filas sin confirmar: la copia es de esta transacción
+            if pending.items is None or force_check:
+                pending.items = self.load()
+            return pending.items
+
+        state = self.state
+        if state is not None and not force_check:
+            if time.monotonic() - state[2] < settings.REFERENCE_CACHE_CHECK_SECONDS:
+                return state[0]
+
+        with self.lock:
+            version = self.current_version()
+            state = self.state
+            if state is None or version is None or state[1] != version:
+                items = self.load()
+                if in_transaction():
+                    # Una transacción ya abierta puede leer una foto anterior a esta versión:
+                    # se guarda sin versión para recargarla en la próxima consulta
+                    version = None
+            else:
+                items = state[0]
+            self.state = (items, version, time.monotonic())
+            return items
+
+    def get(self, pk):
+        instance = self.snapshot().get(pk)
+        if instance is None:
+            # Puede haberse creado en otro proceso después de la última consulta de versión
+            instance = self.snapshot(force_check=True).get(pk)
+        return instance
+
+    def ensure(self, pks):
+        """Garantiza que la copia tenga estos ids, para resolverlos luego sin tocar la base."""
+        items = self.snapshot()
+        if any(pk is not None and pk not in items for pk in pks):
+            self.snapshot(force_check=True)
+
+    def invalidate(self):
+        self.state = None
+        marker = PendingChanges()
+        self.local.markers = [*getattr(self.local, "markers", ()), weakref.ref(marker)]
+
+        def publish():
+            marker.committed = True
+            self.state = None
+            cache.set(self.version_key, uuid.uuid4().hex, None)
+
+        transaction.on_commit(publish)
+
+
+categories = ReferenceCache(Category)
+brands = ReferenceCache(Brand)
+
+
+def load_product_references(products):
+    categories.ensure({product.category_id for product in products})
+    brands.ensure({product.brand_id for product in products})
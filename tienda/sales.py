@@ -0,0 +1,218 @@
+from collections import Counter
+from datetime import timedelta
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, ExpressionWrapper, F, Q, Subquery, Sum, Value, When
+from django.utils import timezone
+
+from .models import CategorySalesDay, Order, OrderItem, Product, ProductSales, ProductSalesDay, SalesDay
+
+
+SALES_WINDOWS = {"units_30d": 30, "units_7d": 7}
+SALES_DAYS_RETAINED = max(SALES_WINDOWS.values())
+
+
+def record_order_sales(order_items, day):
+    # Se llama dentro de la transacción que crea la orden, con el order_date de la orden
+    units = Counter()
+    for item in order_items:
+        units[item.product_id] += item.quantity
+
+    ProductSales.objects.bulk_create(
+        [ProductSales(product_id=product_id) for product_id in units], ignore_conflicts=True
+    )
+    ProductSalesDay.objects.bulk_create(
+        [ProductSalesDay(product_id=product_id, day=day) for product_id in units],
+        ignore_conflicts=True,
+    )
+    for product_id, quantity in units.items():
+        ProductSales.objects.filter(product_id=product_id).update(
+            units_all_time=F("units_all_time") + quantity,
+            units_30d=F("units_30d") + quantity,
+            units_7d=F("units_7d") + quantity,
+        )
+        ProductSalesDay.objects.filter(product_id=product_id, day=day).update(
+            units=F("units") + quantity
+        )
+
+
+def remove_order_sales(order):
+    # Antes de borrar la orden, mientras sus líneas siguen en la base. Las ventanas solo se
+    # descuentan si la orden todavía cae dentro de ellas (el mismo criterio que compact_sales).
+    today = timezone.localdate()
+    windows = [field for field, days in SALES_WINDOWS.items() if order.order_date > today - timedelta(days=days)]
+    units = OrderItem.objects.filter(order=order).values_list("product_id").annotate(Sum("quantity")).order_by()
+    for product_id, quantity in units:
+        ProductSales.objects.filter(product_id=product_id).update(
+            units_all_time=F("units_all_time") - quantity,
+            **{field: F(field) - quantity for field in windows},
+        )
+        ProductSalesDay.objects.filter(product_id=product_id, day=order.order_date).update(
+            units=F("units") - quantity
+        )
+
+
+def order_line(order, product_id, quantity):
+    # El precio se lee del producto en el mismo INSERT: el que envía el cliente no se usa
+    price = Subquery(Product.objects.filter(pk=product_id).values("final_price")[:1])
+    return OrderItem(
+        order=order,
+        product_id=product_id,
+        quantity=quantity,
+        price=price,
+        line_total=ExpressionWrapper(
+            price * Value(quantity), output_field=DecimalField(max_digits=12, decimal_places=2)
+        ),
+    )
+
+
+def order_category_totals(order):
+    # Un solo agregado por categoría da el total de la orden y los movimientos del resumen
+    return {
+        category_id: (units, revenue)
+        for category_id, units, revenue in OrderItem.objects.filter(order=order)
+        .values_list("product__category_id")
+        .annotate(Sum("quantity"), Sum("line_total"))
+        .order_by()
+    }
+
+
+def add_order_summary(day, by_category, sign=1):
+    if not by_category:
+        return
+    # Al final de la transacción para tener tomadas las filas del día el menor tiempo
+    # posible; el UPDATE por categoría las bloquea siempre en orden de índice.
+    SalesDay.objects.bulk_create([SalesDay(day=day)], ignore_conflicts=True)
+    SalesDay.objects.filter(day=day).update(
+        order_count=F("order_count") + sign,
+        units=F("units") + sign * sum(units for units, _ in by_category.values()),
+        revenue=F("revenue") + sign * sum(revenue for _, revenue in by_category.values()),
+    )
+
+    category_ids = sorted(by_category)
+    CategorySalesDay.objects.bulk_create(
+        [CategorySalesDay(category_id=category_id, day=day) for category_id in category_ids],
+        ignore_conflicts=True,
+    )
+
+    def per_category(index, output_field):
+        return Case(
+            *(
+                When(category_id=category_id, then=Value(sign * totals[index]))
+                for category_id, totals in by_category.items()
+            ),
+            output_field=output_field,
+        )
+
+    CategorySalesDay.objects.filter(category_id__in=category_ids, day=day).update(
+        order_count=F("order_count") + sign,
+        units=F("units") + per_category(0, CategorySalesDay._meta.get_field("units")),
+        revenue=F("revenue") + per_category(1, CategorySalesDay._meta.get_field("revenue")),
+    )
+
+
+def record_order_totals(order):
+    # Se llama dentro de la transacción que crea la orden, después de insertar las líneas
+    by_category = order_category_totals(order)
+    order.total_amount = sum((revenue for _, revenue in by_category.values()), Decimal("0"))
+    Order.objects.filter(pk=order.pk).update(total_amount=order.total_amount)
+    add_order_summary(order.order_date, by_category)
+
+
+def remove_order_totals(order):
+    # Antes de borrar la orden, mientras sus líneas siguen en la base
+    add_order_summary(order.order_date, order_category_totals(order), sign=-1)
+
+
+def rebuild_order_summaries(batch_size=1000):
+    SalesDay.objects.all().delete()
+    CategorySalesDay.objects.all().delete()
+
+    totals = {
+        "order_count": Count("order", distinct=True),
+        "units": Sum("quantity"),
+        "revenue": Sum("line_total"),
+    }
+    SalesDay.objects.bulk_create(
+        (
+            SalesDay(day=row.pop("order__order_date"), **row)
+            for row in OrderItem.objects.values("order__order_date").annotate(**totals).order_by()
+        ),
+        batch_size=batch_size,
+    )
+    CategorySalesDay.objects.bulk_create(
+        (
+            CategorySalesDay(day=row.pop("order__order_date"), category_id=row.pop("product__category_id"), **row)
+            for row in OrderItem.objects.values("order__order_date", "product__category_id")
+            .annotate(**totals)
+            .order_by()
+        ),
+        batch_size=batch_size,
+    )
+
+
+def window_totals(today, days):
+    return dict(
+        ProductSalesDay.objects.filter(day__gt=today - timedelta(days=days))
+        .values_list("product_id")
+        .annotate(total=Sum("units"))
+    )
+
+
+@transaction.atomic
+def compact_sales(today=None, batch_size=1000):
+    today = today or timezone.localdate()
+    totals = {field: window_totals(today, days) for field, days in SALES_WINDOWS.items()}
+    product_ids = set().union(*totals.values())
+
+    stale = Q()
+    for field in SALES_WINDOWS:
+        stale |= Q(**{f"{field}__gt": 0})
+    ProductSales.objects.filter(stale).exclude(product_id__in=product_ids).update(
+        **{field: 0 for field in SALES_WINDOWS}
+    )
+
+    rankings = [
+        ProductSales(
+            product_id=product_id,
+            **{field: totals[field].get(product_id, 0) for field in SALES_WINDOWS},
+        )
+        for product_id in product_ids
+    ]
+    ProductSales.objects.bulk_update(rankings, list(SALES_WINDOWS), batch_size=batch_size)
+
+    pruned, _ = ProductSalesDay.objects.filter(
+        day__lte=today - timedelta(days=SALES_DAYS_RETAINED)
+    ).delete()
+    return len(rankings), pruned
+
+
+@transaction.atomic
+def rebuild_sales(today=None, batch_size=1000):
+    today = today or timezone.localdate()
+    ProductSalesDay.objects.all().delete()
+    ProductSales.objects.all().delete()
+
+    all_time = (
+        OrderItem.objects.values_list("product_id").annotate(total=Sum("quantity")).order_by()
+    )
+    ProductSales.objects.bulk_create(
+        (ProductSales(product_id=product_id, units_all_time=total) for product_id, total in all_time),
+        batch_size=batch_size,
+    )
+
+    daily = (
+        OrderItem.objects.filter(order__order_date__gt=today - timedelta(days=SALES_DAYS_RETAINED))
+        .values_list("product_id", "order__order_date")
+        .annotate(total=Sum("quantity"))
+        .order_by()
+    )
+    ProductSalesDay.objects.bulk_create(
+        (ProductSalesDay(product_id=product_id, day=day, units=total) for product_id, day, total in daily),
+        batch_size=batch_size,
+    )
+
+    rebuild_order_summaries(batch_size)
+    return compact_sales(today, batch_size)
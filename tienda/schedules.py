@@ -0,0 +1,66 @@
+from django.db.models import Case, F, When
+
+from .models import Product, SaleSchedule, final_price_expression
+from .pricing import update_in_batches
+
+# Las ofertas programadas reescriben los productos en lote al empezar y al terminar
+# (apply_sale_schedules), así las lecturas solo filtran por is_on_sale y final_price.
+# Si dos programadas cubren el mismo producto, manda la que empezó más tarde.
+
+
+def schedule_changes(schedule):
+    return {
+        # Se guarda la oferta previa antes de pisarla (MySQL asigna de izquierda a
+        # derecha). Si otra programada ya la había pisado, se conserva la original.
+        "pre_schedule_is_on_sale": Case(
+            When(sale_schedule__isnull=True, then=F("is_on_sale")),
+            default=F("pre_schedule_is_on_sale"),
+        ),
+        "pre_schedule_discount_percentage": Case(
+            When(sale_schedule__isnull=True, then=F("discount_percentage")),
+            default=F("pre_schedule_discount_percentage"),
+        ),
+        "final_price": final_price_expression(is_on_sale=True, discount_percentage=schedule.discount_percentage),
+        "is_on_sale": True,
+        "discount_percentage": schedule.discount_percentage,
+        "sale_schedule": schedule,
+    }
+
+
+def restore_changes():
+    return {
+        "final_price": final_price_expression(
+            sale_fields=("pre_schedule_is_on_sale", "pre_schedule_discount_percentage")
+        ),
+        "is_on_sale": F("pre_schedule_is_on_sale"),
+        "discount_percentage": F("pre_schedule_discount_percentage"),
+        "sale_schedule": None,
+    }
+
+
+def active_schedules(now):
+    return SaleSchedule.objects.filter(applied_at__isnull=False, expired_at__isnull=True, ends_at__gt=now)
+
+
+def apply_schedule(schedule, now):
+    updated, _ = update_in_batches(schedule.scoped_products(), schedule_changes(schedule))
+    schedule.applied_at = now
+    schedule.save(update_fields=["applied_at"])
+    return updated
+
+
+def release_products(schedule, now):
+    # Los productos pasan a otra programada vigente que los cubra; los demás vuelven a la
+    # oferta que tenían antes de la primera programada
+    products = Product.objects.filter(sale_schedule=schedule)
+    updated = 0
+    for other in active_schedules(now).exclude(pk=schedule.pk).order_by("-starts_at", "-pk"):
+        updated += update_in_batches(products.filter(other.scope()), schedule_changes(other))[0]
+    return updated + update_in_batches(products, restore_changes())[0]
+
+
+def expire_schedule(schedule, now):
+    updated = release_products(schedule, now)
+    schedule.expired_at = now
+    schedule.save(update_fields=["expired_at"])
+    return updated
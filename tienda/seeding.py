@@ -0,0 +1,198 @@
+import random
+from collections import defaultdict
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .facets import refresh_category_facets
+from .models import (
+    Brand,
+    Category,
+    Comment,
+    Order,
+    OrderItem,
+    Product,
+    ProductImage,
+    ProductRating,
+    UserProfile,
+)
+from .recommendations import co_purchase_top_k, order_lines, store_co_purchases
+from .sales import rebuild_sales
+from .summaries import refresh_category_summary
+
+
+CATEGORY_NAMES = [
+    "Celulares", "Notebooks", "Televisores", "Audio", "Gaming", "Cámaras",
+    "Tablets", "Monitores", "Impresoras", "Redes", "Almacenamiento", "Accesorios",
+]
+BRAND_NAMES = [
+    "Samsung", "Apple", "Motorola", "Xiaomi", "Lenovo", "HP", "Dell", "Asus",
+    "Acer", "LG", "Sony", "Philips", "JBL", "Logitech", "Kingston", "TP-Link",
+    "Canon", "Epson", "Noblex", "BGH",
+]
+PAGE_IDS = ["home", "ofertas", "nosotros", "contacto"]
+
+
+def seed_store(
+    products=2000,
+    users=200,
+    orders=1000,
+    images_per_product=3,
+    max_comments_per_product=8,
+    seed=0,
+    password=None,
+    batch_size=1000,
+):
+    # Datos sintéticos deterministas para benchmarks y pruebas de carga. Las tablas
+    # derivadas (resúmenes, facetas, ratings, ventas, comprados juntos) se recalculan
+    # al final porque bulk_create no dispara señales.
+    rng = random.Random(seed)
+
+    with transaction.atomic():
+        categories = [Category.objects.get_or_create(name=name)[0] for name in CATEGORY_NAMES]
+        brands = [Brand.objects.get_or_create(name=name)[0] for name in BRAND_NAMES]
+
+        product_objs = []
+        for index in range(products):
+            price = Decimal(rng.randrange(5_000, 2_500_000, 100))
+            on_sale = rng.random() < 0.3
+            product = Product(
+                sku=f"SEED-{seed}-{index:06d}",
+                name=f"{rng.choice(BRAND_NAMES)} modelo {index}",
+                description=f"Producto de prueba {index}",
+                price=price,
+                category=rng.choice(categories),
+                brand=rng.choice(brands) if rng.random() < 0.9 else None,
+                is_on_sale=on_sale,
+                discount_percentage=Decimal(rng.randrange(5, 55, 5)) if on_sale else None,
+            )
+            product.final_price = product.compute_final_price()
+            product_objs.append(product)
+        Product.objects.bulk_create(product_objs, batch_size=batch_size)
+        # MySQL no devuelve las claves de bulk_create, así que se vuelven a leer
+        product_objs = list(Product.objects.filter(sku__startswith=f"SEED-{seed}-").order_by("sku"))
+
+        ProductImage.objects.bulk_create(
+            (
+                ProductImage(
+                    product=product,
+                    image=f"https://res.cloudinary.com/seed/image/upload/products/{product.sku}-{n}.jpg",
+                )
+                for product in product_objs
+                for n in range(images_per_product)
+            ),
+            batch_size=batch_size,
+        )
+
+        # Un solo hash compartido: hashear por usuario haría el seed mucho más lento
+        password_hash = make_password(password) if password else make_password(None)
+        User.objects.bulk_create(
+            (
+                User(
+                    username=f"seed_{seed}_{index}",
+                    email=f"seed_{seed}_{index}@example.com",
+                    password=password_hash,
+                )
+                for index in range(users)
+            ),
+            batch_size=batch_size,
+        )
+        user_objs = list(User.objects.filter(username__startswith=f"seed_{seed}_").order_by("id"))
+        UserProfile.objects.bulk_create(
+            (UserProfile(user=user) for user in user_objs), batch_size=batch_size
+        )
+
+        comments = []
+        stars = defaultdict(lambda: [0] * 5)
+        for product in product_objs:
+            authors = rng.sample(user_objs, min(rng.randint(0, max_comments_per_product), users))
+            for user in authors:
+                rating = rng.choice([None, 1, 2, 3, 4, 4, 5, 5, 5])
+                if rating:
+                    stars[product.pk][rating - 1] += 1
+                comments.append(
+                    Comment(user=user, product=product, rating=rating, comment_text="Comentario de prueba")
+                )
+        for page_id in PAGE_IDS:
+            for user in rng.sample(user_objs, min(20, users)):
+                comments.append(Comment(user=user, page_id=page_id, comment_text="Comentario de página"))
+        Comment.objects.bulk_create(comments, batch_size=batch_size)
+
+        ratings = []
+        for product_id, histogram in stars.items():
+            count = sum(histogram)
+            total = sum(star * amount for star, amount in enumerate(histogram, start=1))
+            ratings.append(
+                ProductRating(
+                    product_id=product_id,
+                    **{f"stars_{star}": amount for star, amount in enumerate(histogram, start=1)},
+                    rating_count=count,
+                    rating_sum=total,
+                    average_rating=round(Decimal(total) / count, 2),
+                )
+            )
+        ProductRating.objects.bulk_create(ratings, batch_size=batch_size)
+
+        baskets = {}
+        for index in range(orders):
+            lines = [
+                (product, rng.randint(1, 3)) for product in rng.sample(product_objs, rng.randint(1, 5))
+            ]
+            baskets[f"Orden de prueba {seed}-{index}"] = lines
+        # bulk_create no pasa por Order.save: el día se deriva acá del mismo instante
+        created_at = timezone.now()
+        Order.objects.bulk_create(
+            (
+                Order(
+                    user=rng.choice(user_objs),
+                    created_at=created_at,
+                    order_date=timezone.localdate(created_at),
+                    name="Cliente de prueba",
+                    phone_number="1155555555",
+                    dni="30111222",
+                    street="Av. Siempre Viva",
+                    number_of_street="742",
+                    comment=marker,
+                    total_amount=sum(product.final_price * quantity for product, quantity in lines),
+                    payment_method=rng.choice(["efectivo", "transferencia"]),
+                )
+                for marker, lines in baskets.items()
+            ),
+            batch_size=batch_size,
+        )
+        order_ids = dict(
+            Order.objects.filter(comment__startswith=f"Orden de prueba {seed}-").values_list("comment", "id")
+        )
+        items = [
+            OrderItem(
+                order_id=order_ids[marker],
+                product=product,
+                quantity=quantity,
+                price=product.final_price,
+                line_total=product.final_price * quantity,
+            )
+            for marker, lines in baskets.items()
+            for product, quantity in lines
+        ]
+        OrderItem.objects.bulk_create(items, batch_size=batch_size)
+
+        rebuild_sales(batch_size=batch_size)
+        store_co_purchases(co_purchase_top_k(order_lines()), batch_size=batch_size)
+
+    for category in categories:
+        refresh_category_summary(category.pk)
+        refresh_category_facets(category.pk)
+
+    return {
+        "categories": len(categories),
+        "brands": len(brands),
+        "products": len(product_objs),
+        "images": len(product_objs) * images_per_product,
+        "users": len(user_objs),
+        "comments": len(comments),
+        "orders": len(order_ids),
+        "order_items": len(items),
+    }
@@ -1,13 +1,20 @@
+from decimal import Decimal
+
 from rest_framework import serializers
-from django.db import models
+from rest_framework.settings import api_settings
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth.models import User
-from .models import Product, Category, Brand, ProductImage, Order, OrderItem, Comment, UserProfile
+from .models import Product, Category, Brand, ProductImage, Order, OrderItem, Comment, UserProfile, CategorySummary, ProductRating
+from .identity import taken_identities
+from .metrics import TimedRepresentationMixin
+from .ratings import rating_histogram
+from .reference import brands, categories
+from .sales import order_line, record_order_sales, record_order_totals
 from django.contrib.auth import authenticate
 from django.contrib.auth.hashers import check_password
-from django.db.models import Avg
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = UserProfile
         fields = ['image']
@@ -53,12 +60,13 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
                 {"password": "Las contraseñas no coinciden"}
             )
 
-        if User.objects.filter(username=data["username"]).exists():
+        taken = taken_identities(username=data["username"], email=data["email"])
+        if "username" in taken:
             raise serializers.ValidationError(
                 {"username": "El nombre de usuario ya está en uso"}
             )
 
-        if User.objects.filter(email=data["email"]).exists():
+        if "email" in taken:
             raise serializers.ValidationError(
                 {"email": "El correo electrónico ya está en uso"}
             )
@@ -66,11 +74,18 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return data
 
     def create(self, validated_data):
-        user = User.objects.create_user(
-            username=validated_data["username"],
-            email=validated_data["email"],
-            password=validated_data["password"],
-        )
+        # Otro registro puede tomar el nombre entre la validación y el INSERT: lo rechaza la
+        # restricción única. Las vistas corren en autocommit, no hace falta un savepoint.
+        try:
+            user = User.objects.create_user(
+                username=validated_data["username"],
+                email=validated_data["email"],
+                password=validated_data["password"],
+            )
+        except IntegrityError:
+            raise serializers.ValidationError(
+                {"username": "El nombre de usuario ya está en uso"}
+            )
         return user
 
 
@@ -114,19 +129,16 @@ class UserUpdateSerializer(serializers.Serializer):
     def validate(self, data):
         user = self.context["request"].user
 
-        if "new_username" in data:
-            new_username = data["new_username"]
-            if User.objects.filter(username=new_username).exists():
-                raise serializers.ValidationError(
-                    "El nombre de usuario ya está en uso."
-                )
+        taken = taken_identities(username=data.get("new_username"), email=data.get("new_email"))
+        if "username" in taken:
+            raise serializers.ValidationError(
+                "El nombre de usuario ya está en uso."
+            )
 
-        if "new_email" in data:
-            new_email = data["new_email"]
-            if User.objects.filter(email=new_email).exists():
-                raise serializers.ValidationError(
-                    "El correo electrónico ya está en uso."
-                )
+        if "email" in taken:
+            raise serializers.ValidationError(
+                "El correo electrónico ya está en uso."
+            )
 
         if "new_password" in data or "new_password_repeat" in data:
             new_password = data.get("new_password")
@@ -149,37 +161,97 @@ class UserUpdateSerializer(serializers.Serializer):
         if "new_password" in validated_data:
             instance.set_password(validated_data["new_password"])
 
-        instance.save()
+        try:
+            instance.save()
+        except IntegrityError:
+            raise serializers.ValidationError("El nombre de usuario ya está en uso.")
         return instance
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ["id", "name"]
 
 
-class BrandSerializer(serializers.ModelSerializer):
+class CategorySummarySerializer(TimedRepresentationMixin, serializers.ModelSerializer):
+    id = serializers.IntegerField(source="category_id")
+    name = serializers.CharField(source="category.name")
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, coerce_to_string=False)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, coerce_to_string=False)
+
+    class Meta:
+        model = CategorySummary
+        fields = ["id", "name", "product_count", "on_sale_count", "min_price", "max_price"]
+
+
+class BrandSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = Brand
         fields = ["id", "name"]
 
 
-class ProductImageSerializer(serializers.ModelSerializer):
+class ReferencePrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    # Valida contra la copia en memoria de tienda.reference en lugar de un SELECT por escritura
+    def __init__(self, reference, **kwargs):
+        self.reference = reference
+        super().__init__(queryset=reference.model.objects.all(), **kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        instance = self.reference.get(pk)
+        if instance is None:
+            self.fail("does_not_exist", pk_value=data)
+        return instance
+
+
+class ReferenceDetailField(serializers.Field):
+    def __init__(self, reference, serializer_class, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+        self.reference = reference
+        self.serializer = serializer_class()
+
+    def to_representation(self, pk):
+        instance = self.reference.get(pk)
+        return self.serializer.to_representation(instance) if instance is not None else None
+
+
+class ProductImageSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = ProductImage
         fields = ["id", "image"]
         
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductRatingSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
+    average_rating = serializers.DecimalField(max_digits=3, decimal_places=2, coerce_to_string=False)
+    histogram = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProductRating
+        fields = ["average_rating", "rating_count", "histogram"]
+
+    def get_histogram(self, obj):
+        return rating_histogram(obj)
+
+
+class ProductSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     images = ProductImageSerializer(many=True, read_only=True)
-    category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all())
-    brand = serializers.PrimaryKeyRelatedField(queryset=Brand.objects.all())
-    category_detail = CategorySerializer(source="category", read_only=True)
-    brand_detail = BrandSerializer(source="brand", read_only=True)
+    category = ReferencePrimaryKeyField(categories)
+    brand = ReferencePrimaryKeyField(brands)
+    category_detail = ReferenceDetailField(categories, CategorySerializer, source="category_id")
+    brand_detail = ReferenceDetailField(brands, BrandSerializer, source="brand_id")
     price = serializers.DecimalField(max_digits=10, decimal_places=2, coerce_to_string=False)
-    final_price = serializers.SerializerMethodField()
+    final_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, coerce_to_string=False, read_only=True
+    )
     average_rating = serializers.SerializerMethodField()
+    rating_summary = serializers.SerializerMethodField()
     total_sold = serializers.SerializerMethodField()
 
     class Meta:
@@ -198,25 +270,22 @@ class ProductSerializer(serializers.ModelSerializer):
             "discount_percentage",
             "final_price",
             "average_rating",
+            "rating_summary",
             "total_sold"
         ]
         
 
-    def get_final_price(self, obj):
-        final_price = obj.price
-
-        if obj.discount_percentage:
-            final_price = obj.price - (obj.price * obj.discount_percentage / 100)
-        
-        return round(final_price, 2)
-    
     def get_total_sold(self, obj):
-        total_sold = OrderItem.objects.filter(product=obj).aggregate(total_sold=models.Sum('quantity'))['total_sold']
-        return total_sold or 0
+        sales = getattr(obj, "sales", None)
+        return sales.units_all_time if sales else 0
     
-    def get_average_rating(self,obj):
-        average_rating = Comment.objects.filter(product = obj).aggregate(Avg('rating'))['rating__avg']
-        return average_rating or 0
+    def get_average_rating(self, obj):
+        summary = getattr(obj, "rating_summary", None)
+        return float(summary.average_rating) if summary else 0
+
+    def get_rating_summary(self, obj):
+        summary = getattr(obj, "rating_summary", None)
+        return ProductRatingSerializer(summary or ProductRating(product=obj)).data
 
     def create(self, validated_data):
         images_data = validated_data.pop("images", [])
@@ -226,7 +295,56 @@ class ProductSerializer(serializers.ModelSerializer):
         return product
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class ProductBulkUpdateSerializer(serializers.Serializer):
+    category = ReferencePrimaryKeyField(categories, required=False)
+    brand = ReferencePrimaryKeyField(brands, required=False)
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=Decimal(0), required=False
+    )
+    price_change_percentage = serializers.DecimalField(
+        max_digits=6, decimal_places=2, min_value=Decimal(-99), max_value=Decimal(1000), required=False
+    )
+    is_on_sale = serializers.BooleanField(required=False)
+    discount_percentage = serializers.DecimalField(
+        max_digits=5, decimal_places=0, min_value=Decimal(1), max_value=Decimal(99), required=False
+    )
+
+    def validate(self, data):
+        if not any(key in data for key in ("category", "brand", "ids")):
+            raise serializers.ValidationError(
+                "Debe indicar al menos un filtro: category, brand o ids."
+            )
+
+        if "price" in data and "price_change_percentage" in data:
+            raise serializers.ValidationError(
+                "No se puede indicar price y price_change_percentage a la vez."
+            )
+
+        if not any(
+            key in data
+            for key in ("price", "price_change_percentage", "is_on_sale", "discount_percentage")
+        ):
+            raise serializers.ValidationError("No se indicó ningún cambio de precio o descuento.")
+
+        if "discount_percentage" in data and data.get("is_on_sale") is False:
+            raise serializers.ValidationError(
+                "No se puede asignar un descuento a productos que no están en oferta."
+            )
+
+        return data
+
+
+class BlankPageIdMixin:
+    # En la base page_id es NULL en los comentarios de producto; la API sigue devolviendo ""
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if data.get("page_id") is None:
+            data["page_id"] = ""
+        return data
+
+
+class CommentSerializer(TimedRepresentationMixin, BlankPageIdMixin, serializers.ModelSerializer):
     user = UserRegistrationSerializer(read_only=True)
 
     class Meta:
@@ -241,17 +359,12 @@ class CommentSerializer(serializers.ModelSerializer):
             "page_id",
         ]
         read_only_fields = ["id", "user", "created_at"]
+        # Las restricciones únicas (user, product) y (user, page_id) no deben volverlos obligatorios
+        extra_kwargs = {"product": {"required": False}, "page_id": {"required": False}}
 
     def validate(self, data):
-        request = self.context["request"]
-        user = request.user
         product = data.get("product")
 
-        if request.method == "POST":
-            if product:
-                if Comment.objects.filter(user=user, product=product).exists():
-                    raise serializers.ValidationError("Ya has comentado este producto.")
-
         if product:
             if not data.get("rating"):
                 raise serializers.ValidationError(
@@ -268,25 +381,70 @@ class CommentSerializer(serializers.ModelSerializer):
                     "El texto del comentario es obligatorio para los comentarios de la página."
                 )
 
-            if request.method == "POST":
-                if Comment.objects.filter(user=user, page_id=data["page_id"]).exists():
-                    raise serializers.ValidationError(
-                        "Ya has comentado en esta página."
-                    )
-
         return data
 
+    # Los duplicados los detectan las restricciones únicas de Comment, sin consultar antes
+    def duplicate_error(self, validated_data, instance=None):
+        product = validated_data.get("product", getattr(instance, "product", None))
+        message = "Ya has comentado este producto." if product else "Ya has comentado en esta página."
+        return serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]})
+
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise self.duplicate_error(validated_data)
+
+    def update(self, instance, validated_data):
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError:
+            raise self.duplicate_error(validated_data, instance)
+
+
+class CommentAuthorSerializer(serializers.ModelSerializer):
+    image = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ["id", "username", "image"]
+
+    def get_image(self, obj):
+        profile = getattr(obj, "profile", None)
+        return getattr(profile, "image", None)
 
-class OrderItemSerializer(serializers.ModelSerializer):
-    product = ProductSerializer(read_only=True)
+
+class CommentFeedSerializer(TimedRepresentationMixin, BlankPageIdMixin, serializers.ModelSerializer):
+    user = CommentAuthorSerializer(read_only=True)
+
+    class Meta:
+        model = Comment
+        fields = ["id", "user", "product", "rating", "comment_text", "created_at", "page_id"]
+
+
+class OrderItemProductField(serializers.PrimaryKeyRelatedField):
+    # Recibe el id del producto y lo devuelve serializado completo
+    def use_pk_only_optimization(self):
+        return False
+
+    def to_representation(self, value):
+        return ProductSerializer(value, context=self.context).data
+
+
+class OrderItemSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
+    product = OrderItemProductField(queryset=Product.objects.all())
 
     class Meta:
         model = OrderItem
-        fields = ["product", "quantity", "price"]
+        fields = ["product", "quantity", "price", "line_total"]
+        # Los calcula la base a partir del precio vigente del producto
+        read_only_fields = ["price", "line_total"]
 
 
-class OrderSerializer(serializers.ModelSerializer):
-    order_items = OrderItemSerializer(many=True, read_only=True)
+class OrderSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
+    order_items = OrderItemSerializer(many=True)
 
     class Meta:
         model = Order
@@ -306,19 +464,18 @@ class OrderSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["order_date", "total_amount", "status"]
 
+    def get_fields(self):
+        fields = super().get_fields()
+        # Las líneas solo se cargan al crear la orden: en un update se muestran y se ignoran
+        if self.instance is not None:
+            fields["order_items"] = OrderItemSerializer(many=True, read_only=True)
+        return fields
+
+    @transaction.atomic
     def create(self, validated_data):
         order_items_data = validated_data.pop("order_items")
         user = self.context["request"].user
 
-        total_amount = 0
-
-        for order_item_data in order_items_data:
-            product = order_item_data["product"]
-            quantity = order_item_data["quantity"]
-            price = order_item_data["price"]
-
-            total_amount += price * quantity
-
         order = Order.objects.create(
             user=user,
             name=validated_data["name"],
@@ -328,22 +485,21 @@ class OrderSerializer(serializers.ModelSerializer):
             number_of_street=validated_data["number_of_street"],
             payment_method=validated_data["payment_method"],
             comment=validated_data.get("comment", ""),
-            total_amount=total_amount,
+            total_amount=0,
         )
 
         # Crear los OrderItems después de crear la orden
-        for order_item_data in order_items_data:
-            OrderItem.objects.create(
-                order=order,
-                product=order_item_data["product"],
-                quantity=order_item_data["quantity"],
-                price=order_item_data["price"],
-            )
+        order_items = OrderItem.objects.bulk_create(
+            order_line(order, order_item_data["product"].pk, order_item_data["quantity"])
+            for order_item_data in order_items_data
+        )
+        record_order_sales(order_items, order.order_date)
+        record_order_totals(order)
 
         return order
 
 
-class ProductImageSerializer(serializers.ModelSerializer):
+class ProductImageSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = ProductImage
         fields = ["id", "image", "product"] 
\ No newline at end of file
@@ -1,7 +1,148 @@
 from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
 from rest_framework.authtoken.models import Token
 
+from . import analytics
+from .facets import FACET_FIELDS, apply_facet_change, facet_cell, product_rating, refresh_category_facets
+from .models import Brand, Category, CategorySummary, Order, Product, SaleSchedule
+from .reference import brands, categories
+from .sales import remove_order_sales, remove_order_totals
+from .summaries import apply_summary_change, refresh_category_summary
+
 def create_auth_token(sender, request, user, **kwargs):
     Token.objects.get_or_create(user=user)
 
-user_logged_in.connect(create_auth_token)
\ No newline at end of file
+user_logged_in.connect(create_auth_token)
+
+# Se envía una vez por lote cuando se modifican productos con UPDATE masivos,
+# que no disparan post_save. Argumentos: product_ids.
+products_bulk_updated = Signal()
+
+
+def schedule_category_refresh(*category_ids, facets=True):
+    # Recorre la categoría entera: solo para cambios masivos o sin valores previos conocidos
+    def refresh(category_id):
+        if facets:
+            refresh_category_facets(category_id)
+        refresh_category_summary(category_id)
+
+    for category_id in {c for c in category_ids if c}:
+        transaction.on_commit(lambda category_id=category_id: refresh(category_id))
+
+
+@receiver(post_save, sender=Category)
+def create_category_summary(sender, instance, created, **kwargs):
+    if created:
+        CategorySummary.objects.get_or_create(category=instance)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, **kwargs):
+    categories.invalidate()
+
+
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+def invalidate_brands(sender, **kwargs):
+    brands.invalidate()
+
+
+def summary_entry(fields, created_at):
+    category_id, _, is_on_sale, final_price = fields
+    return (category_id, is_on_sale, final_price, created_at)
+
+
+def loaded_facet_fields(instance):
+    values = instance.__dict__
+    if instance.pk is None or any(field not in values for field in FACET_FIELDS):
+        return None
+    return tuple(values[field] for field in FACET_FIELDS)
+
+
+@receiver(post_init, sender=Product)
+def remember_facet_fields(sender, instance, **kwargs):
+    # Valores con los que se cargó el producto: al guardarlo se sabe de qué celda de
+    # facetas sale sin volver a consultarlo
+    instance._loaded_facet_fields = loaded_facet_fields(instance)
+
+
+@receiver(post_save, sender=Product)
+def move_product_facets(sender, instance, created, **kwargs):
+    previous = None if created else instance._loaded_facet_fields
+    current = loaded_facet_fields(instance)
+    instance._loaded_facet_fields = current
+    if not created and previous is None:
+        # Se cargó con .only()/.defer() sin esos campos: no se sabe de qué celda sale
+        schedule_category_refresh(instance.category_id)
+        return
+    if previous == current:
+        return
+
+    if previous is None or facet_cell(*previous) != facet_cell(*current):
+        rating = (0, None) if created else product_rating(instance.pk)
+        apply_facet_change(previous and facet_cell(*previous, *rating), facet_cell(*current, *rating))
+    apply_summary_change(
+        previous and summary_entry(previous, instance.created_at), summary_entry(current, instance.created_at)
+    )
+
+
+@receiver(pre_delete, sender=Product)
+def remove_product_facets(sender, instance, **kwargs):
+    # Antes del borrado, mientras existe la calificación que define la celda
+    fields = loaded_facet_fields(instance)
+    if fields is None:
+        schedule_category_refresh(instance.category_id)
+    else:
+        apply_facet_change(facet_cell(*fields, *product_rating(instance.pk)))
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_summary(sender, instance, **kwargs):
+    # Después del borrado, para que un extremo recalculado ya no lo cuente
+    fields = loaded_facet_fields(instance)
+    if fields is not None:
+        apply_summary_change(summary_entry(fields, instance.created_at))
+
+
+@receiver(products_bulk_updated)
+def refresh_bulk_categories(sender, product_ids, **kwargs):
+    category_ids = (
+        Product.objects.filter(id__in=product_ids).values_list("category_id", flat=True).distinct()
+    )
+    schedule_category_refresh(*category_ids)
+
+
+@receiver(pre_delete, sender=SaleSchedule)
+def release_deleted_schedule(sender, instance, **kwargs):
+    # Sin esto el SET_NULL dejaría a los productos con el descuento para siempre.
+    # Import local: schedules usa pricing, que importa este módulo.
+    from .schedules import release_products
+
+    if Product.objects.filter(sale_schedule=instance).exists():
+        release_products(instance, timezone.now())
+
+
+@receiver(pre_save, sender=Order)
+def remember_previous_status(sender, instance, **kwargs):
+    instance._previous_status = None
+    if instance.pk:
+        instance._previous_status = Order.objects.filter(pk=instance.pk).values_list("status", flat=True).first()
+
+
+@receiver(post_save, sender=Order)
+def move_rolled_up_status(sender, instance, created, **kwargs):
+    previous_status = getattr(instance, "_previous_status", None)
+    if not created and previous_status not in (None, instance.status):
+        analytics.move_order_status(instance, previous_status)
+
+
+@receiver(pre_delete, sender=Order)
+def remove_deleted_order(sender, instance, **kwargs):
+    # Antes del borrado, mientras las líneas de la orden siguen en la base
+    remove_order_totals(instance)
+    remove_order_sales(instance)
+    analytics.remove_order(instance)
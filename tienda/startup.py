@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+
+# Lo que hace una instancia nueva antes de atender el primer request: cargar settings y
+# apps, la aplicación WSGI y todas las vistas (resolver de URLs).
+STARTUP_SCRIPT = (
+    "import django; django.setup(); "
+    "import ecommer_electronica_backend2.wsgi; "
+    "from django.urls import get_resolver; get_resolver().url_patterns"
+)
+
+# Dependencias que solo usan las subidas de imágenes y el login con Google
+LAZY_MODULES = ("cloudinary", "PIL", "google.auth", "google.oauth2")
+
+
+def parse_importtime(output):
+    """Devuelve el tiempo total en ms y, por módulo, su tiempo acumulado en ms y su nivel."""
+    modules = {}
+    total_us = 0
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        # "import time: self [us] | cumulative | imported package", con sangría por nivel
+        _, cumulative_us, name = line.split(":", 1)[1].split("|")
+        if not cumulative_us.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip()) + 1) // 2
+        modules[name.strip()] = (int(cumulative_us) / 1000, depth)
+        if depth == 1:
+            total_us += int(cumulative_us)
+    return total_us / 1000, modules
+
+
+def measure_startup(settings_module=None):
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings_module or os.environ["DJANGO_SETTINGS_MODULE"]}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_SCRIPT],
+        cwd=settings.BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return parse_importtime(result.stderr)
@@ -0,0 +1,85 @@
+from django.db.models import Count, Max, Min, Q
+
+from .models import Category, CategorySummary, Product
+
+
+def category_summary_values(products):
+    return products.aggregate(
+        product_count=Count("id"),
+        on_sale_count=Count("id", filter=Q(is_on_sale=True)),
+        newest_product_at=Max("created_at"),
+        min_price=Min("final_price"),
+        max_price=Max("final_price"),
+    )
+
+
+def refresh_category_summary(category_id):
+    if not Category.objects.filter(pk=category_id).exists():
+        return
+    CategorySummary.objects.update_or_create(
+        category_id=category_id,
+        defaults=category_summary_values(Product.objects.filter(category_id=category_id)),
+    )
+
+
+def apply_summary_change(old_entry=None, new_entry=None):
+    # Entradas: (category_id, is_on_sale, final_price, created_at). Como apply_facet_change:
+    # el producto sale de un resumen y entra en otro sin recorrer la categoría. Debe
+    # llamarse cuando la base ya tiene el cambio (post_save, post_delete).
+    if old_entry == new_entry:
+        return
+    category_ids = sorted({entry[0] for entry in (old_entry, new_entry) if entry is not None and entry[0]})
+    for category_id in category_ids:
+        update_category_summary(
+            category_id,
+            old_entry if old_entry and old_entry[0] == category_id else None,
+            new_entry if new_entry and new_entry[0] == category_id else None,
+        )
+
+
+def update_category_summary(category_id, leaving=None, entering=None):
+    summary = CategorySummary.objects.select_for_update().filter(category_id=category_id).first()
+    if summary is None:
+        # La categoría se está borrando (el resumen cae en cascada) o se creó sin señales
+        return
+
+    for sign, entry in ((-1, leaving), (1, entering)):
+        if entry is not None:
+            summary.product_count += sign
+            summary.on_sale_count += sign * entry[1]
+
+    if leaving is not None and is_on_summary_edge(summary, leaving):
+        # Salió un producto que podía ser un extremo: solo entonces se recalculan, desde la base
+        summary.min_price, summary.max_price, summary.newest_product_at = (
+            Product.objects.filter(category_id=category_id)
+            .aggregate(Min("final_price"), Max("final_price"), Max("created_at"))
+            .values()
+        )
+    elif entering is not None:
+        _, _, final_price, created_at = entering
+        summary.min_price = min_or_none(summary.min_price, final_price)
+        summary.max_price = max_or_none(summary.max_price, final_price)
+        summary.newest_product_at = max_or_none(summary.newest_product_at, created_at)
+
+    summary.save(
+        update_fields=["product_count", "on_sale_count", "min_price", "max_price", "newest_product_at", "updated_at"]
+    )
+
+
+def is_on_summary_edge(summary, entry):
+    _, _, final_price, created_at = entry
+    return (
+        summary.min_price is None
+        or final_price <= summary.min_price
+        or final_price >= summary.max_price
+        or summary.newest_product_at is None
+        or created_at >= summary.newest_product_at
+    )
+
+
+def min_or_none(current, value):
+    return value if current is None else min(current, value)
+
+
+def max_or_none(current, value):
+    return value if current is None else max(current, value)
@@ -1,3 +1,1820 @@
-from django.test import TestCase
+import gc
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from collections import Counter
+from contextlib import nullcontext
+from contextvars import copy_context
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import ROUND_HALF_UP, Decimal
+from io import StringIO
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from time import perf_counter
+from unittest import mock
+from urllib.parse import quote
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import Avg, Count
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from ecommer_electronica_backend2.mysql_pool.base import (
+    COM_RESET_CONNECTION,
+    ConnectionPool,
+    DatabaseWrapper as PooledDatabaseWrapper,
+)
+
+from . import analytics, checks, db_router, exports, identity, recommendations
+from . import urls as tienda_urls
+from .metrics import RequestMetrics, percentile, summary as metrics_summary
+from .models import (
+    Brand,
+    Category,
+    CategorySalesDay,
+    CategorySummary,
+    Comment,
+    Order,
+    OrderItem,
+    OrderRollup,
+    Product,
+    ProductFacetCount,
+    ProductImage,
+    ProductRollup,
+    ProductSales,
+    ProductSalesDay,
+    SaleSchedule,
+    SalesDay,
+)
+from . import reference
+from .checks import check_shared_cache
+from .facets import refresh_category_facets
+from .pricing import update_in_batches
+from .reference import brands, categories
+from .sales import (
+    compact_sales,
+    order_line,
+    rebuild_order_summaries,
+    rebuild_sales,
+    record_order_sales,
+    record_order_totals,
+)
+from .seeding import seed_store
+from .serializers import ProductSerializer
+from .signals import products_bulk_updated
+from .summaries import category_summary_values
+from .views import catalog_products
+from .startup import LAZY_MODULES, measure_startup
+
+
+class FacetCountTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="ana")
+        self.audio = Category.objects.create(name="Audio")
+        self.video = Category.objects.create(name="Video")
+        sony = Brand.objects.create(name="Sony")
+        self.auriculares = Product.objects.create(
+            name="Auriculares", description="", price=1000, category=self.audio, brand=sony
+        )
+        self.parlante = Product.objects.create(name="Parlante", description="", price=60000, category=self.audio)
+        self.cable = Product.objects.create(name="Cable", description="", price=300, category=self.audio, brand=sony)
+
+    def cells(self):
+        fields = ["category_id", "brand_id", "is_on_sale", "price_bucket", "rating_bucket"]
+        return list(
+            ProductFacetCount.objects.filter(product_count__gt=0)
+            .values_list(*fields, "product_count")
+            .order_by(*fields)
+        )
+
+    def assert_matches_rebuild(self):
+        incremental = self.cells()
+        for category in (self.audio, self.video):
+            refresh_category_facets(category.pk)
+        self.assertEqual(incremental, self.cells())
+
+    def test_changes_move_products_between_cells(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post("/api/comments/", {"product": self.auriculares.pk, "rating": 4, "comment_text": "Bien"})
+        self.assertEqual(response.status_code, 201)
+        self.assert_matches_rebuild()
+
+        self.auriculares.is_on_sale = True
+        self.auriculares.discount_percentage = 10
+        self.auriculares.save()
+        self.parlante.category = self.video
+        self.parlante.save()
+        self.cable.delete()
+        self.assert_matches_rebuild()
+
+        client.delete(f"/api/comments/{response.data['data']['id']}/")
+        self.assert_matches_rebuild()
+
+    def test_saves_that_keep_the_cell_do_not_touch_facets(self):
+        product = Product.objects.get(pk=self.auriculares.pk)
+        product.name = "Auriculares inalámbricos"
+        with self.assertNumQueries(1):
+            product.save()
+
+
+class CategorySummaryTests(TestCase):
+    def setUp(self):
+        self.audio = Category.objects.create(name="Audio")
+        self.video = Category.objects.create(name="Video")
+
+    def product(self, name, price, category=None, **fields):
+        return Product.objects.create(
+            name=name, description="", price=price, category=category or self.audio, **fields
+        )
+
+    def assert_matches_aggregate(self):
+        for category in (self.audio, self.video):
+            summary = CategorySummary.objects.get(category=category)
+            expected = category_summary_values(Product.objects.filter(category=category))
+            self.assertEqual({field: getattr(summary, field) for field in expected}, expected, category.name)
+
+    def test_changes_match_a_fresh_aggregate(self):
+        cable = self.product("Cable", 300)
+        auriculares = self.product("Auriculares", 1000, is_on_sale=True, discount_percentage=10)
+        parlante = self.product("Parlante", 60000)
+        self.assert_matches_aggregate()
+
+        # El más barato deja de serlo, otro baja y uno sale de oferta
+        cable.price = 5000
+        cable.save()
+        auriculares.is_on_sale = False
+        auriculares.save()
+        parlante.price = 100
+        parlante.save()
+        self.assert_matches_aggregate()
+
+        parlante.category = self.video
+        parlante.save()
+        self.assert_matches_aggregate()
+
+        auriculares.delete()
+        self.assert_matches_aggregate()
+        parlante.delete()
+        self.assert_matches_aggregate()
+        self.assertEqual(CategorySummary.objects.get(category=self.video).product_count, 0)
+
+    def test_changes_inside_the_bounds_do_not_aggregate(self):
+        self.product("Cable", 300)
+        auriculares = self.product("Auriculares", 1000)
+        self.product("Parlante", 60000)
+
+        auriculares.price = 2000
+        auriculares.is_on_sale = True
+        auriculares.discount_percentage = 5
+        with CaptureQueriesContext(connection) as queries:
+            auriculares.save()
+        self.assertFalse([query["sql"] for query in queries if "MIN(" in query["sql"] or "COUNT(" in query["sql"]])
+        self.assert_matches_aggregate()
+
+
+class RatingSummaryTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Audio")
+        self.auriculares = Product.objects.create(name="Auriculares", description="", price=1000, category=category)
+        self.parlante = Product.objects.create(name="Parlante", description="", price=500, category=category)
+        self.clients = {}
+        for username in ("ana", "bruno", "carla"):
+            self.clients[username] = APIClient()
+            self.clients[username].force_authenticate(User.objects.create_user(username=username))
+
+    def comment(self, username, product, rating):
+        response = self.clients[username].post(
+            "/api/comments/", {"product": product.pk, "rating": rating, "comment_text": "-"}, format="json"
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data["data"]["id"]
+
+    def assert_matches_aggregate(self):
+        for product in (self.auriculares, self.parlante):
+            ratings = Comment.objects.filter(product=product, rating__isnull=False)
+            fresh = ratings.aggregate(average=Avg("rating"), count=Count("id"))
+            histogram = dict(ratings.values_list("rating").annotate(Count("id")).order_by())
+            response = self.client.get(f"/api/products/{product.pk}/rating/")
+            self.assertEqual(
+                response.data,
+                {
+                    "average_rating": Decimal(str(fresh["average"] or 0)).quantize(
+                        Decimal("0.01"), rounding=ROUND_HALF_UP
+                    ),
+                    "rating_count": fresh["count"],
+                    "histogram": {star: histogram.get(star, 0) for star in range(1, 6)},
+                },
+                product.name,
+            )
+
+    def test_rating_matches_a_fresh_aggregate(self):
+        first = self.comment("ana", self.auriculares, 5)
+        self.comment("bruno", self.auriculares, 4)
+        moved = self.comment("carla", self.auriculares, 4)
+        self.assert_matches_aggregate()
+
+        response = self.clients["ana"].patch(
+            f"/api/comments/{first}/", {"rating": 2, "comment_text": "-"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assert_matches_aggregate()
+
+        response = self.clients["carla"].patch(
+            f"/api/comments/{moved}/", {"product": self.parlante.pk, "rating": 3, "comment_text": "-"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assert_matches_aggregate()
+
+        self.assertEqual(self.clients["ana"].delete(f"/api/comments/{first}/").status_code, 200)
+        self.assert_matches_aggregate()
+        self.assertEqual(self.clients["carla"].delete(f"/api/comments/{moved}/").status_code, 200)
+        self.assert_matches_aggregate()
+
+
+class CommentUniquenessTests(TransactionTestCase):
+    parallel_posts = 8
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="ana", password="secreta123")
+        category = Category.objects.create(name="Audio")
+        self.product = Product.objects.create(
+            name="Auriculares", description="Bluetooth", price=1000, category=category
+        )
+
+    def post_comment(self, data):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        return client.post("/api/comments/", data, format="json")
+
+    def post_in_parallel(self, data):
+        barrier = threading.Barrier(self.parallel_posts)
+        status_codes = []
+        errors = []
+
+        def worker():
+            try:
+                barrier.wait()
+                status_codes.append(self.post_comment(data).status_code)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.parallel_posts)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return sorted(status_codes)
+
+    # SQLite bloquea la tabla entera ante escrituras simultáneas: los hilos fallan con
+    # "database table is locked" antes de llegar a la restricción única
+    @unittest.skipIf(connection.vendor == "sqlite", "SQLite no admite escrituras concurrentes")
+    def test_parallel_product_comments_only_one_succeeds(self):
+        status_codes = self.post_in_parallel(
+            {"product": self.product.id, "rating": 5, "comment_text": "Excelente"}
+        )
+
+        self.assertEqual(status_codes, [201] + [400] * (self.parallel_posts - 1))
+        self.assertEqual(Comment.objects.filter(user=self.user, product=self.product).count(), 1)
+
+    @unittest.skipIf(connection.vendor == "sqlite", "SQLite no admite escrituras concurrentes")
+    def test_parallel_page_comments_only_one_succeeds(self):
+        status_codes = self.post_in_parallel({"page_id": "inicio", "comment_text": "Hola"})
+
+        self.assertEqual(status_codes, [201] + [400] * (self.parallel_posts - 1))
+        self.assertEqual(Comment.objects.filter(user=self.user, page_id="inicio").count(), 1)
+
+    def test_product_and_page_comments_do_not_conflict(self):
+        self.assertEqual(self.post_comment({"page_id": "inicio", "comment_text": "Hola"}).status_code, 201)
+        self.assertEqual(self.post_comment({"page_id": "ofertas", "comment_text": "Hola"}).status_code, 201)
+        self.assertEqual(
+            self.post_comment(
+                {"product": self.product.id, "rating": 4, "comment_text": "Bueno"}
+            ).status_code,
+            201,
+        )
+
+    def test_blank_page_ids_are_stored_as_null(self):
+        # Índice único común sobre (user, page_id): varios NULL no chocan, sin índices funcionales
+        other = Product.objects.create(name="Parlante", description="-", price=500, category=self.product.category)
+        for product in (self.product, other):
+            response = self.post_comment({"product": product.id, "rating": 4, "comment_text": "Bueno", "page_id": ""})
+            self.assertEqual(response.status_code, 201, response.data)
+            self.assertEqual(response.data["data"]["page_id"], "")
+        self.assertEqual(Comment.objects.filter(user=self.user, page_id__isnull=True).count(), 2)
+
+        self.assertEqual(self.post_comment({"page_id": "inicio", "comment_text": "Hola"}).status_code, 201)
+        response = self.post_comment({"page_id": "inicio", "comment_text": "Otra vez"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["non_field_errors"], ["Ya has comentado en esta página."])
+
+    def test_duplicate_check_does_not_query_comments_before_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post_comment(
+                {"product": self.product.id, "rating": 5, "comment_text": "Excelente"}
+            )
+
+        self.assertEqual(response.status_code, 201)
+        comment_queries = [q["sql"] for q in queries if "tienda_comment" in q["sql"]]
+        self.assertEqual(len(comment_queries), 1)
+        self.assertTrue(comment_queries[0].startswith("INSERT"))
+
+        response = self.post_comment({"product": self.product.id, "rating": 3, "comment_text": "Otra"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["non_field_errors"], ["Ya has comentado este producto."])
+
+
+
+class CommentFeedTests(TestCase):
+    def test_limit_is_clamped_to_at_least_one(self):
+        users = User.objects.bulk_create(User(username=f"usuario{n}") for n in range(3))
+        Comment.objects.bulk_create(Comment(user=user, page_id="inicio", comment_text="Hola") for user in users)
+        client = APIClient()
+
+        for limit in (-2, 0):
+            response = client.get("/api/comments/feed/", {"page_id": "inicio", "limit": limit})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data["results"]), 1)
+            self.assertIsNotNone(response.data["next_cursor"])
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "la réplica de prueba es una copia SQLite")
+@override_settings(DATABASE_REPLICAS=["replica"], DB_REPLICA_CHECK_INTERVAL=60)
+class ReplicaRouterTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="ana", password="secreta123")
+        self.token = Token.objects.create(user=self.user)
+        category = Category.objects.create(name="Audio")
+        self.product = Product.objects.create(
+            name="Auriculares", description="Bluetooth", price=1000, category=category
+        )
+
+        # La réplica es una copia de la base de prueba en otro archivo SQLite
+        self.directory = tempfile.TemporaryDirectory()
+        replica_path = os.path.join(self.directory.name, "replica.sqlite3")
+        connection.ensure_connection()
+        with sqlite3.connect(replica_path) as target:
+            connection.connection.backup(target)
+        replica_settings = connections.configure_settings(
+            {"default": {}, "replica": {"ENGINE": "django.db.backends.sqlite3", "NAME": replica_path}}
+        )["replica"]
+        patcher = mock.patch.dict(connections.settings, {"replica": replica_settings})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(self.close_replica)
+
+        with connections["replica"].cursor() as cursor:
+            cursor.execute(
+                "UPDATE tienda_product SET name = %s WHERE id = %s", ["Auriculares (réplica)", self.product.id]
+            )
+        db_router.health.status.clear()
+        cache.clear()
+        # Las escrituras de arriba fijaron este contexto al primario
+        self.addCleanup(db_router.primary_pinned.reset, db_router.primary_pinned.set(False))
+
+    def close_replica(self):
+        connections["replica"].close()
+        del connections["replica"]
+
+    def client_for(self, token=None):
+        client = APIClient()
+        if token:
+            client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        return client
+
+    def product_name(self, client=None):
+        response = (client or self.client_for()).get(f"/api/products/{self.product.id}/")
+        self.assertEqual(response.status_code, 200)
+        return response.data["name"]
+
+    def comment_count(self, client):
+        response = client.get(f"/api/comments/get_comments/?product={self.product.id}")
+        self.assertEqual(response.status_code, 200)
+        return len(response.data)
+
+    def test_catalog_reads_go_to_replica(self):
+        self.assertEqual(self.product_name(), "Auriculares (réplica)")
+        router = db_router.ReplicaRouter()
+        self.assertEqual(router.db_for_read(Product), "replica")
+        self.assertIsNone(router.db_for_read(Token))
+        self.assertIsNone(router.db_for_read(User))
+
+    def test_own_write_reads_from_primary_during_window(self):
+        author = self.client_for(self.token)
+        response = author.post(
+            "/api/comments/", {"product": self.product.id, "rating": 5, "comment_text": "Excelente"}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+
+        self.assertEqual(self.comment_count(author), 1)
+        self.assertEqual(self.product_name(author), "Auriculares")
+        self.assertEqual(self.comment_count(self.client_for()), 0)
+        other = User.objects.create_user(username="bruno", password="secreta123")
+        self.assertEqual(self.comment_count(self.client_for(Token.objects.create(user=other))), 0)
+
+        # Vencida la ventana vuelve a leer de la réplica
+        cache.clear()
+        self.assertEqual(self.comment_count(author), 0)
+
+    def test_failed_write_does_not_pin_to_primary(self):
+        author = self.client_for(self.token)
+        response = author.post("/api/comments/", {"product": self.product.id, "rating": 5}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.product_name(author), "Auriculares (réplica)")
+
+    def test_write_pins_the_rest_of_the_context_to_primary(self):
+        router = db_router.ReplicaRouter()
+
+        def write_then_read():
+            router.db_for_write(Comment)
+            return router.db_for_read(Product)
+
+        self.assertIsNone(copy_context().run(write_then_read))
+        self.assertEqual(router.db_for_read(Product), "replica")
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        with override_settings(DB_REPLICA_MAX_LAG=5), mock.patch.object(db_router, "replica_lag", return_value=30):
+            self.assertEqual(self.product_name(), "Auriculares")
+
+    def test_stopped_replication_falls_back_to_primary(self):
+        with mock.patch.object(db_router, "replica_lag", return_value=None):
+            self.assertEqual(self.product_name(), "Auriculares")
+
+    def test_unreachable_replica_falls_back_to_primary(self):
+        with mock.patch.object(db_router, "replica_lag", side_effect=OperationalError("caída")):
+            self.assertEqual(self.product_name(), "Auriculares")
+
+    def test_health_is_checked_once_per_interval(self):
+        with mock.patch.object(db_router, "replica_lag", return_value=0) as replica_lag:
+            for _ in range(3):
+                self.assertEqual(self.product_name(), "Auriculares (réplica)")
+            self.assertEqual(replica_lag.call_count, 1)
+
+            with override_settings(DB_REPLICA_CHECK_INTERVAL=0):
+                self.product_name()
+            self.assertGreater(replica_lag.call_count, 1)
+
+
+
+
+class FakeMySQLConnection:
+    # Lo que usa el pool de pymysql.Connection; "session" es el estado del lado del servidor
+    charset = "utf8mb4"
+    collation = None
+    sql_mode = None
+    init_command = "SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED"
+
+    def __init__(self):
+        self.session = {}
+        self.autocommit_mode = True
+        self.supports_reset = True
+        self.alive = True
+        self.pings = 0
+        self.closed = False
+
+    def _execute_command(self, command, sql):
+        if command == COM_RESET_CONNECTION:
+            if not self.supports_reset:
+                raise OperationalError(1047, "Unknown command")
+            self.session.clear()
+
+    def _read_ok_packet(self):
+        pass
+
+    def set_character_set(self, charset, collation=None):
+        self.session["names"] = charset
+
+    def cursor(self):
+        return nullcontext(self)
+
+    def execute(self, sql, params=None):
+        self.session["init_command"] = sql
+
+    def autocommit(self, value):
+        self.autocommit_mode = value
+
+    def ping(self, reconnect=True):
+        self.pings += 1
+        if not self.alive:
+            raise OperationalError(2006, "MySQL server has gone away")
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("ecommer_electronica_backend2.mysql_pool.base.time.monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = ConnectionPool(size=2, recycle=100, ping_after=10)
+
+    def test_released_connection_is_reused(self):
+        connection = self.pool.acquire(FakeMySQLConnection)
+        self.pool.release(connection)
+        self.assertIs(self.pool.acquire(FakeMySQLConnection), connection)
+        self.assertEqual(self.pool.stats(), {"idle": 0, "created": 1, "reused": 1, "discarded": 0})
+
+    def test_release_resets_session_and_autocommit(self):
+        connection = self.pool.acquire(FakeMySQLConnection)
+        # Lo que puede dejar un request: autocommit apagado, variables y tablas temporales
+        connection.autocommit(False)
+        connection.session.update({"@carrito": 1, "tmp_tables": ["tmp_export"]})
+
+        self.pool.release(connection)
+        self.assertTrue(connection.autocommit_mode)
+        self.assertEqual(
+            connection.session, {"names": "utf8mb4", "init_command": FakeMySQLConnection.init_command}
+        )
+        self.assertFalse(connection.closed)
+
+    def test_connection_that_cannot_be_reset_is_closed(self):
+        connection = self.pool.acquire(FakeMySQLConnection)
+        connection.supports_reset = False
+        self.pool.release(connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(self.pool.stats()["idle"], 0)
+
+    def test_idle_connections_beyond_size_are_closed(self):
+        connections = [self.pool.acquire(FakeMySQLConnection) for _ in range(3)]
+        for connection in connections:
+            self.pool.release(connection)
+        self.assertEqual([connection.closed for connection in connections], [False, False, True])
+        self.assertEqual(self.pool.stats()["idle"], 2)
+
+    def test_old_connections_are_recycled(self):
+        connection = self.pool.acquire(FakeMySQLConnection)
+        self.now += 95
+        self.pool.release(connection)
+        self.now += 6
+
+        self.assertIsNot(self.pool.acquire(FakeMySQLConnection), connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(connection.pings, 0)
+
+    def test_connections_idle_past_ping_after_are_checked(self):
+        connection = self.pool.acquire(FakeMySQLConnection)
+        self.pool.release(connection)
+        self.now += 5
+        self.assertIs(self.pool.acquire(FakeMySQLConnection), connection)
+        self.assertEqual(connection.pings, 0)
+
+        self.pool.release(connection)
+        self.now += 11
+        self.assertIs(self.pool.acquire(FakeMySQLConnection), connection)
+        self.assertEqual(connection.pings, 1)
+
+        self.pool.release(connection)
+        connection.alive = False
+        self.now += 11
+        self.assertIsNot(self.pool.acquire(FakeMySQLConnection), connection)
+        self.assertTrue(connection.closed)
+
+    def test_connection_closed_inside_atomic_block_is_not_pooled(self):
+        wrapper = PooledDatabaseWrapper({**connection.settings_dict, "POOL": {"SIZE": 2}}, alias="pool_test")
+        pool = wrapper.pool
+        self.addCleanup(lambda: [pool.discard(pool.idle.pop()[0]) for _ in range(len(pool.idle))])
+
+        inside, outside = pool.acquire(FakeMySQLConnection), pool.acquire(FakeMySQLConnection)
+        wrapper.connection, wrapper.in_atomic_block = inside, True
+        wrapper._close()
+        wrapper.connection, wrapper.in_atomic_block = outside, False
+        wrapper._close()
+
+        self.assertTrue(inside.closed)
+        self.assertFalse(outside.closed)
+        self.assertEqual([idle[0] for idle in pool.idle], [outside])
+
+
+class ReferenceCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        categories.state = None
+        brands.state = None
+        # TestCase envuelve el test en atomic(): los requests reales corren en autocommit
+        patcher = mock.patch.object(reference, "in_transaction", return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category = Category.objects.create(name="Audio")
+            self.brand = Brand.objects.create(name="Sony")
+        self.product = Product.objects.create(
+            name="Auriculares", description="Bluetooth", price=1000, category=self.category, brand=self.brand
+        )
+
+    def product_data(self, **overrides):
+        return {
+            "name": "Parlante",
+            "description": "Portátil",
+            "price": 500,
+            "category": self.category.id,
+            "brand": self.brand.id,
+            **overrides,
+        }
+
+    def test_validation_and_details_resolve_without_queries(self):
+        ProductSerializer(self.product).data
+        product = catalog_products().get(pk=self.product.pk)
+
+        with self.assertNumQueries(0):
+            serializer = ProductSerializer(data=self.product_data())
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+            data = ProductSerializer(product).data
+
+        self.assertEqual(serializer.validated_data["category"], self.category)
+        self.assertEqual(data["category_detail"], {"id": self.category.id, "name": "Audio"})
+        self.assertEqual(data["brand_detail"], {"id": self.brand.id, "name": "Sony"})
+
+    def test_unknown_ids_are_rejected(self):
+        serializer = ProductSerializer(data=self.product_data(category=999999, brand="x"))
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors["category"][0].code, "does_not_exist")
+        self.assertEqual(serializer.errors["brand"][0].code, "incorrect_type")
+
+    def test_save_invalidates_and_publishes_new_version(self):
+        self.assertEqual(categories.get(self.category.id).name, "Audio")
+        version = cache.get(categories.version_key)
+
+        self.category.name = "Sonido"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.save()
+
+        self.assertNotEqual(cache.get(categories.version_key), version)
+        self.assertEqual(categories.get(self.category.id).name, "Sonido")
+
+    @override_settings(REFERENCE_CACHE_CHECK_SECONDS=60)
+    @mock.patch.object(reference, "shared_cache", return_value=True)
+    def test_changes_from_other_processes_apply_after_version_bump(self, shared_cache):
+        self.assertEqual(categories.get(self.category.id).name, "Audio")
+        # Otro proceso: cambia la base sin señales en este proceso y publica una versión nueva
+        Category.objects.filter(pk=self.category.pk).update(name="Sonido")
+        self.assertEqual(categories.get(self.category.id).name, "Audio")
+
+        cache.set(categories.version_key, "otro-proceso", None)
+        self.assertEqual(categories.get(self.category.id).name, "Audio")
+        with override_settings(REFERENCE_CACHE_CHECK_SECONDS=0):
+            self.assertEqual(categories.get(self.category.id).name, "Sonido")
+
+    @override_settings(REFERENCE_CACHE_CHECK_SECONDS=60)
+    @mock.patch.object(reference, "shared_cache", return_value=True)
+    def test_missing_id_rechecks_version(self, shared_cache):
+        categories.snapshot()
+        # bulk_create no envía post_save: como si la hubiera creado otro proceso
+        Category.objects.bulk_create([Category(name="Video")])
+        created = Category.objects.get(name="Video")
+        self.assertIsNone(categories.get(created.id))
+
+        cache.set(categories.version_key, "otro-proceso", None)
+        self.assertEqual(categories.get(created.id).name, "Video")
+
+    @override_settings(REFERENCE_CACHE_CHECK_SECONDS=60)
+    def test_process_local_cache_reloads_on_unknown_id(self):
+        self.assertEqual(categories.get(self.category.id).name, "Audio")
+        # Con locmem la versión que publica otro worker no llega: un id nuevo recarga la copia
+        Category.objects.bulk_create([Category(name="Video")])
+        created = Category.objects.get(name="Video")
+        Category.objects.filter(pk=self.category.pk).update(name="Sonido")
+
+        self.assertEqual(categories.get(created.id).name, "Video")
+        self.assertEqual(categories.get(self.category.id).name, "Sonido")
+
+    def test_deploy_check_requires_shared_cache(self):
+        self.assertEqual([error.id for error in check_shared_cache(None)], ["tienda.E001"])
+        with mock.patch.object(checks, "shared_cache", return_value=True):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class ReferenceTransactionTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        categories.state = None
+        self.category = Category.objects.create(name="Audio")
+
+    def test_rolled_back_rows_are_not_shared(self):
+        categories.snapshot()
+        with self.assertRaises(ZeroDivisionError), transaction.atomic():
+            ghost = Category.objects.create(name="Fantasma")
+            self.assertEqual(categories.get(ghost.id).name, "Fantasma")
+            1 / 0
+
+        self.assertIsNone(categories.get(ghost.id))
+
+    def test_rolled_back_savepoint_drops_its_copy(self):
+        with transaction.atomic():
+            kept = Category.objects.create(name="Video")
+            with self.assertRaises(ZeroDivisionError), transaction.atomic():
+                ghost = Category.objects.create(name="Fantasma")
+                self.assertEqual(categories.get(ghost.id).name, "Fantasma")
+                1 / 0
+
+            self.assertEqual(categories.get(kept.id).name, "Video")
+            self.assertIsNone(categories.get(ghost.id))
+
+        self.assertEqual(categories.get(kept.id).name, "Video")
+
+    def test_transaction_reuses_its_copy(self):
+        with transaction.atomic():
+            Category.objects.create(name="Video")
+            with self.assertNumQueries(1):
+                for _ in range(3):
+                    self.assertEqual(categories.get(self.category.id).name, "Audio")
+
+        with transaction.atomic(), self.assertNumQueries(1):
+            for _ in range(3):
+                self.assertEqual(categories.get(self.category.id).name, "Audio")
+
+
+class IdentityTests(TestCase):
+    def test_availability_is_one_query(self):
+        User.objects.create_user(username="ana", email="ana@example.com")
+
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                identity.taken_identities(username="ana", email="ana@example.com"), {"username", "email"}
+            )
+        with self.assertNumQueries(1):
+            self.assertEqual(identity.taken_identities(username="bruno", email="ana@example.com"), {"email"})
+        with self.assertNumQueries(0):
+            self.assertEqual(identity.taken_identities(), set())
+
+    def test_next_free_username_is_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(identity.next_free_username("ana"), "ana")
+
+        User.objects.create_user(username="ana")
+        self.assertEqual(identity.next_free_username("ana"), "ana_1")
+
+        User.objects.bulk_create(
+            [User(username=f"ana_{n}") for n in range(1, 13)] + [User(username="ana_perez"), User(username="anab_99")]
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(identity.next_free_username("ana"), "ana_13")
+
+    def test_create_retries_when_username_is_taken_concurrently(self):
+        User.objects.create_user(username="ana")
+        with mock.patch.object(identity, "next_free_username", side_effect=["ana", "ana_1"]):
+            user = identity.create_user_with_free_username("ana", "ana@example.com")
+
+        self.assertEqual(user.username, "ana_1")
+        self.assertFalse(user.has_usable_password())
+
+    def test_suffixes_compare_as_numbers(self):
+        User.objects.bulk_create([User(username="juan"), User(username="juan_01"), User(username="juan_2")])
+        self.assertEqual(identity.next_free_username("juan"), "juan_3")
+
+        User.objects.bulk_create([User(username="juan_009"), User(username="juan_10")])
+        self.assertEqual(identity.next_free_username("juan"), "juan_11")
+        self.assertEqual(identity.next_free_username("juan", minimum=20), "juan_20")
+
+    def test_retry_moves_past_the_name_that_collided(self):
+        User.objects.bulk_create([User(username="juan"), User(username="juan_2")])
+        next_free_username = identity.next_free_username
+        minimums = []
+
+        def stale_first_pick(base, minimum=0):
+            # Simula otra alta que tomó juan_2 entre la consulta y el INSERT
+            minimums.append(minimum)
+            return "juan_2" if len(minimums) == 1 else next_free_username(base, minimum)
+
+        with mock.patch.object(identity, "next_free_username", side_effect=stale_first_pick):
+            user = identity.create_user_with_free_username("juan", "juan@example.com")
+
+        self.assertEqual(user.username, "juan_3")
+        self.assertEqual(minimums, [0, 3])
+
+    def test_registration_rejects_taken_username_and_email(self):
+        User.objects.create_user(username="ana", email="ana@example.com")
+        client = APIClient()
+        data = {"password": "secreta123", "confirm_password": "secreta123"}
+
+        response = client.post("/api/register/", {**data, "username": "ana", "email": "otra@example.com"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("username", response.data)
+
+        response = client.post("/api/register/", {**data, "username": "bruno", "email": "ana@example.com"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("email", response.data)
+
+
+
+
+class ProductBulkUpdateTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username="staff", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        audio = Category.objects.create(name="Audio")
+        video = Category.objects.create(name="Video")
+        sony = Brand.objects.create(name="Sony")
+        self.auriculares = Product.objects.create(
+            name="Auriculares", description="-", price="10.05", category=audio, brand=sony
+        )
+        self.parlante = Product.objects.create(name="Parlante", description="-", price="20.10", category=audio)
+        self.monitor = Product.objects.create(
+            name="Monitor", description="-", price="300.00", category=video, brand=sony
+        )
+        self.batches = []
+        products_bulk_updated.connect(self.record_batch)
+        self.addCleanup(products_bulk_updated.disconnect, self.record_batch)
+
+    def record_batch(self, sender, product_ids, **kwargs):
+        self.batches.append(sorted(product_ids))
+
+    def bulk_update(self, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post("/api/products/bulk-update/", data, format="json")
+
+    def test_filters_combine(self):
+        audio = self.auriculares.category_id
+        sony = self.auriculares.brand_id
+        cases = [
+            ({"category": audio}, {self.auriculares.pk, self.parlante.pk}),
+            ({"brand": sony}, {self.auriculares.pk, self.monitor.pk}),
+            ({"category": audio, "brand": sony}, {self.auriculares.pk}),
+            ({"ids": [self.parlante.pk, self.monitor.pk]}, {self.parlante.pk, self.monitor.pk}),
+        ]
+        for filters, expected in cases:
+            with self.subTest(filters):
+                Product.objects.update(is_on_sale=False)
+                response = self.bulk_update({**filters, "is_on_sale": True})
+                self.assertEqual(response.status_code, 200, response.data)
+                self.assertEqual(response.data["updated"], len(expected))
+                self.assertEqual(set(Product.objects.filter(is_on_sale=True).values_list("pk", flat=True)), expected)
+
+        self.assertEqual(self.bulk_update({"is_on_sale": True}).status_code, 400)
+
+    def test_final_price_matches_save(self):
+        # 10.05 con 50 % da 5.025: save() y el UPDATE tienen que redondear igual
+        for data in (
+            {"discount_percentage": 50},
+            {"price_change_percentage": "15.5"},
+            {"price": "99.99", "is_on_sale": False},
+        ):
+            with self.subTest(data):
+                self.bulk_update({"ids": [self.auriculares.pk, self.parlante.pk, self.monitor.pk], **data})
+                for product in Product.objects.all():
+                    self.assertEqual(product.final_price, product.compute_final_price(), product.name)
+                    product.save()
+                    self.assertEqual(Product.objects.get(pk=product.pk).final_price, product.final_price)
+
+        self.auriculares.refresh_from_db()
+        self.assertEqual(self.auriculares.final_price, Decimal("99.99"))
+
+    def test_signal_is_sent_once_per_committed_batch(self):
+        self.bulk_update({"category": self.auriculares.category_id, "discount_percentage": 10})
+        self.assertEqual(self.batches, [sorted([self.auriculares.pk, self.parlante.pk])])
+
+        self.batches.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            updated, batches = update_in_batches(Product.objects.all(), {"is_on_sale": False}, batch_size=2)
+        self.assertEqual((updated, batches), (3, 2))
+        self.assertEqual(self.batches, [[self.auriculares.pk, self.parlante.pk], [self.monitor.pk]])
+
+    def test_staff_only(self):
+        data = {"ids": [self.monitor.pk], "price": "1.00"}
+        self.client.force_authenticate(User.objects.create_user(username="cliente"))
+        self.assertEqual(self.bulk_update(data).status_code, 403)
+        self.client.force_authenticate(None)
+        self.assertIn(self.bulk_update(data).status_code, (401, 403))
+        self.assertEqual(Product.objects.get(pk=self.monitor.pk).price, Decimal("300.00"))
+
+
+class CatalogImportTests(TestCase):
+    def setUp(self):
+        self.audio = Category.objects.create(name="Audio")
+        self.sony = Brand.objects.create(name="Sony")
+        self.existing = Product.objects.create(
+            sku="AUR-1", name="Auriculares", description="-", price=1000, category=self.audio
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.batches = []
+        products_bulk_updated.connect(self.record_batch)
+        self.addCleanup(products_bulk_updated.disconnect, self.record_batch)
+
+    def record_batch(self, sender, product_ids, **kwargs):
+        self.batches.append(sorted(product_ids))
+
+    def import_file(self, name, content, *args):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        stdout, stderr = StringIO(), StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("import_catalog", path, "--no-images", *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_csv_upserts_by_sku_and_resolves_references(self):
+        stdout, stderr = self.import_file(
+            "catalogo.csv",
+            "sku,name,description,price,category,brand,is_on_sale,discount_percentage\n"
+            "AUR-1,Auriculares BT,Bluetooth,1200, audio ,SONY,sí,10\n"
+            "PAR-1,Parlante,Portátil,10.05,Parlantes,JBL,1,50\n"
+            ",Sin sku,-,5,Audio,,,\n",
+        )
+
+        self.assertIn("2 productos importados, 1 omitidos", stdout)
+        self.assertIn("Línea 3", stderr)
+        self.assertEqual(Product.objects.count(), 2)
+        self.existing.refresh_from_db()
+        self.assertEqual(
+            (self.existing.name, self.existing.price, self.existing.category_id, self.existing.brand_id),
+            ("Auriculares BT", Decimal("1200.00"), self.audio.pk, self.sony.pk),
+        )
+        self.assertEqual(self.existing.final_price, Decimal("1080.00"))
+        parlante = Product.objects.get(sku="PAR-1")
+        self.assertEqual((parlante.category.name, parlante.brand.name), ("Parlantes", "JBL"))
+        # 10.05 con 50 % da 5.025: redondea igual que save()
+        self.assertEqual(parlante.final_price, Decimal("5.03"))
+        self.assertEqual(sorted(Category.objects.values_list("name", flat=True)), ["Audio", "Parlantes"])
+
+    def test_jsonl_without_brand_or_discount(self):
+        self.import_file(
+            "catalogo.jsonl",
+            json.dumps({"sku": "MON-1", "name": "Monitor", "price": 300, "category": "Video", "is_on_sale": True})
+            + "\n\n"
+            + json.dumps(
+                {"sku": "AUR-1", "name": "Auriculares", "price": "999.99", "category": "Audio", "images": ["x.jpg"]}
+            )
+            + "\n",
+        )
+
+        monitor = Product.objects.get(sku="MON-1")
+        self.assertEqual((monitor.brand_id, monitor.discount_percentage), (None, None))
+        self.assertEqual(monitor.final_price, monitor.compute_final_price())
+        self.assertEqual(Product.objects.get(sku="AUR-1").final_price, Decimal("999.99"))
+        self.assertEqual(Product.objects.count(), 2)
+
+    def test_signal_is_sent_once_per_batch(self):
+        self.import_file(
+            "catalogo.csv",
+            "sku,name,price,category\nAUR-1,Auriculares,1,Audio\nPAR-1,Parlante,2,Audio\nMON-1,Monitor,3,Video\n",
+            "--batch-size",
+            "2",
+        )
+
+        ids = dict(Product.objects.values_list("sku", "pk"))
+        self.assertEqual(self.batches, [sorted([ids["AUR-1"], ids["PAR-1"]]), [ids["MON-1"]]])
+
+    def test_rejects_missing_file_and_bad_batch_size(self):
+        with self.assertRaisesMessage(CommandError, "No existe el archivo"):
+            call_command("import_catalog", os.path.join(self.directory.name, "no.csv"), stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, "--batch-size"):
+            self.import_file("catalogo.csv", "sku,name,price,category\n", "--batch-size", "0")
+
+
+class SaleScheduleTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Audio")
+        self.discounted = Product.objects.create(
+            name="Auriculares", description="-", price=1000, category=self.category,
+            is_on_sale=True, discount_percentage=15,
+        )
+        self.regular = Product.objects.create(name="Parlante", description="-", price=2000, category=self.category)
+        self.now = timezone.now()
+
+    def apply_schedules(self):
+        call_command("apply_sale_schedules", stdout=StringIO())
+
+    def schedule(self, starts, ends, discount=30, **scope):
+        return SaleSchedule.objects.create(
+            discount_percentage=discount,
+            starts_at=self.now + timedelta(hours=starts),
+            ends_at=self.now + timedelta(hours=ends),
+            **scope,
+        )
+
+    def expire(self, schedule):
+        schedule.starts_at -= timedelta(days=1)
+        schedule.ends_at = self.now - timedelta(minutes=1)
+        schedule.save(update_fields=["starts_at", "ends_at"])
+
+    def sale(self, product):
+        product.refresh_from_db()
+        self.assertEqual(product.final_price, product.compute_final_price())
+        return product.is_on_sale, product.discount_percentage
+
+    def test_expiry_restores_previous_sale(self):
+        schedule = self.schedule(-1, 1, category=self.category)
+        self.apply_schedules()
+        self.assertEqual(self.sale(self.discounted), (True, 30))
+        self.assertEqual(self.sale(self.regular), (True, 30))
+
+        self.expire(schedule)
+        self.apply_schedules()
+        self.assertEqual(self.sale(self.discounted), (True, 15))
+        self.assertEqual(self.sale(self.regular), (False, None))
+
+    def test_expiry_falls_back_to_another_active_schedule(self):
+        category_sale = self.schedule(-1, 2, category=self.category)
+        self.apply_schedules()
+        product_sale = self.schedule(-1, 1, discount=50, product=self.discounted)
+        self.apply_schedules()
+        self.assertEqual(self.sale(self.discounted), (True, 50))
+
+        self.expire(product_sale)
+        self.apply_schedules()
+        self.assertEqual(self.sale(self.discounted), (True, 30))
+        self.assertEqual(Product.objects.get(pk=self.discounted.pk).sale_schedule, category_sale)
+
+        self.expire(category_sale)
+        self.apply_schedules()
+        self.assertEqual(self.sale(self.discounted), (True, 15))
+        self.assertEqual(self.sale(self.regular), (False, None))
+
+    def test_deleting_an_applied_schedule_restores_products(self):
+        category_sale = self.schedule(-1, 2, category=self.category)
+        product_sale = self.schedule(-1, 1, discount=50, product=self.discounted)
+        self.apply_schedules()
+
+        product_sale.delete()
+        self.assertEqual(self.sale(self.discounted), (True, 30))
+        category_sale.delete()
+        self.assertEqual(self.sale(self.discounted), (True, 15))
+        self.assertEqual(self.sale(self.regular), (False, None))
+
+    def test_window_missed_entirely_is_expired_without_applying(self):
+        schedule = self.schedule(-3, -1, category=self.category)
+        self.apply_schedules()
+
+        schedule.refresh_from_db()
+        self.assertIsNone(schedule.applied_at)
+        self.assertIsNotNone(schedule.expired_at)
+        self.assertEqual(self.sale(self.regular), (False, None))
+
+
+class OrderTotalsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="comprador", password="secreta123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        audio = Category.objects.create(name="Audio")
+        video = Category.objects.create(name="Video")
+        self.auriculares = Product.objects.create(
+            name="Auriculares", description="Bluetooth", price=1000, category=audio,
+            is_on_sale=True, discount_percentage=10,
+        )
+        self.parlante = Product.objects.create(name="Parlante", description="Portátil", price=500, category=audio)
+        self.monitor = Product.objects.create(name="Monitor", description="24 pulgadas", price=3000, category=video)
+
+        self.contact = {
+            "name": "Comprador",
+            "phone_number": "1155555555",
+            "dni": "30111222",
+            "street": "Av. Siempre Viva",
+            "number_of_street": "742",
+            "payment_method": "efectivo",
+        }
+
+    def checkout(self, *lines):
+        response = self.client.post(
+            "/api/orders/",
+            {
+                **self.contact,
+                "order_items": [
+                    {"product": product.pk, "quantity": quantity, "price": "1.00"} for product, quantity in lines
+                ],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        return response
+
+    def past_order(self, days, *lines):
+        # Lo mismo que el checkout, con created_at (y por lo tanto order_date) en el pasado
+        order = Order.objects.create(
+            user=self.user, created_at=timezone.now() - timedelta(days=days), total_amount=0, **self.contact
+        )
+        items = OrderItem.objects.bulk_create(order_line(order, product.pk, quantity) for product, quantity in lines)
+        record_order_sales(items, order.order_date)
+        record_order_totals(order)
+        return order
+
+    def sales(self):
+        return sorted(ProductSales.objects.values_list("product__name", "units_all_time", "units_30d", "units_7d"))
+
+    def summaries(self):
+        return (
+            list(SalesDay.objects.values_list("day", "order_count", "units", "revenue")),
+            sorted(CategorySalesDay.objects.values_list("category__name", "order_count", "units", "revenue")),
+        )
+
+    def test_prices_and_total_come_from_the_database(self):
+        response = self.checkout((self.auriculares, 2), (self.monitor, 1))
+
+        lines = {item["product"]["id"]: item for item in response.data["order_items"]}
+        self.assertEqual(lines[self.auriculares.pk]["price"], "900.00")
+        self.assertEqual(lines[self.auriculares.pk]["line_total"], "1800.00")
+        self.assertEqual(lines[self.monitor.pk]["line_total"], "3000.00")
+        self.assertEqual(response.data["total_amount"], "4800.00")
+        self.assertEqual(Order.objects.get().total_amount, Decimal("4800.00"))
+
+    def test_summaries_are_updated_incrementally(self):
+        self.checkout((self.auriculares, 2), (self.parlante, 1))
+        self.checkout((self.parlante, 3), (self.monitor, 1))
+
+        days, by_category = self.summaries()
+        self.assertEqual([row[1:] for row in days], [(2, 7, Decimal("6800.00"))])
+        self.assertEqual(
+            by_category,
+            [("Audio", 2, 6, Decimal("3800.00")), ("Video", 1, 1, Decimal("3000.00"))],
+        )
+
+        rebuild_order_summaries()
+        self.assertEqual(self.summaries(), (days, by_category))
+
+    def test_checkout_updates_sales_rankings(self):
+        self.checkout((self.auriculares, 2), (self.parlante, 1))
+        self.checkout((self.parlante, 3))
+
+        self.assertEqual(self.sales(), [("Auriculares", 2, 2, 2), ("Parlante", 4, 4, 4)])
+        self.assertEqual(
+            set(ProductSalesDay.objects.values_list("day", flat=True)), {Order.objects.first().order_date}
+        )
+        response = self.client.get("/api/products/", {"category": self.parlante.category_id, "sort": "best_selling"})
+        self.assertEqual([product["name"] for product in response.data], ["Parlante", "Auriculares"])
+
+    def test_compaction_moves_old_days_out_of_the_windows(self):
+        self.checkout((self.auriculares, 2))
+        self.past_order(10, (self.parlante, 3))
+
+        self.assertEqual(compact_sales(), (2, 0))
+        self.assertEqual(self.sales(), [("Auriculares", 2, 2, 2), ("Parlante", 3, 3, 0)])
+        compacted = self.sales()
+        rebuild_sales()
+        self.assertEqual(self.sales(), compacted)
+
+        compact_sales(today=timezone.localdate() + timedelta(days=30))
+        self.assertEqual(self.sales(), [("Auriculares", 2, 0, 0), ("Parlante", 3, 0, 0)])
+        self.assertFalse(ProductSalesDay.objects.exists())
+
+    def test_deleting_an_order_removes_its_sales(self):
+        self.checkout((self.auriculares, 2))
+        recent = self.checkout((self.auriculares, 1), (self.parlante, 3)).data["id"]
+        old_order = self.past_order(10, (self.monitor, 4))
+        compact_sales()
+
+        Order.objects.get(pk=recent).delete()
+        old_order.delete()
+        self.assertEqual(
+            self.sales(), [("Auriculares", 2, 2, 2), ("Monitor", 0, 0, 0), ("Parlante", 0, 0, 0)]
+        )
+        self.assertEqual(
+            sorted(ProductSalesDay.objects.filter(units__gt=0).values_list("product__name", "units")),
+            [("Auriculares", 2)],
+        )
+
+    def test_updating_an_order_keeps_its_items(self):
+        order_id = self.checkout((self.auriculares, 2)).data["id"]
+
+        response = self.client.put(f"/api/orders/{order_id}/", {**self.contact, "name": "Otro"}, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+        response = self.client.patch(
+            f"/api/orders/{order_id}/",
+            {"street": "Calle Falsa", "order_items": [{"product": self.monitor.pk, "quantity": 5}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+
+        order = Order.objects.get(pk=order_id)
+        self.assertEqual((order.name, order.street), ("Otro", "Calle Falsa"))
+        self.assertEqual(list(order.order_items.values_list("product__name", "quantity")), [("Auriculares", 2)])
+        self.assertEqual(self.sales(), [("Auriculares", 2, 2, 2)])
+
+    @override_settings(TIME_ZONE="America/Argentina/Buenos_Aires")
+    def test_order_date_is_the_local_day_of_created_at(self):
+        # 02:00 UTC del 1 de enero es todavía 31 de diciembre en Buenos Aires
+        created_at = datetime(2026, 1, 1, 2, 0, tzinfo=dt_timezone.utc)
+        order = Order.objects.create(
+            user=self.user, created_at=created_at, total_amount=0,
+            **self.contact,
+        )
+        self.assertEqual(order.order_date, date(2025, 12, 31))
+
+
+class CoPurchaseTests(SimpleTestCase):
+    def exact_counts(self, order_lines, max_basket):
+        counts = {}
+        for _, lines in groupby(order_lines, key=itemgetter(0)):
+            basket = {product_id for _, product_id in lines}
+            if 2 <= len(basket) <= max_basket:
+                for product_id in basket:
+                    for related_id in basket - {product_id}:
+                        counts.setdefault(product_id, Counter())[related_id] += 1
+        return counts
+
+    def test_matches_exact_counts_without_pruning(self):
+        baskets = [[1, 2, 3], [1, 2], [2, 3], [1, 2, 2], [4], [1, 3, 4, 5], [2, 5]]
+        lines = [(order_id, product_id) for order_id, basket in enumerate(baskets) for product_id in basket]
+
+        top_related = recommendations.co_purchase_top_k(lines, top_k=10, max_basket=3)
+
+        exact = self.exact_counts(lines, max_basket=3)
+        self.assertEqual({product: dict(related) for product, related in top_related.items()}, exact)
+        self.assertEqual(top_related[1][0], (2, 3))
+
+    def test_pruning_keeps_frequent_pairs(self):
+        # El producto 1 se compra siempre con el 2 y una vez con cada uno de otros 30
+        lines = []
+        for order_id, other in enumerate(range(100, 130)):
+            lines += [(order_id, 1), (order_id, 2 if order_id % 2 else other)]
+        lines += [(1000, 1), (1000, 110)]
+
+        with mock.patch.object(recommendations, "prune", wraps=recommendations.prune) as prune:
+            top_related = recommendations.co_purchase_top_k(lines, top_k=2)
+
+        self.assertTrue(prune.called)
+        exact = self.exact_counts(lines, max_basket=recommendations.CO_PURCHASE_MAX_BASKET)
+        self.assertEqual(top_related[1][0], (2, exact[1][2]))
+        # Lo recortado puede quedar subcontado, nunca sobrecontado
+        for product_id, related in top_related.items():
+            for related_id, count in related:
+                self.assertLessEqual(count, exact[product_id][related_id])
+        # El segundo real es el 110 (2 compras), pero se recortó antes de su segunda compra
+        self.assertEqual(exact[1].most_common(2)[1], (110, 2))
+        self.assertNotIn(110, dict(top_related[1]))
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username="comprador", email="comprador@example.com")
+        audio = Category.objects.create(name="Audio")
+        sony = Brand.objects.create(name="Sony")
+        cls.products = [
+            Product.objects.create(
+                sku=f"SKU-{n}", name=f"Producto {n}", description="-", price=100 + n, category=audio,
+                brand=sony if n % 2 else None,
+            )
+            for n in range(5)
+        ]
+        ProductImage.objects.bulk_create(
+            ProductImage(product=product, image=f"https://img.example.com/{product.sku}-{i}.jpg")
+            for product in cls.products
+            for i in range(2)
+        )
+        cls.orders = []
+        for n in range(3):
+            order = Order.objects.create(
+                user=user, name="Comprador", phone_number="1155555555", dni="30111222",
+                street="Av. Siempre Viva", number_of_street="742", payment_method="efectivo", total_amount=0,
+            )
+            OrderItem.objects.bulk_create(
+                OrderItem(order=order, product=product, quantity=1, price=product.price, line_total=product.price)
+                for product in cls.products[:n]
+            )
+            cls.orders.append(order)
+
+    def test_rows_are_complete_across_chunk_boundaries(self):
+        expected = [
+            (product.pk, product.brand.name if product.brand else None, 2) for product in self.products
+        ]
+        for chunk_size in (1, 2, 4, 5, 10):
+            with self.subTest(chunk_size=chunk_size):
+                rows = list(exports.product_rows(chunk_size))
+                self.assertEqual([(row["id"], row["brand"], len(row["images"])) for row in rows], expected)
+                orders = list(exports.order_rows(chunk_size))
+                self.assertEqual(
+                    [(row["id"], len(row["items"])) for row in orders],
+                    [(order.pk, items) for items, order in enumerate(self.orders)],
+                )
+
+    def test_one_query_and_one_prefetch_per_chunk(self):
+        # 5 productos en bloques de 2: 3 bloques con su prefetch y una consulta final vacía
+        with self.assertNumQueries(3 * 2 + 1):
+            list(exports.product_rows(chunk_size=2))
+        with self.assertNumQueries(2 * 2 + 1):
+            list(exports.order_rows(chunk_size=2))
+
+    def test_order_csv_has_one_line_per_item(self):
+        lines = list(exports.export_lines("orders", chunk_size=2))
+        self.assertEqual(len(lines), 1 + 1 + 1 + 2)
+        header = lines[0].strip().split(",")
+        self.assertEqual(header[: len(exports.ORDER_FIELDS)], exports.ORDER_FIELDS)
+
+        rows = [json.loads(line) for line in exports.export_lines("products", "jsonl", chunk_size=3)]
+        self.assertEqual([row["sku"] for row in rows], [product.sku for product in self.products])
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="comprador")
+        self.staff = User.objects.create_user(username="staff", is_staff=True)
+        category = Category.objects.create(name="Audio")
+        self.auriculares = Product.objects.create(name="Auriculares", description="", price=1000, category=category)
+        self.parlante = Product.objects.create(name="Parlante", description="", price=500, category=category)
+        self.later = timezone.now() + timedelta(minutes=5)
+
+    def order(self, *lines, payment_method="efectivo", **fields):
+        order = Order.objects.create(
+            **fields,
+            user=self.user,
+            name="Comprador",
+            phone_number="1155555555",
+            dni="30111222",
+            street="Av. Siempre Viva",
+            number_of_street="742",
+            payment_method=payment_method,
+            total_amount=sum(product.price * quantity for product, quantity in lines),
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(
+                order=order, product=product, quantity=quantity, price=product.price, line_total=product.price * quantity
+            )
+            for product, quantity in lines
+        )
+        return order
+
+    def rollups(self):
+        return (
+            sorted(
+                OrderRollup.objects.filter(order_count__gt=0).values_list(
+                    "granularity", "payment_method", "status", "order_count", "units", "revenue"
+                )
+            ),
+            sorted(ProductRollup.objects.filter(units__gt=0).values_list("product__name", "units", "revenue")),
+        )
+
+    def test_build_processes_only_orders_after_watermark(self):
+        self.order((self.auriculares, 2))
+        self.assertEqual(analytics.build_rollups(now=self.later), 1)
+        self.order((self.auriculares, 1), (self.parlante, 3), payment_method="transferencia")
+
+        self.assertEqual(analytics.build_rollups(now=self.later), 1)
+        self.assertEqual(analytics.build_rollups(now=self.later), 0)
+        orders, products = self.rollups()
+        self.assertEqual(
+            orders,
+            [
+                ("day", "efectivo", "pendiente", 1, 2, Decimal("2000.00")),
+                ("day", "transferencia", "pendiente", 1, 4, Decimal("2500.00")),
+                ("hour", "efectivo", "pendiente", 1, 2, Decimal("2000.00")),
+                ("hour", "transferencia", "pendiente", 1, 4, Decimal("2500.00")),
+            ],
+        )
+        self.assertEqual(products, [("Auriculares", 3, Decimal("3000.00")), ("Parlante", 3, Decimal("1500.00"))])
+
+        analytics.rebuild_rollups(now=self.later)
+        self.assertEqual(self.rollups(), (orders, products))
+
+    def test_recent_orders_wait_until_settled(self):
+        self.order((self.auriculares, 1))
+        self.assertEqual(analytics.build_rollups(), 0)
+        self.assertEqual(analytics.build_rollups(now=self.later), 1)
+
+    def test_status_changes_and_deletes_adjust_rolled_up_orders(self):
+        order = self.order((self.auriculares, 2))
+        kept = self.order((self.parlante, 1))
+        analytics.build_rollups(now=self.later)
+
+        order.status = "cancelado"
+        order.save()
+        record_order_totals(kept)
+        kept.delete()
+
+        orders, products = self.rollups()
+        self.assertEqual(
+            orders,
+            [
+                ("day", "efectivo", "cancelado", 1, 2, Decimal("2000.00")),
+                ("hour", "efectivo", "cancelado", 1, 2, Decimal("2000.00")),
+            ],
+        )
+        self.assertEqual(products, [("Auriculares", 2, Decimal("2000.00"))])
+        self.assertEqual(
+            list(CategorySalesDay.objects.values_list("order_count", "units", "revenue")), [(0, 0, Decimal("0.00"))]
+        )
+
+    def test_signals_read_watermark_without_locking_it(self):
+        order = self.order((self.auriculares, 2))
+        kept = self.order((self.parlante, 1))
+        record_order_totals(kept)
+        analytics.build_rollups(now=self.later)
+
+        with mock.patch.object(analytics, "lock_watermark", side_effect=AssertionError("marca de agua bloqueada")):
+            order.status = "cancelado"
+            order.save()
+            kept.delete()
+
+        self.assertEqual(
+            self.rollups()[0],
+            [
+                ("day", "efectivo", "cancelado", 1, 2, Decimal("2000.00")),
+                ("hour", "efectivo", "cancelado", 1, 2, Decimal("2000.00")),
+            ],
+        )
+
+    def test_daily_reports_bucket_by_order_date(self):
+        # 01:30 en Buenos Aires es 23:30 del día anterior en America/Chicago
+        created_at = datetime(2026, 3, 10, 4, 30, tzinfo=dt_timezone.utc)
+        with timezone.override("America/Argentina/Buenos_Aires"):
+            order = self.order((self.auriculares, 2), created_at=created_at)
+        record_order_totals(order)
+        analytics.build_rollups(now=self.later)
+
+        day = order.order_date
+        self.assertEqual(day, date(2026, 3, 10))
+        self.assertEqual([row["period"] for row in analytics.revenue_series(day, day)], [day])
+        self.assertEqual([row["units"] for row in analytics.top_products(day, day)], [2])
+        self.assertEqual([row["units"] for row in analytics.sales_by_category(day, day)], [2])
+        self.assertEqual(analytics.top_products(day - timedelta(days=1), day - timedelta(days=1)), [])
+
+    def test_endpoints_are_staff_only_and_read_rollups(self):
+        self.order((self.auriculares, 2))
+        self.order((self.parlante, 1), payment_method="transferencia")
+        analytics.build_rollups(now=self.later)
+        client = APIClient()
+
+        client.force_authenticate(self.user)
+        self.assertEqual(client.get("/api/analytics/revenue/").status_code, 403)
+
+        client.force_authenticate(self.staff)
+        with self.assertNumQueries(1):
+            response = client.get("/api/analytics/revenue/")
+        self.assertEqual(response.data["results"][-1]["revenue"], Decimal("2500.00"))
+        self.assertEqual(response.data["results"][-1]["period"], timezone.localdate())
+
+        response = client.get("/api/analytics/top-products/", {"limit": 1})
+        self.assertEqual([row["product__name"] for row in response.data["results"]], ["Auriculares"])
+        response = client.get("/api/analytics/payment-methods/")
+        self.assertEqual(
+            {row["payment_method"]: row["orders"] for row in response.data["results"]},
+            {"efectivo": 1, "transferencia": 1},
+        )
+        response = client.get("/api/analytics/top-products/", {"limit": -1})
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(client.get("/api/analytics/revenue/", {"days": 0}).status_code, 400)
+        self.assertEqual(client.get("/api/analytics/revenue/", {"granularity": "week"}).status_code, 400)
+
+
+ASGI_URLCONF = "ecommer_electronica_backend2.asgi_urls"
+
+
+class AsyncViewTests(TestCase):
+    # Las vistas async de asgi_urls deben responder lo mismo que los viewsets bajo WSGI
+
+    @classmethod
+    def setUpTestData(cls):
+        # Como confirmado: las vistas async leen categorías y marcas desde otro thread, que no
+        # ve la copia propia de la transacción que abre TestCase
+        with cls.captureOnCommitCallbacks(execute=True):
+            seed_store(products=40, users=8, orders=10, images_per_product=1, max_comments_per_product=3)
+        cls.product = Product.objects.filter(comment__isnull=False).order_by("id").first()
+        cls.user = Comment.objects.filter(product=cls.product).first().user
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        metrics_summary.reset()
+
+    def fetch_async(self, method, path, *args, **kwargs):
+        with override_settings(ROOT_URLCONF=ASGI_URLCONF):
+            response = async_to_sync(getattr(AsyncClient(), method))(path, *args, **kwargs)
+            response.view = response.resolver_match.func
+        return response
+
+    def test_reads_match_sync_views(self):
+        product, category = self.product.pk, self.product.category_id
+        headers = {"Authorization": f"Token {self.token.key}"}
+        paths = [
+            "/api/products/",
+            f"/api/products/?category={category}&sort=best_rated",
+            f"/api/products/{product}/",
+            f"/api/products/{Product.objects.order_by('-pk').first().pk + 1}/",
+            "/api/products/search/?search=modelo%201",
+            "/api/products/search/",
+            "/api/categories/",
+            "/api/brands/",
+            f"/api/brands/?category={category}",
+            f"/api/comments/get_comments/?product={product}",
+            "/api/comments/get_comments/?page_id=home",
+        ]
+        for path in paths:
+            with self.subTest(path):
+                expected = self.client.get(path, headers=headers)
+                response = self.fetch_async("get", path, headers=headers)
+                self.assertEqual(response.view.__module__, "tienda.async_views")
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(response.json(), expected.json())
+
+    def test_writes_fall_back_to_viewsets(self):
+        response = self.fetch_async("post", "/api/brands/", {"name": "Marca async"}, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Brand.objects.filter(name="Marca async").exists())
+
+        response = self.fetch_async(
+            "patch", f"/api/products/{self.product.pk}/", {"name": "Renombrado"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Product.objects.get(pk=self.product.pk).name, "Renombrado")
+
+    def test_metrics_record_async_requests(self):
+        self.fetch_async("get", f"/api/products/{self.product.pk}/")
+        report = {row["view"]: row for row in metrics_summary.snapshot()}
+        self.assertEqual(report["product-detail"]["sampled_requests"], 1)
+        self.assertGreater(report["product-detail"]["max_queries"], 0)
+
+    def test_google_login_verifies_off_the_shared_thread(self):
+        User.objects.create_user("google", email="google@example.com")
+        threads = []
+
+        def verify(credential, *args, **kwargs):
+            threads.append(threading.current_thread())
+            return {"email": "google@example.com", "name": "google"}
+
+        data = {"credential": "credencial"}
+        with mock.patch("google.oauth2.id_token.verify_oauth2_token", side_effect=verify):
+            expected = self.client.post("/api/google-login/", data, content_type="application/json")
+            response = self.fetch_async("post", "/api/google-login/", data, content_type="application/json")
+
+        self.assertEqual(response.view.__module__, "tienda.async_views")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), expected.json())
+        # La vista sync corre en el hilo del test; la async verifica en un hilo aparte
+        self.assertIs(threads[0], threading.main_thread())
+        self.assertIsNot(threads[1], threading.main_thread())
+
+
+PERF_BASELINES = Path(__file__).resolve().parent / "perf_baselines.json"
+PERF_REPETITIONS = 5
+# La latencia depende de la máquina: se falla recién al superar 3 veces el p95 registrado
+# más un margen fijo para las rutas de pocos milisegundos. Las queries se comparan exactas.
+PERF_LATENCY_TOLERANCE = 3.0
+# Tope absoluto por request, también al regenerar las líneas base: un N+1 sobre los datos
+# sembrados pasa largamente este número y no puede quedar registrado como presupuesto
+PERF_MAX_QUERIES = 60
+PERF_LATENCY_SLACK_MS = 20
+PERF_UNMEASURED = {
+    "get_user_inf_google_auth": "valida el token contra Google",
+    "upload-profile-image": "sube la imagen a Cloudinary",
+    "product-image-list": "sube imágenes a Cloudinary",
+    "product-image-detail": "borra imágenes en Cloudinary",
+}
+
+
+def url_names(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from url_names(pattern.url_patterns)
+        elif pattern.name:
+            yield pattern.name
+
+
+@tag("performance")
+@override_settings(
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+    REQUEST_METRICS_SAMPLE_RATE=0,
+    # Con locmem la copia de categorías y marcas se recarga en cada consulta de versión:
+    # se fija para que el conteo de queries no dependa de cuánto tarda la corrida
+    REFERENCE_CACHE_CHECK_SECONDS=3600,
+)
+class EndpointPerformanceTests(TestCase):
+    # Con TIENDA_UPDATE_PERF_BASELINES=1 se reescribe perf_baselines.json con lo medido.
+    # Se puede excluir de una corrida rápida con --exclude-tag performance.
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_store(products=1000, users=100, orders=300, max_comments_per_product=4)
+        analytics.build_rollups(now=timezone.now() + timedelta(minutes=5))
+        cls.product = (
+            Product.objects.filter(comment__isnull=False, co_purchases__isnull=False, brand__isnull=False)
+            .order_by("id")
+            .first()
+        )
+        cls.category = cls.product.category
+        cls.comment = Comment.objects.filter(product=cls.product).first()
+        cls.customer = User.objects.filter(orders__isnull=False).order_by("id").first()
+        cls.order = cls.customer.orders.first()
+        cls.admin = User.objects.create_user("admin_perf", password="secreta123", is_staff=True)
+        cls.shopper = User.objects.create_user(
+            "comprador", email="comprador@example.com", password="secreta123"
+        )
+        cls.targets = list(Product.objects.order_by("id")[:PERF_REPETITIONS])
+
+    def cases(self):
+        product = self.product.pk
+        category = self.category.pk
+        brand = quote(self.product.brand.name)
+        checkout = {
+            "name": "Comprador",
+            "phone_number": "1155555555",
+            "dni": "30111222",
+            "street": "Av. Siempre Viva",
+            "number_of_street": "742",
+            "payment_method": "efectivo",
+        }
+
+        def logout(i):
+            Token.objects.get_or_create(user=self.shopper)
+            return "/api/logout/", {}
+
+        # (etiqueta, método, usuario, path o función i -> (path, datos))
+        cases = [
+            ("api-root", "get", self.customer, "/api/"),
+            ("product-list", "get", None, "/api/products/"),
+            ("product-list sort=discount", "get", None, "/api/products/?sort=discount"),
+            ("product-list sort=latest", "get", None, "/api/products/?sort=latest"),
+            ("product-list category", "get", None, f"/api/products/?category={category}"),
+            *(
+                (f"product-list category sort={sort}", "get", None, f"/api/products/?category={category}&sort={sort}")
+                for sort in ("best_selling", "best_rated", "trending", "latest", "discount")
+            ),
+            (
+                "product-list category filters",
+                "get",
+                None,
+                f"/api/products/?category={category}&brand={brand}&min_price=1000&max_price={self.product.final_price}",
+            ),
+            ("product-detail", "get", None, f"/api/products/{product}/"),
+            ("product-rating", "get", None, f"/api/products/{product}/rating/"),
+            ("product-bought-together", "get", None, f"/api/products/{product}/bought-together/"),
+            ("product-related-products", "get", None, f"/api/products/{product}/related-products/"),
+            ("product-search", "get", None, "/api/products/search/?search=modelo%2012"),
+            ("product-facets", "get", None, f"/api/products/facets/?category={category}&on_sale=true"),
+            ("product-export", "get", self.admin, "/api/products/export/"),
+            (
+                "product-bulk-update",
+                "post",
+                self.admin,
+                lambda i: (
+                    "/api/products/bulk-update/",
+                    {"category": category, "is_on_sale": True, "discount_percentage": 10 + i},
+                ),
+            ),
+            ("category-list", "get", None, "/api/categories/"),
+            ("category-detail", "get", None, f"/api/categories/{category}/"),
+            ("category-on-sale-categories", "get", None, "/api/categories/on-sale-categories/"),
+            ("category-recent-categories", "get", None, "/api/categories/recent-categories/"),
+            ("brand-list", "get", None, "/api/brands/"),
+            ("brand-list category", "get", None, f"/api/brands/?category={category}"),
+            ("brand-detail", "get", None, f"/api/brands/{self.product.brand_id}/"),
+            ("comment-get-comments product", "get", self.customer, f"/api/comments/get_comments/?product={product}"),
+            ("comment-get-comments page", "get", None, "/api/comments/get_comments/?page_id=home"),
+            ("comment-feed product", "get", self.customer, f"/api/comments/feed/?product={product}"),
+            ("comment-feed page", "get", None, "/api/comments/feed/?page_id=home"),
+            ("comment-list", "get", self.customer, "/api/comments/"),
+            ("comment-detail", "get", self.customer, f"/api/comments/{self.comment.pk}/"),
+            (
+                "comment-list create",
+                "post",
+                self.shopper,
+                lambda i: (
+                    "/api/comments/",
+                    {"product": self.targets[i].pk, "rating": 4, "comment_text": "Muy bueno"},
+                ),
+            ),
+            ("order-list", "get", self.customer, "/api/orders/"),
+            ("order-detail", "get", self.customer, f"/api/orders/{self.order.pk}/"),
+            ("order-get-orders", "get", self.customer, f"/api/orders/get_orders/?user_id={self.customer.pk}"),
+            ("order-export", "get", self.admin, "/api/orders/export/"),
+            ("analytics-revenue", "get", self.admin, "/api/analytics/revenue/"),
+            ("analytics-revenue hour", "get", self.admin, "/api/analytics/revenue/?granularity=hour"),
+            ("analytics-top-products", "get", self.admin, "/api/analytics/top-products/"),
+            ("analytics-categories", "get", self.admin, "/api/analytics/categories/"),
+            ("analytics-payment-methods", "get", self.admin, "/api/analytics/payment-methods/"),
+            ("analytics-statuses", "get", self.admin, "/api/analytics/statuses/"),
+            (
+                "order-list checkout",
+                "post",
+                self.shopper,
+                lambda i: (
+                    "/api/orders/",
+                    {
+                        **checkout,
+                        "order_items": [
+                            {"product": target.pk, "quantity": 1, "price": str(target.final_price)}
+                            for target in self.targets[: i + 1]
+                        ],
+                    },
+                ),
+            ),
+            (
+                "register_user",
+                "post",
+                None,
+                lambda i: (
+                    "/api/register/",
+                    {
+                        "username": f"nuevo{i}",
+                        "email": f"nuevo{i}@example.com",
+                        "password": "secreta123",
+                        "confirm_password": "secreta123",
+                    },
+                ),
+            ),
+            ("login_user", "post", None, lambda i: ("/api/login/", {"username_or_email": "comprador", "password": "secreta123"})),
+            ("logout_user", "post", self.shopper, logout),
+            (
+                "password_register",
+                "post",
+                self.shopper,
+                lambda i: (
+                    "/api/password-register/",
+                    {"user_id": self.shopper.pk, "password": "secreta123", "passwordRepeat": "secreta123"},
+                ),
+            ),
+            (
+                "user_update",
+                "put",
+                self.shopper,
+                lambda i: (
+                    "/api/user-update/",
+                    {"current_password": "secreta123", "new_email": f"comprador{i}@example.com"},
+                ),
+            ),
+            ("request_metrics", "get", self.admin, "/api/metrics/requests/"),
+        ]
+        return cases
+
+    def measure(self, method, user, request):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+
+        if method == "get":
+            # Calentamiento fuera de la medición (imports perezosos, caches de DRF)
+            client.get(request)
+
+        timings = []
+        queries = 0
+        for i in range(PERF_REPETITIONS):
+            path, data = request(i) if callable(request) else (request, None)
+            # execute_wrapper en lugar de CaptureQueriesContext: el log de queries se corta en 9000
+            metrics = RequestMetrics()
+            gc.collect()
+            gc.disable()
+            try:
+                with connection.execute_wrapper(metrics.record_query):
+                    started = perf_counter()
+                    response = getattr(client, method)(path, data, format="json")
+                    if response.streaming:
+                        b"".join(response.streaming_content)
+                    timings.append((perf_counter() - started) * 1000)
+            finally:
+                gc.enable()
+            self.assertLess(response.status_code, 400, f"{method.upper()} {path}: {response.status_code}")
+            queries = max(queries, metrics.queries)
+
+        return response.resolver_match.view_name, queries, percentile(timings, 0.95)
+
+    def test_endpoints_within_baselines(self):
+        baselines = json.loads(PERF_BASELINES.read_text()) if PERF_BASELINES.exists() else {}
+        measured = {}
+        view_names = set()
+
+        for label, method, user, request in self.cases():
+            view_name, queries, p95 = self.measure(method, user, request)
+            view_names.add(view_name)
+            with self.subTest(label):
+                self.assertLessEqual(queries, PERF_MAX_QUERIES, "Demasiadas queries: ¿falta un prefetch?")
+            measured[label] = {"queries": queries, "p95_ms": round(p95, 1)}
+
+        if os.environ.get("TIENDA_UPDATE_PERF_BASELINES"):
+            PERF_BASELINES.write_text(json.dumps(measured, indent=2) + "\n")
+            return
+
+        for label, result in measured.items():
+            with self.subTest(label):
+                self.assertIn(label, baselines, "Falta la línea base; correr con TIENDA_UPDATE_PERF_BASELINES=1")
+                baseline = baselines[label]
+                self.assertLessEqual(result["queries"], baseline["queries"], "Aumentó la cantidad de queries")
+                self.assertLessEqual(
+                    result["p95_ms"],
+                    baseline["p95_ms"] * PERF_LATENCY_TOLERANCE + PERF_LATENCY_SLACK_MS,
+                    "El p95 superó la línea base",
+                )
+
+        unmeasured = set(url_names(tienda_urls.urlpatterns)) - view_names - set(PERF_UNMEASURED)
+        self.assertFalse(unmeasured, f"Rutas sin medir: {sorted(unmeasured)}")
+
+
+# Tiempo de imports de un proceso nuevo medido con -X importtime (que lo infla un poco).
+# Hoy ronda los 700 ms; el margen absorbe máquinas más lentas, no dependencias nuevas.
+STARTUP_IMPORT_BUDGET_MS = float(os.environ.get("TIENDA_STARTUP_BUDGET_MS", 1500))
+
+
+@tag("performance")
+class StartupImportTests(SimpleTestCase):
+    def test_cold_start_within_budget(self):
+        total, modules = min((measure_startup() for _ in range(3)), key=lambda run: run[0])
+
+        loaded = [module for module in LAZY_MODULES if module in modules]
+        self.assertFalse(loaded, f"Se importan al arrancar: {loaded}")
+        self.assertLessEqual(total, STARTUP_IMPORT_BUDGET_MS, "El arranque superó el presupuesto de imports")
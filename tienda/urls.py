@@ -4,6 +4,7 @@ from .views import (
     login_user,
     logout_user,
     google_login,
+    request_metrics,
     password_register,
     UserUpdateView,
     ProductViewSet,
@@ -12,7 +13,8 @@ from .views import (
     OrderViewSet,
     CommentViewSet,
     UserProfileImageView,
-    ProductImageViewSet
+    ProductImageViewSet,
+    AnalyticsViewSet,
 )
 from rest_framework.routers import DefaultRouter
 from django.conf import settings
@@ -25,6 +27,7 @@ router.register(r"brands", BrandViewSet)
 router.register(r"orders", OrderViewSet)
 router.register(r'comments', CommentViewSet)
 router.register(r'products/images', ProductImageViewSet, basename='product-image')
+router.register(r'analytics', AnalyticsViewSet, basename='analytics')
 
 urlpatterns = [
     path("register/", register_user, name="register_user"),
@@ -34,5 +37,6 @@ urlpatterns = [
     path("password-register/", password_register, name="password_register"),
     path("user-update/", UserUpdateView.as_view(), name="user_update"),
     path('upload-profile-image/', UserProfileImageView.as_view(), name='upload-profile-image'),
+    path("metrics/requests/", request_metrics, name="request_metrics"),
     path("", include(router.urls)),
 ]
\ No newline at end of file
@@ -1,5 +1,4 @@
 import os
-import requests
 
 from rest_framework import status, viewsets
 from rest_framework.response import Response
@@ -7,44 +6,66 @@ from rest_framework.decorators import api_view, api_view, permission_classes, ac
 
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.views import APIView
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.authtoken.models import Token
 from rest_framework.pagination import LimitOffsetPagination
-from .models import Product, Category, Brand, Order, OrderItem, Comment, UserProfile
+from .models import (
+    Product,
+    Category,
+    Brand,
+    Order,
+    OrderItem,
+    Comment,
+    UserProfile,
+    CategorySummary,
+    ProductRating,
+    ProductCoPurchase,
+    OrderRollup,
+)
 from tienda.models import Product, ProductImage
+from . import analytics
+from .exports import export_lines
+from .facets import category_facets
+from .metrics import summary as metrics_summary
+from .identity import create_user_with_free_username
+from .images import cloudinary_uploader, optimize_image, queue_image_deletion, queue_profile_picture
 from .serializers import (
     UserRegistrationSerializer,
     UserLoginSerializer,
     ProductSerializer,
     CategorySerializer,
+    CategorySummarySerializer,
     BrandSerializer,
     UserUpdateSerializer,
     OrderSerializer,
     OrderItemSerializer,
     CommentSerializer,
+    CommentFeedSerializer,
     UserProfileSerializer,
-    ProductImageSerializer
+    ProductImageSerializer,
+    ProductBulkUpdateSerializer,
+    ProductRatingSerializer,
 )
+from .pricing import bulk_price_changes, update_in_batches
+from .ratings import apply_rating_change
+from .recommendations import CO_PURCHASE_TOP_K
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import User
-from django.db.models import Q, Case, When, F, FloatField, Sum, Avg
+from django.db.models import Q, F, Case, When, IntegerField, Prefetch
 from django.utils import timezone
-from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.utils.dateparse import parse_date, parse_datetime
 from django.shortcuts import get_object_or_404
+from django.http import StreamingHttpResponse
+from django.conf import settings
+from django.utils.cache import patch_cache_control
 from django.core.files import File
 from django.db import transaction
 
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from datetime import timedelta
-
-from google.auth.transport import requests as google_requests
-from google.oauth2 import id_token
-
-import cloudinary.uploader
-
-from io import BytesIO
-
-from PIL import Image
+import json
+import time
 
 
 User = get_user_model()
@@ -78,41 +99,6 @@ def authenticate_user(username_or_email=None, password=None):
         return user
     return None
 
-def optimize_image(image, max_size_kb=200, quality=80, format="WEBP"):
-
-    if not hasattr(image, "name"):
-        image.name = "temp_image.jpg"
-    
-    if image.name.lower().endswith(".webp"):
-        return image
-
-    img = Image.open(image).convert("RGB")
-
-    output_io = BytesIO()
-    img.save(output_io, format=format, quality=quality)
-    output_io.seek(0)
-
-    new_image = InMemoryUploadedFile(
-        output_io, "ImageField", f"{image.name.split('.')[0]}.webp",
-        "image/webp", output_io.tell(), None
-    )
-
-    while new_image.size > max_size_kb * 1024 and quality > 50:
-        quality -= 5
-        output_io = BytesIO()
-        img.save(output_io, format=format, quality=quality)
-        output_io.seek(0)
-
-        new_image = InMemoryUploadedFile(
-            output_io, "ImageField", f"{image.name.split('.')[0]}.webp",
-            "image/webp", output_io.tell(), None
-        )
-
-    if new_image.size > max_size_kb * 1024:
-        raise ValidationError({"image": "La imagen sigue siendo demasiado grande tras la compresión."})
-
-    return new_image
-
 @api_view(["POST"])
 @permission_classes([AllowAny])
 def login_user(request):
@@ -159,12 +145,54 @@ def login_user(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+GOOGLE_CLIENT_ID = "963077110039-a25ipd3d3aal87omlseibm178m2n6jht.apps.googleusercontent.com"
+
+
+def verify_google_credential(credential):
+    # google-auth (y requests) solo se cargan en este endpoint
+    from google.auth.transport import requests as google_requests
+    from google.oauth2 import id_token
+
+    return id_token.verify_oauth2_token(
+        credential, google_requests.Request(), GOOGLE_CLIENT_ID, clock_skew_in_seconds=60
+    )
+
+
+def google_user_payload(user_authenticated):
+    email = user_authenticated.get("email")
+    username = user_authenticated.get("name")
+    profile_picture = user_authenticated.get("picture")
+    user = User.objects.filter(email=email).first()
+    if not user:
+        # Sin contraseña: create_user la deja inutilizable en el mismo INSERT
+        user = create_user_with_free_username(username or email.split("@")[0], email)
+        user_profile, _ = UserProfile.objects.get_or_create(user=user)
+
+        if profile_picture:
+            # Se responde con la imagen de Google y se reemplaza al terminar la importación
+            user_profile.image = profile_picture
+            user_profile.save(update_fields=["image"])
+            transaction.on_commit(lambda: queue_profile_picture(user.id, profile_picture))
+
+    token, _ = Token.objects.get_or_create(user=user)
+
+    return {
+        "id": user.id,
+        "token": token.key,
+        "username": user.username,
+        "email": user.email,
+        "is_superuser": user.is_superuser,
+        "is_staff": user.is_staff,
+        "image": user.profile.image if hasattr(user, "profile") else None,
+        "provider_auth": "google",
+        "has_password": user.has_usable_password(),
+    }
+
+
 @api_view(["POST"])
 @permission_classes([AllowAny])
 def google_login(request):
     credential = request.data.get("credential")
-    client_id = "963077110039-a25ipd3d3aal87omlseibm178m2n6jht.apps.googleusercontent.com"
-    print("Credential:", credential)
 
     if not credential:
         return Response(
@@ -173,76 +201,10 @@ def google_login(request):
         )
 
     try:
-        user_authenticated = id_token.verify_oauth2_token(
-            credential, google_requests.Request(), client_id, clock_skew_in_seconds=60
-        )
-        print("User authenticated:", user_authenticated)
+        user_authenticated = verify_google_credential(credential)
 
         if user_authenticated:
-            email = user_authenticated.get("email")
-            username = user_authenticated.get("name")
-            profile_picture = user_authenticated.get("picture")
-            print("Profile picture:", profile_picture)
-            user = User.objects.filter(email=email).first()
-            if not user:
-                base_username = username or email.split("@")[0]
-                unique_username = base_username
-                counter = 1
-                while User.objects.filter(username=unique_username).exists():
-                    unique_username = f"{base_username}_{counter}"
-                    counter += 1
-
-                user = User.objects.create(
-                    email=email,
-                    username=unique_username,
-                )
-                user.set_unusable_password()
-                user.save()
-                created = True
-            else:
-                created = False
-
-            if created:
-                user_profile, _ = UserProfile.objects.get_or_create(user=user)
-
-                if profile_picture:
-                    response = requests.get(profile_picture)
-                    if response.status_code == 200:
-                        image_bytes = BytesIO(response.content)
-                        image_bytes.name = "profile_picture.jpg"
-
-                        image = optimize_image(image_bytes)
-
-                        result = cloudinary.uploader.upload(
-                            image,
-                            folder="users/",
-                            public_id=f"{user.id}_profile",
-                            overwrite=True,
-                            resource_type="image",
-                            format="webp",
-                        )
-
-                        user_profile.image = result.get("secure_url")
-                        user_profile.save()
-
-            has_password = user.has_usable_password()
-
-            token, _ = Token.objects.get_or_create(user=user)
-
-            return Response(
-                {
-                    "id": user.id,
-                    "token": token.key,
-                    "username": user.username,
-                    "email": user.email,
-                    "is_superuser": user.is_superuser,
-                    "is_staff": user.is_staff,
-                    "image": user.profile.image if hasattr(user, "profile") else None,
-                    "provider_auth": "google",
-                    "has_password": has_password,
-                },
-                status=status.HTTP_200_OK,
-            )
+            return Response(google_user_payload(user_authenticated), status=status.HTTP_200_OK)
         else:
             return Response(
                 {"error": "Credencial inválida"},
@@ -258,7 +220,7 @@ def google_login(request):
         return Response(
             {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
-       
+
 
 @api_view(["POST"])
 def logout_user(request):
@@ -300,6 +262,103 @@ def password_register(request):
         )
 
 
+@api_view(["GET", "DELETE"])
+@permission_classes([IsAdminUser])
+def request_metrics(request):
+    if request.method == "DELETE":
+        metrics_summary.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(
+        {
+            "sample_rate": settings.REQUEST_METRICS_SAMPLE_RATE,
+            "slow_ms": settings.REQUEST_METRICS_SLOW_MS,
+            "max_queries": settings.REQUEST_METRICS_MAX_QUERIES,
+            "views": metrics_summary.snapshot(),
+        }
+    )
+
+
+def export_response(request, name):
+    export_format = request.query_params.get("export_format", "csv")
+    if export_format not in ("csv", "jsonl"):
+        raise ValidationError({"export_format": "Formato no soportado. Usa csv o jsonl."})
+
+    content_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    response = StreamingHttpResponse(export_lines(name, export_format), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{name}.{export_format}"'
+    return response
+
+
+def catalog_products(queryset=None):
+    queryset = Product.objects.all() if queryset is None else queryset
+    # Categoría y marca salen de tienda.reference, sin JOIN
+    return queryset.select_related("rating_summary", "sales").prefetch_related("images")
+
+
+def product_list_queryset(params):
+    category_id = params.get("category")
+    sort = params.get("sort")
+
+    if not category_id:
+        if sort == "discount":
+            return catalog_products().filter(is_on_sale=True)
+        if sort == "latest":
+            return catalog_products().order_by("-created_at")
+        return catalog_products()
+
+    queryset = catalog_products().filter(category__id=category_id)
+
+    brand = params.get("brand")
+    min_price = params.get("min_price")
+    max_price = params.get("max_price")
+
+    if brand:
+        queryset = queryset.filter(brand__name=brand)
+
+    if min_price:
+        queryset = queryset.filter(final_price__gte=min_price)
+    if max_price:
+        queryset = queryset.filter(final_price__lte=max_price)
+
+    if sort == "best_selling":
+        queryset = queryset.order_by(F("sales__units_all_time").desc(nulls_last=True))
+    elif sort == "trending":
+        queryset = queryset.order_by(F("sales__units_7d").desc(nulls_last=True))
+    elif sort == "best_rated":
+        queryset = queryset.order_by(F("rating_summary__average_rating").desc(nulls_last=True))
+    elif sort == "latest":
+        queryset = queryset.order_by("-created_at")
+    elif sort == "discount":
+        queryset = queryset.filter(is_on_sale=True).order_by("-discount_percentage")
+
+    return queryset
+
+
+def search_querysets(search_term):
+    products = catalog_products().filter(Q(name__icontains=search_term)).order_by('-id')[:10]
+    categories = Category.objects.filter(
+        Q(name__icontains=search_term) | Q(products__name__icontains=search_term)
+    ).distinct()
+    return products, categories
+
+
+def category_summaries():
+    return CategorySummary.objects.select_related("category").order_by("category_id")
+
+
+def brands_queryset(category_id=None):
+    if category_id:
+        return Brand.objects.filter(products__category_id=category_id).distinct()
+    return Brand.objects.all()
+
+
+def comments_queryset(page_identifier=None, product_id=None):
+    comments = Comment.objects.select_related("user__profile")
+    if page_identifier:
+        return comments.filter(page_id=page_identifier)
+    return comments.filter(product=product_id)
+
+
 class ProductPagination(LimitOffsetPagination):
     default_limit = 10
     max_limit = 50
@@ -329,7 +388,7 @@ class ProductViewSet(viewsets.ModelViewSet):
                 for image in images:
                     optimized_image = optimize_image(image)
                     print(optimized_image)
-                    result = cloudinary.uploader.upload(optimized_image, folder="products/")
+                    result = cloudinary_uploader().upload(optimized_image, folder="products/")
                     uploaded_images.append(ProductImage(product=product, image=result["secure_url"]))
 
                 ProductImage.objects.bulk_create(uploaded_images)
@@ -343,67 +402,22 @@ class ProductViewSet(viewsets.ModelViewSet):
     def perform_destroy(self, instance):
         product_images = ProductImage.objects.filter(product=instance)
 
+        public_ids = []
         for image in product_images:
             if image.image:
                 url_parts = image.image.split("/")
                 public_id_with_extension = "/".join(url_parts[-2:])
-                public_id = ".".join(public_id_with_extension.split(".")[:-1])
-                print(public_id)
-                cloudinary.uploader.destroy(public_id)
+                public_ids.append(".".join(public_id_with_extension.split(".")[:-1]))
 
         product_images.delete()
         
         instance.delete()
+        # Cloudinary se limpia fuera del request, una vez confirmado el borrado
+        transaction.on_commit(lambda: queue_image_deletion(public_ids))
     
     def list(self, request):
         try:
-            category_id = request.query_params.get("category")
-            sort = request.query_params.get("sort")
-
-            if not category_id:
-                if sort == "discount":
-                    products = Product.objects.filter(is_on_sale=True)
-                elif sort == "latest":
-                    products = Product.objects.order_by("-created_at")
-                else:
-                    products = Product.objects.all()
-
-                if not products.exists():
-                    return Response({"message": "No hay productos disponibles."}, status=status.HTTP_404_NOT_FOUND)
-
-                serializer = self.get_serializer(products, many=True)
-                return Response(serializer.data)
-
-            queryset = Product.objects.filter(category__id=category_id)
-
-            brand = request.query_params.get("brand")
-            min_price = request.query_params.get("min_price")
-            max_price = request.query_params.get("max_price")
-
-            if brand:
-                queryset = queryset.filter(brand__name=brand)
-
-            queryset = queryset.annotate(
-                price_final=Case(
-                    When(is_on_sale=True, then=F("price") * (1 - F("discount_percentage") / 100)),
-                    default=F("price"),
-                    output_field=FloatField(),
-                )
-            )
-
-            if min_price:
-                queryset = queryset.filter(price_final__gte=min_price)
-            if max_price:
-                queryset = queryset.filter(price_final__lte=max_price)
-
-            if sort == "best_selling":
-                queryset = queryset.annotate(total_sales=Sum("order_items__quantity")).order_by("-total_sales")
-            elif sort == "best_rated":
-                queryset = queryset.annotate(avg_rating=Avg("comment__rating")).order_by("-avg_rating")
-            elif sort == "latest":
-                queryset = queryset.order_by("-created_at")
-            elif sort == "discount":
-                queryset = queryset.filter(is_on_sale=True).order_by("-discount_percentage")
+            queryset = product_list_queryset(request.query_params)
 
             if not queryset.exists():
                 return Response({"message": "No hay productos disponibles."}, status=status.HTTP_404_NOT_FOUND)
@@ -415,10 +429,31 @@ class ProductViewSet(viewsets.ModelViewSet):
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     def retrieve(self, request, *args, **kwargs):
-        product = get_object_or_404(Product, pk=kwargs["pk"])
+        product = get_object_or_404(catalog_products(), pk=kwargs["pk"])
         serializer = self.get_serializer(product)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get'], url_path='rating')
+    def rating(self, request, pk=None):
+        product = get_object_or_404(Product.objects.select_related("rating_summary"), pk=pk)
+        summary = getattr(product, "rating_summary", None)
+        return Response(ProductRatingSerializer(summary or ProductRating(product=product)).data)
+
+    @action(detail=True, methods=['get'], url_path='bought-together')
+    def bought_together(self, request, pk=None):
+        related_ids = list(
+            ProductCoPurchase.objects.filter(product_id=pk)
+            .order_by("-count")
+            .values_list("related_id", flat=True)[:CO_PURCHASE_TOP_K]
+        )
+        products = catalog_products().in_bulk(related_ids)
+        serializer = ProductSerializer(
+            [products[related_id] for related_id in related_ids if related_id in products],
+            many=True,
+            context={"request": request},
+        )
+        return Response(serializer.data)
+
     @action(detail=False, methods=['get'], url_path='search')
     def search(self, request):
         search_term = request.query_params.get("search", None)
@@ -426,11 +461,7 @@ class ProductViewSet(viewsets.ModelViewSet):
         if not search_term:
             return Response({"error": "No search term provided"}, status=400)
 
-        products = Product.objects.filter(Q(name__icontains=search_term)).order_by('-id')[:10]
-
-        categories = Category.objects.filter(
-            Q(name__icontains=search_term) | Q(products__name__icontains=search_term)
-        ).distinct()
+        products, categories = search_querysets(search_term)
 
         product_serializer = ProductSerializer(products, many=True)
         category_serializer = CategorySerializer(categories, many=True)
@@ -440,6 +471,56 @@ class ProductViewSet(viewsets.ModelViewSet):
             "categories": category_serializer.data
         })
     
+    @action(detail=False, methods=['get'], url_path='facets')
+    def facets(self, request):
+        category_id = request.query_params.get("category")
+        if not category_id or not category_id.isdigit():
+            return Response({"error": "Debe proporcionar una categoría."}, status=status.HTTP_400_BAD_REQUEST)
+
+        on_sale = request.query_params.get("on_sale")
+        if on_sale is not None:
+            on_sale = on_sale.lower() in ("1", "true")
+
+        return Response(
+            category_facets(
+                int(category_id),
+                brand=request.query_params.get("brand") or None,
+                on_sale=on_sale,
+                min_price=request.query_params.get("min_price"),
+                max_price=request.query_params.get("max_price"),
+            )
+        )
+
+    @action(detail=False, methods=['post'], url_path='bulk-update', permission_classes=[IsAdminUser])
+    def bulk_update(self, request):
+        serializer = ProductBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        started = time.monotonic()
+        products = Product.objects.all()
+        if "category" in data:
+            products = products.filter(category=data["category"])
+        if "brand" in data:
+            products = products.filter(brand=data["brand"])
+        if "ids" in data:
+            products = products.filter(id__in=data["ids"])
+
+        updated, batches = update_in_batches(products, bulk_price_changes(data))
+
+        return Response(
+            {
+                "updated": updated,
+                "batches": batches,
+                "elapsed_ms": round((time.monotonic() - started) * 1000, 2),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=['get'], url_path='export', permission_classes=[IsAdminUser])
+    def export(self, request):
+        return export_response(request, "products")
+
     @action(detail=True, methods=['get'], url_path='related-products')
     def related_products(self, request, pk=None):
         try:
@@ -447,33 +528,22 @@ class ProductViewSet(viewsets.ModelViewSet):
         except Product.DoesNotExist:
             return Response({"detail": "Product not found."}, status=404)
 
-        final_price = product.price
-        if product.discount_percentage:
-            final_price = product.price - (product.price * product.discount_percentage / 100)
-
-        price_lower_bound = final_price - 100000
-        price_upper_bound = final_price + 100000
-
+        price_lower_bound = product.final_price - 100000
+        price_upper_bound = product.final_price + 100000
 
         related_products = Product.objects.filter(
             category=product.category,
             brand=product.brand,
             ).exclude(id=product.id)
 
-        products_by_price = Product.objects.annotate(
-            final_price=Case(
-                When(discount_percentage__isnull=False, then=F('price') - (F('price') * F('discount_percentage') / 100)),
-                default=F('price'),
-                output_field=FloatField(),
-            )
-        ).filter(
+        products_by_price = Product.objects.filter(
             category=product.category,
             final_price__gte=price_lower_bound,
             final_price__lte=price_upper_bound,
         ).exclude(id=product.id)
 
         combined_products = related_products | products_by_price
-        combined_products = combined_products.distinct()
+        combined_products = catalog_products(combined_products.distinct())
         
         if combined_products.exists():
             serializer = ProductSerializer(combined_products, many=True, context={'request': request})
@@ -482,8 +552,27 @@ class ProductViewSet(viewsets.ModelViewSet):
         return Response({"detail": "No related products found."}, status=404)
     
 
+COMMENT_FEED_LIMIT = 20
+COMMENT_FEED_MAX_LIMIT = 50
+
+
+def encode_comment_cursor(comment):
+    position = {"created_at": comment.created_at.isoformat(), "id": comment.id} if comment else {}
+    return urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_comment_cursor(cursor):
+    try:
+        position = json.loads(urlsafe_b64decode(cursor.encode()))
+        if not position:
+            return None, None
+        return parse_datetime(position["created_at"]), int(position["id"])
+    except (ValueError, KeyError, TypeError):
+        raise ValidationError({"cursor": "Cursor inválido."})
+
+
 class CommentViewSet(viewsets.ModelViewSet):
-    queryset = Comment.objects.all()
+    queryset = Comment.objects.select_related("user__profile")
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated]
 
@@ -493,7 +582,7 @@ class CommentViewSet(viewsets.ModelViewSet):
         comment_serializer = self.get_serializer(data=comment_data)
         comment_serializer.is_valid(raise_exception=True)
 
-        comment_serializer.save(user=request.user)
+        self.perform_create(comment_serializer)
         return Response(
             {
                 "message": "Comentario enviado exitosamente.",
@@ -502,6 +591,27 @@ class CommentViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED,
         )
 
+    @transaction.atomic
+    def perform_create(self, serializer):
+        comment = serializer.save(user=self.request.user)
+        apply_rating_change(comment.product_id, new_rating=comment.rating)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_product_id = serializer.instance.product_id
+        old_rating = serializer.instance.rating
+        comment = serializer.save()
+        if old_product_id == comment.product_id:
+            apply_rating_change(comment.product_id, old_rating, comment.rating)
+        else:
+            apply_rating_change(old_product_id, old_rating=old_rating)
+            apply_rating_change(comment.product_id, new_rating=comment.rating)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        apply_rating_change(instance.product_id, old_rating=instance.rating)
+        instance.delete()
+
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         if instance.user != request.user:
@@ -527,6 +637,63 @@ class CommentViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK,
         )
 
+    @action(detail=False, methods=["get"], url_path="feed", permission_classes=[AllowAny])
+    def feed(self, request):
+        page_identifier = request.query_params.get("page_id")
+        product_id = request.query_params.get("product")
+        cursor = request.query_params.get("cursor")
+        user = request.user.id if request.user.is_authenticated else None
+
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", COMMENT_FEED_LIMIT)), COMMENT_FEED_MAX_LIMIT))
+        except ValueError:
+            raise ValidationError({"limit": "Debe ser un número."})
+
+        if page_identifier:
+            comments = Comment.objects.filter(page_id=page_identifier)
+        elif product_id:
+            comments = Comment.objects.filter(product=product_id)
+        else:
+            return Response(
+                {"error": "Debe proporcionar un page_id o product_id."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        comments = comments.select_related("user__profile")
+
+        if cursor is None:
+            # Primera página: el comentario propio primero, ordenado en la consulta
+            comments = comments.annotate(
+                is_own=Case(When(user_id=user, then=0), default=1, output_field=IntegerField())
+            ).order_by("is_own", "-created_at", "-id")
+        else:
+            created_at, comment_id = decode_comment_cursor(cursor)
+            if user:
+                comments = comments.exclude(user_id=user)
+            if created_at is not None:
+                comments = comments.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=comment_id)
+                )
+            comments = comments.order_by("-created_at", "-id")
+
+        page = list(comments[:limit + 1])
+        has_next = len(page) > limit
+        page = page[:limit]
+
+        next_cursor = None
+        if has_next:
+            last = page[-1] if page else None
+            # Si la página termina en el comentario propio, la siguiente arranca desde el principio
+            next_cursor = encode_comment_cursor(None if last is None or last.user_id == user else last)
+
+        return Response(
+            {
+                "results": CommentFeedSerializer(page, many=True).data,
+                "next_cursor": next_cursor,
+            },
+            status=status.HTTP_200_OK,
+        )
+
     @action(detail=False, methods=["get"], permission_classes=[AllowAny])
     def get_comments(self, request):
         try:
@@ -535,7 +702,7 @@ class CommentViewSet(viewsets.ModelViewSet):
             user = request.user.id if request.user.is_authenticated else None
 
             if page_identifier:
-                comments = Comment.objects.filter(page_id=page_identifier)
+                comments = comments_queryset(page_identifier=page_identifier)
 
                 if user:
                     comments = sorted(
@@ -548,7 +715,7 @@ class CommentViewSet(viewsets.ModelViewSet):
                 return Response(serializer.data, status=status.HTTP_200_OK)
 
             if product_id:
-                comments = Comment.objects.filter(product=product_id)
+                comments = comments_queryset(product_id=product_id)
 
                 if user:
                     comments = sorted(
@@ -570,8 +737,16 @@ class CommentViewSet(viewsets.ModelViewSet):
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def orders_with_items(queryset=None):
+    queryset = Order.objects.all() if queryset is None else queryset
+    return queryset.prefetch_related(
+        Prefetch("order_items", queryset=OrderItem.objects.order_by("pk")),
+        Prefetch("order_items__product", queryset=catalog_products()),
+    )
+
+
 class OrderViewSet(viewsets.ModelViewSet):
-    queryset = Order.objects.all()
+    queryset = orders_with_items()
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
 
@@ -591,7 +766,7 @@ class OrderViewSet(viewsets.ModelViewSet):
     def get_orders(self, request):
         user_order = request.query_params.get("user_id")
         if user_order:
-            orders = Order.objects.filter(user=user_order)
+            orders = orders_with_items(Order.objects.filter(user=user_order))
             if not orders:
                 return Response(
                     "No tiene ninguna orden", status=status.HTTP_404_NOT_FOUND
@@ -605,6 +780,11 @@ class OrderViewSet(viewsets.ModelViewSet):
         )
 
 
+    @action(detail=False, methods=["get"], url_path="export", permission_classes=[IsAdminUser])
+    def export(self, request):
+        return export_response(request, "orders")
+
+
 class OrderItemViewSet(viewsets.ModelViewSet):
     queryset = OrderItem.objects.all()
     serializer_class = OrderItemSerializer
@@ -622,36 +802,34 @@ class CategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
 
+    def summaries(self):
+        return category_summaries()
+
+    def cached_response(self, summaries, not_found_message):
+        if not summaries:
+            return Response({"message": not_found_message}, status=404)
+
+        response = Response(CategorySummarySerializer(summaries, many=True).data)
+        patch_cache_control(response, public=True, max_age=settings.CATEGORY_CACHE_SECONDS)
+        return response
+
     def list(self, request, *args, **kwargs):
-        if not self.queryset.exists():
-            return Response({"message": "No categories found."}, status=404)
-        
-        return super().list(request, *args, **kwargs)
+        return self.cached_response(self.summaries(), "No categories found.")
     
     @action(detail=False, methods=['get'], url_path='on-sale-categories')
     def on_sale_categories(self, request):
-        categories_with_sale_products = Category.objects.filter(
-            products__is_on_sale=True
-        ).distinct()
-
-        if not categories_with_sale_products:
-            return Response({"message": "No categories with products on sale found."}, status=404)
-
-        serializer = self.get_serializer(categories_with_sale_products, many=True)
-        return Response(serializer.data)
+        return self.cached_response(
+            self.summaries().filter(on_sale_count__gt=0),
+            "No categories with products on sale found.",
+        )
     
     @action(detail=False, methods=['get'], url_path='recent-categories')
     def recent_categories(self, request):
         one_month_ago = timezone.now() - timedelta(days=30)
-        categories_with_recent_products = Category.objects.filter(
-            products__created_at__gte=one_month_ago
-        ).distinct()
-
-        if not categories_with_recent_products:
-            return Response({"message": "No recent categories found."}, status=404)
-
-        serializer = self.get_serializer(categories_with_recent_products, many=True)
-        return Response(serializer.data)
+        return self.cached_response(
+            self.summaries().filter(newest_product_at__gte=one_month_ago),
+            "No recent categories found.",
+        )
 
 
 @permission_classes([AllowAny])
@@ -660,12 +838,7 @@ class BrandViewSet(viewsets.ModelViewSet):
     serializer_class = BrandSerializer
     
     def get_queryset(self):
-        category_id = self.request.query_params.get("category")
-
-        if category_id:
-            return Brand.objects.filter(products__category_id=category_id).distinct()
-
-        return super().get_queryset()
+        return brands_queryset(self.request.query_params.get("category"))
 
 
 class UserUpdateView(APIView):
@@ -721,9 +894,64 @@ class ProductImageViewSet(viewsets.ModelViewSet):
     serializer_class = ProductImageSerializer
 
     def perform_destroy(self, instance):
-        if instance.image:
+        image = instance.image
+        instance.delete()
+        if image:
             # Extraer el public_id de la URL de Cloudinary
-            public_id = instance.image.split("/")[-1].split(".")[0]  # Obtiene el ID sin la extensión
-            cloudinary.uploader.destroy(public_id)  # Borra la imagen en Cloudinary
-        
-        instance.delete()
\ No newline at end of file
+            public_id = image.split("/")[-1].split(".")[0]  # Obtiene el ID sin la extensión
+            transaction.on_commit(lambda: queue_image_deletion([public_id]))
+
+
+ANALYTICS_DEFAULT_DAYS = 30
+ANALYTICS_TOP_PRODUCTS_LIMIT = 10
+
+
+class AnalyticsViewSet(viewsets.ViewSet):
+    # Reportes de ventas para el staff, servidos desde los resúmenes de tienda.analytics
+    permission_classes = [IsAdminUser]
+
+    def date_range(self, request):
+        today = timezone.localdate()
+        try:
+            end = parse_date(request.query_params.get("end", "")) or today
+            start = parse_date(request.query_params.get("start", ""))
+            if start is None:
+                start = end - timedelta(days=int(request.query_params.get("days", ANALYTICS_DEFAULT_DAYS)) - 1)
+        except (ValueError, OverflowError):
+            raise ValidationError({"detail": "Rango inválido: usa start/end (AAAA-MM-DD) o days."})
+        if start > end or (end - start).days >= analytics.ANALYTICS_MAX_DAYS:
+            raise ValidationError(
+                {"detail": f"El rango debe ser de 1 a {analytics.ANALYTICS_MAX_DAYS} días."}
+            )
+        return start, end
+
+    def report(self, request, results):
+        start, end = self.date_range(request)
+        return Response({"start": start, "end": end, "results": results(start, end)})
+
+    @action(detail=False, methods=["get"])
+    def revenue(self, request):
+        granularity = request.query_params.get("granularity", OrderRollup.DAY)
+        if granularity not in dict(OrderRollup.GRANULARITY_CHOICES):
+            raise ValidationError({"granularity": "Usa hour o day."})
+        return self.report(request, lambda start, end: analytics.revenue_series(start, end, granularity))
+
+    @action(detail=False, methods=["get"], url_path="top-products")
+    def top_products(self, request):
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", ANALYTICS_TOP_PRODUCTS_LIMIT)), 100))
+        except ValueError:
+            raise ValidationError({"limit": "Debe ser un número."})
+        return self.report(request, lambda start, end: analytics.top_products(start, end, limit))
+
+    @action(detail=False, methods=["get"])
+    def categories(self, request):
+        return self.report(request, analytics.sales_by_category)
+
+    @action(detail=False, methods=["get"], url_path="payment-methods")
+    def payment_methods(self, request):
+        return self.report(request, analytics.sales_by_payment_method)
+
+    @action(detail=False, methods=["get"])
+    def statuses(self, request):
+        return self.report(request, analytics.status_breakdown)